@@ -1,9 +1,12 @@
 import sys
 import getpass
+import itertools
 import config
 import logging
+from openai import OpenAIError
 from assistant_cli.conversation_history import ConversationHistory
 from assistant_cli.spinning_loader import SpinningLoader
+from core.deadline import RunTimeout
 
 # Setting up logging
 logging = logging.getLogger(__name__)
@@ -55,17 +58,56 @@ class AssistantCLI:
     def _get_response_with_loader(self, user_input):
         loader = SpinningLoader(colors["purple"])
         loader.start()
-        response = self.response_handler(user_input)
-        loader.stop = True
-        loader.join()
-        self._clear_loader_line()
+        try:
+            response = self.response_handler(user_input)
+            if not isinstance(response, str):
+                # Streamed response: keep the loader spinning until the first chunk arrives
+                chunks = iter(response)
+                first_chunk = next(chunks, "")
+                response = itertools.chain([first_chunk], chunks)
+        except (RunTimeout, OpenAIError) as e:
+            # A RunTimeout carries the text the run produced before it was cancelled
+            partial_text = getattr(e, "partial_text", "")
+            response = f"{partial_text}\n{self._error_notice(e)}" if partial_text else self._error_notice(e)
+        finally:
+            loader.stop = True
+            loader.join()
+            self._clear_loader_line()
         return response
 
     def _display_assistant_response(self, response):
         print(colors["green"] + "◆  Assistant" + colors["reset"])
-        print(colors["response"] + response + colors["reset"] + "\n")
+        if not isinstance(response, str):
+            response = self._display_streamed_response(response)
+        else:
+            print(colors["response"] + response + colors["reset"] + "\n")
         self.history.update_history(response)
 
+    def _display_streamed_response(self, chunks):
+        sys.stdout.write(colors["response"])
+        received = []
+        try:
+            for chunk in chunks:
+                received.append(chunk)
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+        except (RunTimeout, OpenAIError) as e:
+            # The text streamed so far stays on screen; only the notice is added
+            notice = f"\n{self._error_notice(e)}" if received else self._error_notice(e)
+            received.append(notice)
+            sys.stdout.write(notice)
+        print(colors["reset"] + "\n")
+        return "".join(received)
+
+    @staticmethod
+    def _error_notice(error):
+        """The notice shown in place of, or after, an answer that failed."""
+        if isinstance(error, RunTimeout):
+            logging.warning(f"The assistant did not answer in time: {error}")
+            return "[The assistant did not answer in time]"
+        logging.error(f"Failed to get the assistant's response: {error}")
+        return f"[The request failed: {error}]"
+
     def _clear_loader_line(self):
         sys.stdout.write("\r\033[K")
 
@@ -1,38 +1,110 @@
+from core.answer_cache import AnswerCache
 from core.assistant import AssistantManager
+from core.cache import ToolResultCache, MemoryCacheBackend, SQLiteCacheBackend
+from core.http_client import HttpClient, set_http_client
+from core.message_store import MessageStore
+from core.output_budget import ToolOutputBudget
+from core.run_journal import RunJournal
+from core.scheduler import RequestScheduler
+from core.thread_pool import ThreadPool
+from core.tracing import Tracer, JsonLinesExporter, LatencyHistograms, serve_metrics
 import config
 import logging
-import functions.weather as weather
-import functions.web_browsing as browser
-import functions.kubernetes_changelog as kubernetes_changelog
-from functions.github_release_notes import get_latest_version
-from functions.github_release_notes import get_release_notes
+import multiprocessing
+from core.tools import ToolRegistry
+from prompts import system_prompt  # noqa: F401
 
 
 log_level = getattr(logging, config.log_level.upper(), "WARNING")
 logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
 logging = logging.getLogger(__name__)
 
-system_prompt = """You are an AI assistant with access to websearch and server functions.
+thread_id = config.assistant_thread_id
 
-The websearch function empowers you for real-time web search and information retrieval, particularly for current and 
-relevant data from the internet in response to user queries, especially when such information is beyond your training 
-data or when up-to-date information is essential. Always include the source URL for information fetched from the web.
+# @tool functions of the functions/ package and of installed plugins; their schemas are cached on disk and each tool
+# module, with the search clients, HTML parser or database driver it uses, is imported on first call
+tool_registry = ToolRegistry(packages=["functions"], cache_path=config.tool_schema_cache_path or None)
+enabled_tools = ["get_weather", "text_search", "query_by_version", "get_latest_version", "get_release_notes"]
 
-The functions enables you to fetch information about weather, kubernetes_changelog etc etc.
+# Time-to-live in seconds of cached tool results; functions not listed here are never cached
+tool_cache_ttls = {
+    "get_weather": 10 * 60,
+    "text_search": 15 * 60,
+    "query_by_version": 24 * 60 * 60,
+    "get_latest_version": 60 * 60,
+    "get_release_notes": 24 * 60 * 60,
+}
 
-All your responses should be in a human-readable format. If possible, include the source URL for information fetched.
-"""
+# One keep-alive connection pool for the OpenAI client and all tool connectors
+http_client = HttpClient(timeout=config.http_timeout, retries=config.http_retries)
+set_http_client(http_client)
+if config.http_preconnect:
+    http_client.preconnect([
+        "https://api.openai.com",
+        "https://api.github.com",
+        "https://api.openweathermap.org",
+    ])
 
-thread_id = config.assistant_thread_id
+# Output budgets in estimated tokens; scraped web pages are excerpted fairly across results to fit
+tool_output_budgets = {
+    "text_search": 3000,
+    "news_search": 3000,
+    "webpage_scraper": 3000,
+}
+
+if config.tool_cache_path:
+    tool_cache_backend = SQLiteCacheBackend(config.tool_cache_path, max_entries=config.tool_cache_max_entries)
+else:
+    tool_cache_backend = MemoryCacheBackend(max_entries=config.tool_cache_max_entries)
+
+# Answers to repeated single-shot questions, disabled unless ANSWER_CACHE_TTL is set; an answer is dropped when the
+# cached data of a tool it used changes
+answer_cache = None
+if config.answer_cache_ttl > 0:
+    if config.answer_cache_path:
+        answer_cache_backend = SQLiteCacheBackend(config.answer_cache_path, max_entries=config.answer_cache_max_entries,
+                                                  table="answer_cache")
+    else:
+        answer_cache_backend = MemoryCacheBackend(max_entries=config.answer_cache_max_entries)
+    answer_cache = AnswerCache(ttl=config.answer_cache_ttl, backend=answer_cache_backend)
+
+# Pre-created threads for new sessions, disabled unless THREAD_POOL_SIZE is set
+thread_pool = None
+if config.thread_pool_size > 0:
+    thread_pool = ThreadPool(
+        size=config.thread_pool_size,
+        max_threads=config.thread_pool_max_threads,
+        idle_timeout=config.thread_pool_idle_timeout
+    )
+
+# Span exporters: JSON lines when TRACE_FILE is set, Prometheus histograms on /metrics when METRICS_PORT is set
+tracer = Tracer()
+latency_histograms = LatencyHistograms()
+tracer.add_exporter(latency_histograms)
+if config.trace_file:
+    tracer.add_exporter(JsonLinesExporter(config.trace_file))
+# Worker processes of a WorkerPool report their metrics through the supervisor, which serves them instead
+if config.metrics_port and multiprocessing.parent_process() is None:
+    serve_metrics(latency_histograms, port=config.metrics_port)
+
+# Rate-limit-aware admission and retries for every OpenAI call, enabled unless REQUEST_SCHEDULER is false
+scheduler = None
+if config.request_scheduler:
+    scheduler = RequestScheduler(default_deadline=config.request_deadline, max_retries=config.request_max_retries)
 
 assistant = AssistantManager(
     api_key=config.openai_api_key,
     assistant_id=config.openai_assistant_id,
-    functions=[
-        weather.get_weather,
-        browser.text_search,
-        kubernetes_changelog.query_by_version,
-        get_latest_version,
-        get_release_notes
-    ]
+    functions=tool_registry.tools(enabled_tools),
+    tool_cache=ToolResultCache(ttls=tool_cache_ttls, backend=tool_cache_backend),
+    message_store=MessageStore(config.message_store_path),
+    sync_definition=True,
+    thread_pool=thread_pool,
+    tracer=tracer,
+    scheduler=scheduler,
+    output_budget=ToolOutputBudget(budgets=tool_output_budgets, default_budget=config.tool_output_budget),
+    http_client=http_client,
+    run_deadline=config.run_deadline,
+    answer_cache=answer_cache,
+    run_journal=RunJournal(config.run_journal_path) if config.run_journal_path else None
 )
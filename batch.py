@@ -0,0 +1,33 @@
+import argparse
+import config
+from assistant_initialization import assistant
+from assistant_initialization import system_prompt
+from core.batch import BatchRunner
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer the queries of a JSONL file and write the results as JSONL.")
+    parser.add_argument("input", help="JSONL file with one {\"query\": ...} object per line.")
+    parser.add_argument("output", help="JSONL file the results are appended to.")
+    parser.add_argument("--concurrency", type=int, default=config.batch_concurrency,
+                        help="Maximum number of queries in flight.")
+    parser.add_argument("--stream", action="store_true", help="Stream runs instead of polling them.")
+    parser.add_argument("--max-wait-time", type=float, help="Deadline in seconds of each query.")
+    parser.add_argument("--restart", action="store_true",
+                        help="Truncate the output instead of resuming after the last completed line.")
+    parser.add_argument("--keep-threads", action="store_true", help="Keep the thread created for each query.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runner = BatchRunner(
+        assistant,
+        instructions=system_prompt,
+        concurrency=args.concurrency,
+        stream=args.stream,
+        max_wait_time=args.max_wait_time,
+        delete_threads=not args.keep_threads
+    )
+    stats = runner.run(args.input, args.output, resume=not args.restart)
+    print(", ".join(f"{status}: {count}" for status, count in sorted(stats.items())))
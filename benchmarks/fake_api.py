@@ -0,0 +1,423 @@
+import itertools
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+
+def _new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+class FakeAssistantsAPI:
+    """
+    Local stand-in for the Assistants API endpoints used by AssistantManager.
+
+    Implements assistants retrieve/update, threads, messages, runs (polled or streamed with server-sent events),
+    submit_tool_outputs and cancel. Runs advance on wall-clock time: they stay queued for `queue_delay`, work for
+    `model_delay`, then either request `tool_fanout` tool calls (for `tool_rounds` rounds) or complete with a canned
+    reply. Every request is counted per endpoint so callers can report API calls per answer.
+    """
+
+    def __init__(self, queue_delay=0.2, model_delay=0.3, tool_fanout=2, tool_rounds=1,
+                 tool_names=("get_weather", "text_search"), failure_rate=0.0, error_rate=0.0,
+                 reply="This is a benchmark reply from the fake Assistants API.", stream_chunk_delay=0.01,
+                 requests_per_minute=None, seed=None):
+        """
+        Args:
+            queue_delay (float): Seconds a new run stays queued.
+            model_delay (float): Seconds a run stays in progress before each transition.
+            tool_fanout (int): Number of tool calls per requires_action.
+            tool_rounds (int): Number of requires_action rounds per run.
+            tool_names (Tuple[str]): Function names the fake model calls, in rotation.
+            failure_rate (float): Probability that a run ends with status 'failed'.
+            error_rate (float): Probability that any request is answered with HTTP 500.
+            reply (str): Text of the assistant reply.
+            stream_chunk_delay (float): Seconds between streamed text deltas.
+            requests_per_minute (int | None): Request rate limit. When set, responses carry x-ratelimit-* headers
+                and requests over the limit get HTTP 429 with retry-after-ms.
+            seed (int | None): Seed of the random generator, for reproducible failures.
+        """
+        self.queue_delay = queue_delay
+        self.model_delay = model_delay
+        self.tool_fanout = tool_fanout
+        self.tool_rounds = tool_rounds
+        self.tool_names = tool_names
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.reply = reply
+        self.stream_chunk_delay = stream_chunk_delay
+        self.requests_per_minute = requests_per_minute
+        self._rate_limit_level = float(requests_per_minute or 0)
+        self._rate_limit_updated = time.monotonic()
+        self.random = random.Random(seed)
+        self.request_counts = Counter()
+        self.rate_limited = 0
+        self.assistants = {}
+        self.threads = {}
+        self.runs = {}
+        self._lock = threading.RLock()
+        self._server = None
+
+    # -- Server lifecycle
+
+    def start(self, host="127.0.0.1", port=0) -> str:
+        """
+        Starts serving in a background thread.
+
+        Returns:
+            str: The base URL to pass to the OpenAI client, ending in /v1.
+        """
+        api = self
+
+        class Handler(_FakeAPIHandler):
+            pass
+
+        Handler.api = api
+        self._server = _FakeAPIServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="fake-assistants-api", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/v1"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def total_requests(self) -> int:
+        with self._lock:
+            return sum(self.request_counts.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.request_counts.clear()
+
+    # -- Object builders
+
+    def _assistant(self, assistant_id):
+        return self.assistants.setdefault(assistant_id, {
+            "id": assistant_id, "object": "assistant", "created_at": int(time.time()), "name": "benchmark",
+            "description": None, "model": "gpt-4-1106-preview", "instructions": None, "tools": [], "file_ids": [],
+            "metadata": {},
+        })
+
+    def _message(self, thread_id, role, text, run_id=None, assistant_id=None):
+        return {
+            "id": _new_id("msg"), "object": "thread.message", "created_at": int(time.time()), "thread_id": thread_id,
+            "role": role, "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "file_ids": [], "assistant_id": assistant_id, "run_id": run_id, "metadata": {}, "status": "completed",
+            "completed_at": int(time.time()), "incomplete_at": None, "incomplete_details": None,
+        }
+
+    def _public_run(self, run):
+        return {key: value for key, value in run.items() if not key.startswith("_")}
+
+    def _create_run(self, thread_id, body):
+        now = time.time()
+        run = {
+            "id": _new_id("run"), "object": "thread.run", "created_at": int(now), "thread_id": thread_id,
+            "assistant_id": body.get("assistant_id"), "status": "queued", "required_action": None,
+            "last_error": None, "expires_at": int(now) + 600, "started_at": None, "cancelled_at": None,
+            "failed_at": None, "completed_at": None, "model": body.get("model", "gpt-4-1106-preview"),
+            "instructions": body.get("instructions", ""), "tools": body.get("tools", []), "file_ids": [],
+            "metadata": {}, "usage": None,
+            "_transition_at": now + self.queue_delay, "_rounds_left": self.tool_rounds,
+            "_fails": self.random.random() < self.failure_rate, "_tool_calls": 0,
+        }
+        self.runs[run["id"]] = run
+        return run
+
+    def _advance(self, run):
+        """Moves a run through its lifecycle according to the elapsed time."""
+        now = time.time()
+        while run["status"] in ("queued", "in_progress") and now >= run["_transition_at"]:
+            if run["status"] == "queued":
+                run["status"] = "in_progress"
+                run["started_at"] = int(now)
+                run["_transition_at"] += self.model_delay
+            elif run["_fails"]:
+                run["status"] = "failed"
+                run["failed_at"] = int(now)
+                run["last_error"] = {"code": "server_error", "message": "Simulated failure"}
+            elif run["_rounds_left"] > 0 and self.tool_fanout > 0:
+                run["status"] = "requires_action"
+                run["required_action"] = {"type": "submit_tool_outputs", "submit_tool_outputs": {"tool_calls": [
+                    self._tool_call(index) for index in range(self.tool_fanout)]}}
+            else:
+                self._complete(run)
+
+    def _tool_call(self, index):
+        name = self.tool_names[index % len(self.tool_names)]
+        arguments = {"city": f"City {index}"} if name == "get_weather" else {"query": f"benchmark query {index}"}
+        return {"id": _new_id("call"), "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+    def _complete(self, run):
+        run["status"] = "completed"
+        run["completed_at"] = int(time.time())
+        prompt_tokens = 200 + 150 * run["_tool_calls"]
+        completion_tokens = len(self.reply.split())
+        run["usage"] = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens}
+        message = self._message(run["thread_id"], "assistant", self.reply, run_id=run["id"],
+                                assistant_id=run["assistant_id"])
+        self.threads[run["thread_id"]].append(message)
+        return message
+
+    def _submit_tool_outputs(self, run, body):
+        if run["status"] != "requires_action":
+            return None
+        run["_tool_calls"] += len(body.get("tool_outputs", []))
+        run["_rounds_left"] -= 1
+        run["status"] = "in_progress"
+        run["required_action"] = None
+        run["_transition_at"] = time.time() + self.model_delay
+        return run
+
+    # -- Request routing
+
+    routes = [
+        ("GET", r"/assistants/(?P<assistant_id>[^/]+)", "get_assistant"),
+        ("POST", r"/assistants/(?P<assistant_id>[^/]+)", "update_assistant"),
+        ("POST", r"/threads", "create_thread"),
+        ("DELETE", r"/threads/(?P<thread_id>[^/]+)", "delete_thread"),
+        ("POST", r"/threads/(?P<thread_id>[^/]+)/messages", "create_message"),
+        ("GET", r"/threads/(?P<thread_id>[^/]+)/messages", "list_messages"),
+        ("POST", r"/threads/(?P<thread_id>[^/]+)/runs", "create_run"),
+        ("GET", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)", "get_run"),
+        ("POST", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/submit_tool_outputs", "submit_tool_outputs"),
+        ("POST", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/cancel", "cancel_run"),
+    ]
+
+    def handle(self, method, path, query, body):
+        """
+        Dispatches one request.
+
+        Returns:
+            Tuple[int, dict | Iterator[str], dict]: HTTP status, a JSON body or an iterator of SSE frames, and
+            extra response headers.
+        """
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                with self._lock:
+                    self.request_counts[name] += 1
+                    allowed, headers = self._take_rate_limit()
+                    if not allowed:
+                        self.rate_limited += 1
+                        return 429, {"error": {"message": "Rate limit reached for requests",
+                                               "type": "requests", "code": "rate_limit_exceeded"}}, headers
+                    if self.random.random() < self.error_rate:
+                        return 500, {"error": {"message": "Simulated server error", "type": "server_error"}}, headers
+                status, payload = getattr(self, f"_handle_{name}")(query=query, body=body, **match.groupdict())
+                return status, payload, headers
+        return 404, {"error": {"message": f"No route for {method} {path}", "type": "invalid_request_error"}}, {}
+
+    def _take_rate_limit(self):
+        # Token bucket of requests_per_minute requests, refilled continuously like the real API's
+        if not self.requests_per_minute:
+            return True, {}
+        now = time.monotonic()
+        rate = self.requests_per_minute / 60.0
+        self._rate_limit_level = min(self.requests_per_minute,
+                                     self._rate_limit_level + (now - self._rate_limit_updated) * rate)
+        self._rate_limit_updated = now
+        allowed = self._rate_limit_level >= 1
+        if allowed:
+            self._rate_limit_level -= 1
+        headers = {
+            "x-ratelimit-limit-requests": str(self.requests_per_minute),
+            "x-ratelimit-remaining-requests": str(int(self._rate_limit_level)),
+            "x-ratelimit-reset-requests": f"{(self.requests_per_minute - self._rate_limit_level) / rate:.3f}s",
+        }
+        if not allowed:
+            headers["retry-after-ms"] = str(int((1 - self._rate_limit_level) / rate * 1000) + 1)
+        return allowed, headers
+
+    def _handle_get_assistant(self, assistant_id, **_):
+        with self._lock:
+            return 200, self._assistant(assistant_id)
+
+    def _handle_update_assistant(self, assistant_id, body, **_):
+        with self._lock:
+            assistant = self._assistant(assistant_id)
+            assistant.update({key: body[key] for key in ("model", "instructions", "tools", "metadata") if key in body})
+            return 200, assistant
+
+    def _handle_create_thread(self, **_):
+        with self._lock:
+            thread_id = _new_id("thread")
+            self.threads[thread_id] = []
+            return 200, {"id": thread_id, "object": "thread", "created_at": int(time.time()), "metadata": {}}
+
+    def _handle_delete_thread(self, thread_id, **_):
+        with self._lock:
+            self.threads.pop(thread_id, None)
+            return 200, {"id": thread_id, "object": "thread.deleted", "deleted": True}
+
+    def _handle_create_message(self, thread_id, body, **_):
+        with self._lock:
+            if thread_id not in self.threads:
+                return 404, {"error": {"message": f"No thread found with id '{thread_id}'."}}
+            message = self._message(thread_id, body.get("role", "user"), body.get("content", ""))
+            self.threads[thread_id].append(message)
+            return 200, message
+
+    def _handle_list_messages(self, thread_id, query, **_):
+        with self._lock:
+            messages = list(self.threads.get(thread_id, []))
+        if query.get("order", ["desc"])[0] == "desc":
+            messages.reverse()
+        after = query.get("after", [None])[0]
+        if after:
+            ids = [message["id"] for message in messages]
+            messages = messages[ids.index(after) + 1:] if after in ids else []
+        limit = int(query.get("limit", ["20"])[0])
+        page = messages[:limit]
+        return 200, {"object": "list", "data": page, "first_id": page[0]["id"] if page else None,
+                     "last_id": page[-1]["id"] if page else None, "has_more": len(messages) > limit}
+
+    def _handle_create_run(self, thread_id, body, **_):
+        with self._lock:
+            if thread_id not in self.threads:
+                return 404, {"error": {"message": f"No thread found with id '{thread_id}'."}}
+            run = self._create_run(thread_id, body)
+            if body.get("stream"):
+                return 200, self._stream_run(run, created=True)
+            return 200, self._public_run(run)
+
+    def _handle_get_run(self, run_id, **_):
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return 404, {"error": {"message": f"No run found with id '{run_id}'."}}
+            self._advance(run)
+            return 200, self._public_run(run)
+
+    def _handle_submit_tool_outputs(self, run_id, body, **_):
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return 404, {"error": {"message": f"No run found with id '{run_id}'."}}
+            self._advance(run)
+            if self._submit_tool_outputs(run, body) is None:
+                return 400, {"error": {"message": f"Runs in status \"{run['status']}\" do not accept tool outputs."}}
+            if body.get("stream"):
+                return 200, self._stream_run(run, created=False)
+            return 200, self._public_run(run)
+
+    def _handle_cancel_run(self, run_id, **_):
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return 404, {"error": {"message": f"No run found with id '{run_id}'."}}
+            if run["status"] in ("queued", "in_progress", "requires_action"):
+                run["status"] = "cancelled"
+                run["cancelled_at"] = int(time.time())
+            return 200, self._public_run(run)
+
+    # -- Streaming
+
+    def _stream_run(self, run, created):
+        """Yields the SSE frames of a run until it completes, fails or requires action."""
+        if created:
+            yield self._event("thread.run.created", self._public_run(run))
+        while True:
+            with self._lock:
+                self._advance(run)
+                status = run["status"]
+                wait = max(0.0, run["_transition_at"] - time.time())
+            if status in ("queued", "in_progress"):
+                time.sleep(wait)
+                continue
+            break
+
+        if status == "requires_action":
+            yield self._event("thread.run.requires_action", self._public_run(run))
+        elif status == "completed":
+            with self._lock:
+                message = self.threads[run["thread_id"]][-1]
+            in_progress = dict(message, content=[])
+            yield self._event("thread.message.created", in_progress)
+            for chunk in re.findall(r"\S+\s*", self.reply):
+                delta = {"id": message["id"], "object": "thread.message.delta",
+                         "delta": {"content": [{"index": 0, "type": "text", "text": {"value": chunk}}]}}
+                yield self._event("thread.message.delta", delta)
+                time.sleep(self.stream_chunk_delay)
+            yield self._event("thread.message.completed", message)
+            yield self._event("thread.run.completed", self._public_run(run))
+        else:
+            yield self._event(f"thread.run.{status}", self._public_run(run))
+        yield "event: done\ndata: [DONE]\n\n"
+
+    @staticmethod
+    def _event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+class _FakeAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients drop idle keep-alive connections when they close
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _FakeAPIHandler(BaseHTTPRequestHandler):
+    api: FakeAssistantsAPI = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40ms to keep-alive requests
+    disable_nagle_algorithm = True
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        path = url.path[len("/v1"):] if url.path.startswith("/v1") else url.path
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        status, payload, headers = self.api.handle(method, path.rstrip("/"), parse_qs(url.query), body)
+        if isinstance(payload, dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self._send_headers(headers)
+            self.wfile.write(data)
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self._send_headers(headers)
+        try:
+            for frame in itertools.chain(payload, [""]):
+                data = frame.encode()
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Clients stop reading once they have what they need, e.g. after requires_action
+            self.close_connection = True
+
+    def _send_headers(self, headers):
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
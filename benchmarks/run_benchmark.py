@@ -0,0 +1,242 @@
+"""
+Offline load test of AssistantManager against the local fake Assistants API.
+
+Runs `--requests` answers at `--concurrency`, each on a new thread, and reports runs/sec, end-to-end latency
+percentiles and API calls per answer. Results are written as JSON tagged with the current git commit, so runs of the
+same parameters on different commits can be compared with `--compare`.
+
+    python -m benchmarks.run_benchmark --requests 200 --concurrency 20 --tool-fanout 3 --output base.json
+    python -m benchmarks.run_benchmark --requests 200 --concurrency 20 --tool-fanout 3 --compare base.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.fake_api import FakeAssistantsAPI
+from core.assistant import AssistantManager
+from core.async_assistant import AsyncAssistantManager
+from core.scheduler import RequestScheduler
+from core.tracing import Tracer, LatencyHistograms
+
+logger = logging.getLogger(__name__)
+
+# Parameters that must match for two results to be comparable
+WORKLOAD_PARAMETERS = ("requests", "concurrency", "queue_delay", "model_delay", "tool_fanout", "tool_rounds",
+                       "tool_latency", "failure_rate", "error_rate", "requests_per_minute", "scheduler",
+                       "check_interval", "mode", "seed")
+
+
+def make_tools(latency):
+    """Builds stand-ins for the production tools that only sleep for `latency` seconds."""
+
+    def get_weather(city: str):
+        """
+        Get the current weather for a city.
+        :param city: The city name.
+        """
+        time.sleep(latency)
+        return {"city": city, "temperature": 21, "conditions": "clear"}
+
+    def text_search(query: str):
+        """
+        Search the web for a query.
+        :param query: The search query.
+        """
+        time.sleep(latency)
+        return [{"title": f"Result for {query}", "href": "https://example.com", "body": "Lorem ipsum " * 20}]
+
+    return [get_weather, text_search]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _is_answer(response, mode):
+    if mode == "poll":
+        return response is not None and len(response.data) > 0
+    return response is not None and response.message is not None
+
+
+def run_sync(args, base_url, tracer):
+    manager = AssistantManager(api_key="benchmark", assistant_id="asst_benchmark", base_url=base_url,
+                               functions=make_tools(args.tool_latency), tracer=tracer,
+                               scheduler=RequestScheduler() if args.scheduler else None)
+    stream = args.mode == "stream"
+
+    def answer(index):
+        started = time.perf_counter()
+        try:
+            response = manager.get_assistant_response(
+                instructions="You are a benchmark assistant.", user_message=f"Benchmark question {index}",
+                check_interval=args.check_interval, max_wait_time=args.max_wait_time, stream=stream)
+            if stream:
+                response.until_done()
+            ok = _is_answer(response, args.mode)
+        except Exception as e:
+            logger.debug(f"Request {index} failed: {e}")
+            ok = False
+        return ok, time.perf_counter() - started
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            return list(executor.map(answer, range(args.requests)))
+    finally:
+        manager.run_poller.stop()
+        manager.tool_executor.shutdown(wait=False)
+
+
+async def run_async(args, base_url, tracer):
+    manager = AsyncAssistantManager(api_key="benchmark", assistant_id="asst_benchmark", base_url=base_url,
+                                    functions=make_tools(args.tool_latency), tracer=tracer,
+                                    scheduler=RequestScheduler() if args.scheduler else None)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def answer(index):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await manager.get_assistant_response(
+                    instructions="You are a benchmark assistant.", user_message=f"Benchmark question {index}",
+                    check_interval=args.check_interval, max_wait_time=args.max_wait_time)
+                ok = _is_answer(response, "poll")
+            except Exception as e:
+                logger.debug(f"Request {index} failed: {e}")
+                ok = False
+            return ok, time.perf_counter() - started
+
+    try:
+        return await asyncio.gather(*(answer(index) for index in range(args.requests)))
+    finally:
+        await manager.close()
+
+
+def run_benchmark(args):
+    """
+    Runs one benchmark and returns its result.
+
+    Returns:
+        dict: Parameters, commit, throughput, latency percentiles, API call counts and per-phase latencies.
+    """
+    api = FakeAssistantsAPI(queue_delay=args.queue_delay, model_delay=args.model_delay, tool_fanout=args.tool_fanout,
+                            tool_rounds=args.tool_rounds, failure_rate=args.failure_rate,
+                            error_rate=args.error_rate, requests_per_minute=args.requests_per_minute,
+                            seed=args.seed)
+    base_url = api.start()
+    histograms = LatencyHistograms()
+    tracer = Tracer([histograms])
+    try:
+        started = time.perf_counter()
+        if args.mode == "async":
+            outcomes = asyncio.run(run_async(args, base_url, tracer))
+        else:
+            outcomes = run_sync(args, base_url, tracer)
+        elapsed = time.perf_counter() - started
+    finally:
+        api.stop()
+
+    latencies = [latency for ok, latency in outcomes if ok]
+    answers = len(latencies)
+    api_calls = api.total_requests()
+    return {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "parameters": {name: getattr(args, name) for name in WORKLOAD_PARAMETERS},
+        "elapsed": elapsed,
+        "answers": answers,
+        "failures": len(outcomes) - answers,
+        "runs_per_second": answers / elapsed if elapsed else None,
+        "latency": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+                    "p99": percentile(latencies, 0.99), "max": max(latencies, default=None)},
+        "api_calls": api_calls,
+        "api_calls_per_answer": api_calls / answers if answers else None,
+        "api_calls_by_endpoint": dict(api.request_counts),
+        "rate_limited": api.rate_limited,
+        "phases": histograms.summary(),
+    }
+
+
+def _format(value, unit=""):
+    return "-" if value is None else f"{value:.3f}{unit}"
+
+
+def print_report(result, baseline=None):
+    rows = [
+        ("runs/sec", result["runs_per_second"], "", True),
+        ("p50 latency", result["latency"]["p50"], "s", False),
+        ("p95 latency", result["latency"]["p95"], "s", False),
+        ("p99 latency", result["latency"]["p99"], "s", False),
+        ("API calls/answer", result["api_calls_per_answer"], "", False),
+    ]
+    print(f"commit {result['commit']}: {result['answers']} answers, {result['failures']} failures "
+          f"in {result['elapsed']:.2f}s")
+    if baseline is not None:
+        if baseline["parameters"] != result["parameters"]:
+            print("warning: the baseline was recorded with different parameters")
+        baseline_values = {
+            "runs/sec": baseline["runs_per_second"],
+            "p50 latency": baseline["latency"]["p50"],
+            "p95 latency": baseline["latency"]["p95"],
+            "p99 latency": baseline["latency"]["p99"],
+            "API calls/answer": baseline["api_calls_per_answer"],
+        }
+        print(f"{'':<18}{'current':>12}{'baseline (' + str(baseline['commit']) + ')':>22}{'change':>10}")
+    for name, value, unit, higher_is_better in rows:
+        line = f"{name:<18}{_format(value, unit):>12}"
+        if baseline is not None:
+            previous = baseline_values[name]
+            change = (value - previous) / previous * 100 if value is not None and previous else None
+            line += f"{_format(previous, unit):>22}{'-' if change is None else f'{change:+.1f}%':>10}"
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark against a fake Assistants API.")
+    parser.add_argument("--requests", type=int, default=100, help="Number of answers to request.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of answers in flight at a time.")
+    parser.add_argument("--mode", choices=("poll", "stream", "async"), default="poll",
+                        help="Polling, streaming or the asyncio manager.")
+    parser.add_argument("--queue-delay", type=float, default=0.2, help="Seconds each run stays queued.")
+    parser.add_argument("--model-delay", type=float, default=0.3, help="Seconds of model work per run step.")
+    parser.add_argument("--tool-fanout", type=int, default=2, help="Tool calls per requires_action.")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="requires_action rounds per run.")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Seconds each stand-in tool takes.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of runs that fail.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests answered with 500.")
+    parser.add_argument("--requests-per-minute", type=int, help="Request rate limit enforced with HTTP 429.")
+    parser.add_argument("--scheduler", action="store_true", help="Send API calls through the RequestScheduler.")
+    parser.add_argument("--check-interval", type=float, default=1.0, help="Maximum poll interval in seconds.")
+    parser.add_argument("--max-wait-time", type=float, default=60.0, help="Per-answer deadline in seconds.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for simulated failures.")
+    parser.add_argument("--output", type=Path, help="Write the result as JSON to this file.")
+    parser.add_argument("--compare", type=Path, help="Compare against a result file written by --output.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(result, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
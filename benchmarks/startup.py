@@ -0,0 +1,143 @@
+"""
+Startup benchmark: how long importing the CLI entry point takes, with per-module import timings.
+
+Each repetition imports `--module` in a fresh interpreter under `python -X importtime`. The median import time is
+checked against `--budget` (STARTUP_BUDGET by default) and the command exits with status 1 when it is over, so it can
+gate CI. The slowest modules of the median run are listed by cumulative import time.
+
+    python -m benchmarks.startup --module main --repeat 5
+    python -m benchmarks.startup --budget 0.8 --top 30 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from benchmarks.run_benchmark import git_commit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Prints the seconds taken by the import itself, excluding interpreter startup
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+
+
+def parse_importtime(stderr):
+    """
+    Parses the `-X importtime` report into one dict per module, in the order their imports completed.
+
+    Each dict has 'module', 'self' and 'cumulative' (seconds) and 'depth' (0 for modules imported by the script).
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append({"module": name.strip(), "self": int(self_us) / 1e6,
+                            "cumulative": int(cumulative_us) / 1e6,
+                            "depth": (len(name) - len(name.lstrip()) - 1) // 2})
+        except ValueError:
+            continue
+    return modules
+
+
+def import_tree(modules, module):
+    """
+    The entries imported on behalf of `module`, itself included, leaving out the interpreter's own startup imports.
+
+    The report lists a module after everything it imported, so its subtree is the run of deeper entries before it.
+    """
+    for end in range(len(modules) - 1, -1, -1):
+        if modules[end]["module"] == module and modules[end]["depth"] == 0:
+            start = end
+            while start > 0 and modules[start - 1]["depth"] > 0:
+                start -= 1
+            return modules[start:end + 1]
+    return modules
+
+
+def measure(module, env):
+    """Imports the module once in a new interpreter; returns the import time, wall time and module timings."""
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT.format(module=module)],
+                             cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        # The report precedes the traceback on stderr; keep only the traceback
+        error = "\n".join(line for line in process.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"Importing {module} failed:\n{error}")
+    return {"import": float(process.stdout.strip().splitlines()[-1]), "wall": wall,
+            "modules": import_tree(parse_importtime(process.stderr), module)}
+
+
+def run_startup_benchmark(args):
+    with tempfile.TemporaryDirectory() as history_dir:
+        env = dict(os.environ)
+        # Enough configuration for the assistant to be built without credentials or a writable working directory
+        env.setdefault("OPENAI_API_KEY", "sk-startup-benchmark")
+        env.setdefault("OPENAI_ASSISTANT_ID", "asst_startup_benchmark")
+        env["HISTORY_DIR"] = history_dir
+        env["METRICS_PORT"] = "0"
+        runs = [measure(args.module, env) for _ in range(args.repeat)]
+
+    median_import = statistics.median(run["import"] for run in runs)
+    median_run = min(runs, key=lambda run: abs(run["import"] - median_import))
+    slowest = sorted((entry for entry in median_run["modules"] if entry["depth"] <= args.depth),
+                     key=lambda entry: entry["cumulative"], reverse=True)[:args.top]
+    return {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "module": args.module,
+        "repeat": args.repeat,
+        "budget": args.budget,
+        "import": {"median": median_import, "min": min(run["import"] for run in runs),
+                   "max": max(run["import"] for run in runs)},
+        "wall": {"median": statistics.median(run["wall"] for run in runs)},
+        "modules_imported": len(median_run["modules"]),
+        "slowest_modules": slowest,
+    }
+
+
+def print_report(result):
+    print(f"commit {result['commit']}: import {result['module']} in {result['import']['median']:.3f}s median "
+          f"(min {result['import']['min']:.3f}s, max {result['import']['max']:.3f}s, {result['repeat']} runs), "
+          f"{result['wall']['median']:.3f}s with interpreter startup, {result['modules_imported']} modules")
+    print(f"{'module':<48}{'cumulative':>12}{'self':>10}")
+    for entry in result["slowest_modules"]:
+        name = "  " * entry["depth"] + entry["module"]
+        print(f"{name:<48}{entry['cumulative']:>11.3f}s{entry['self']:>9.3f}s")
+    verdict = "within" if result["import"]["median"] <= result["budget"] else "OVER"
+    print(f"{verdict} the startup budget of {result['budget']:.3f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the CLI entry point.")
+    parser.add_argument("--module", default="main", help="Module to import. Default is the CLI entry point.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters to measure.")
+    parser.add_argument("--budget", type=float, default=config.startup_budget,
+                        help="Maximum median import time in seconds. Default is STARTUP_BUDGET.")
+    parser.add_argument("--top", type=int, default=20, help="Number of slowest modules to list.")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="Deepest level of nested imports listed; 1 lists the modules the entry point imports.")
+    parser.add_argument("--output", type=Path, help="Write the result as JSON to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_startup_benchmark(args)
+    print_report(result)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    if result["import"]["median"] > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,39 @@ kubernetes_changelog_db_password = os.getenv("KUBERNETES_CHANGELOG_DB_PASSWORD")
 assistant_thread_id = os.getenv("ASSISTANT_THREAD_ID")
 history_dir = os.getenv("HISTORY_DIR", "./")
 log_level = os.getenv("LOG_LEVEL", "warning")
+tool_cache_path = os.getenv("TOOL_CACHE_PATH")
+tool_cache_max_entries = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+answer_cache_ttl = float(os.getenv("ANSWER_CACHE_TTL", "0"))
+answer_cache_path = os.getenv("ANSWER_CACHE_PATH")
+answer_cache_max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+message_store_path = os.getenv("MESSAGE_STORE_PATH", os.path.join(history_dir, "messages.sqlite3"))
+run_journal_path = os.getenv("RUN_JOURNAL_PATH")
+tool_schema_cache_path = os.getenv("TOOL_SCHEMA_CACHE_PATH", os.path.join(history_dir, "tool_schemas.json"))
+thread_pool_size = int(os.getenv("THREAD_POOL_SIZE", "0"))
+thread_pool_max_threads = int(os.getenv("THREAD_POOL_MAX_THREADS", "100"))
+thread_pool_idle_timeout = float(os.getenv("THREAD_POOL_IDLE_TIMEOUT", "1800"))
+trace_file = os.getenv("TRACE_FILE")
+metrics_port = int(os.getenv("METRICS_PORT", "0"))
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+server_host = os.getenv("SERVER_HOST", "127.0.0.1")
+server_port = int(os.getenv("SERVER_PORT", "8000"))
+server_max_concurrent_runs = int(os.getenv("SERVER_MAX_CONCURRENT_RUNS", "16"))
+server_queue_timeout = float(os.getenv("SERVER_QUEUE_TIMEOUT", "5"))
+server_max_sessions = int(os.getenv("SERVER_MAX_SESSIONS", "1000"))
+server_session_idle_timeout = float(os.getenv("SERVER_SESSION_IDLE_TIMEOUT", "1800"))
+server_workers = int(os.getenv("SERVER_WORKERS", "0"))
+server_worker_concurrency = int(os.getenv("SERVER_WORKER_CONCURRENCY", "8"))
+request_scheduler = os.getenv("REQUEST_SCHEDULER", "true").lower() in ("1", "true", "yes")
+request_deadline = float(os.getenv("REQUEST_DEADLINE", "120"))
+request_max_retries = int(os.getenv("REQUEST_MAX_RETRIES", "6"))
+run_deadline = float(os.getenv("RUN_DEADLINE", "300")) or None
+tool_output_budget = int(os.getenv("TOOL_OUTPUT_BUDGET", "4000"))
+http_timeout = float(os.getenv("HTTP_TIMEOUT", "10"))
+http_retries = int(os.getenv("HTTP_RETRIES", "2"))
+http_preconnect = os.getenv("HTTP_PRECONNECT", "false").lower() in ("1", "true", "yes")
+scrape_concurrency = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+scrape_per_host = int(os.getenv("SCRAPE_PER_HOST", "2"))
+scrape_connect_timeout = float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5"))
+scrape_read_timeout = float(os.getenv("SCRAPE_READ_TIMEOUT", "10"))
+scrape_budget = float(os.getenv("SCRAPE_BUDGET", "20")) or None
+startup_budget = float(os.getenv("STARTUP_BUDGET", "1.5"))
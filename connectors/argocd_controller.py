@@ -1,7 +1,8 @@
-import requests
+import httpx
 import yaml
 import logging
 import config
+from core.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +29,11 @@ class ArgoCDController:
         :return: A dictionary indicating the authentication status or any error message.
         """
         try:
-            response = requests.get(self.ARGOCD_API_URL, headers=self.HEADERS, timeout=10)
+            response = get_http_client().get(self.ARGOCD_API_URL, headers=self.HEADERS, timeout=10)
             response.raise_for_status()
             logger.info("Authentication check successful.")
             return {"authenticated": True}
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 401:  # Unauthorized
                 logger.warning("Invalid authentication token.")
                 return {"authenticated": False, "error": "Invalid authentication token."}
@@ -46,23 +47,23 @@ class ArgoCDController:
         :return: A dictionary containing a list of application names or any error message.
         """
         try:
-            response = requests.get(self.ARGOCD_API_URL, headers=self.HEADERS, timeout=10)
+            response = get_http_client().get(self.ARGOCD_API_URL, headers=self.HEADERS, timeout=10)
             response.raise_for_status()
             data = response.json()
             applications = data["items"]
             application_names = [application['metadata']['name'] for application in applications]
             return {"applications": application_names}
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Error retrieving available applications: {e}")
             return {"error": f"Error retrieving available applications: {e}"}
 
     def application_exists(self, app_name: str) -> dict:
         """Determine if an ArgoCD application exists on the cluster."""
         try:
-            response = requests.get(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, timeout=10)
+            response = get_http_client().get(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, timeout=10)
             response.raise_for_status()
             return {"exists": True}
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             if e.response.status_code in [403, 404]:  # Forbidden or Not Found
                 return {"exists": False}
             logger.error(f"Error checking application existence for '{app_name}': {e}")
@@ -71,24 +72,24 @@ class ArgoCDController:
     def update_argocd_application(self, app_name: str, manifest: dict) -> dict:
         """Update an existing ArgoCD application on the cluster."""
         try:
-            response = requests.put(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, json=manifest,
-                                    timeout=10)
+            response = get_http_client().put(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS,
+                                             json=manifest, timeout=10)
             response.raise_for_status()
             logger.info(f"Application '{app_name}' updated successfully.")
             return {"status": "updated"}
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Failed to update application '{app_name}': {e}")
             return {"error": f"Failed to update application '{app_name}': {e}"}
 
     def create_new_argocd_application(self, manifest: dict) -> dict:
         """Create a new ArgoCD application on the cluster."""
         try:
-            response = requests.post(self.ARGOCD_API_URL, headers=self.HEADERS, json=manifest, timeout=10)
+            response = get_http_client().post(self.ARGOCD_API_URL, headers=self.HEADERS, json=manifest, timeout=10)
             response.raise_for_status()
             app_name = manifest['metadata']['name']
             logger.info(f"Application '{app_name}' created successfully.")
             return {"status": "created"}
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Failed to deploy application: {e}")
             return {"error": f"Failed to deploy application: {e}"}
 
@@ -109,7 +110,7 @@ class ArgoCDController:
     def get_argocd_application_status(self, app_name: str) -> dict:
         """Retrieve the health and sync status of a specific ArgoCD application."""
         try:
-            response = requests.get(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, timeout=10)
+            response = get_http_client().get(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, timeout=10)
             response.raise_for_status()
             app_data = response.json()
 
@@ -121,7 +122,7 @@ class ArgoCDController:
                 "sync_status": sync_status,
                 "error": None
             }
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Failed to fetch application status for '{app_name}': {e}")
             return {
                 "health_status": None,
@@ -137,10 +138,10 @@ class ArgoCDController:
         :return: A dictionary indicating the deletion status or any error message.
         """
         try:
-            response = requests.delete(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, timeout=10)
+            response = get_http_client().delete(f"{self.ARGOCD_API_URL}/{app_name}", headers=self.HEADERS, timeout=10)
             response.raise_for_status()
             logger.info(f"Application '{app_name}' deleted successfully.")
             return {"status": "deleted"}
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Failed to delete application '{app_name}': {e}")
             return {"error": f"Failed to delete application '{app_name}': {e}"}
@@ -1,5 +1,11 @@
-from duckduckgo_search import DDGS
 import json
+from typing import Iterator, Optional
+
+
+def _ddgs():
+    # duckduckgo_search is imported by the first search, not when the search tools are loaded
+    from duckduckgo_search import DDGS
+    return DDGS()
 
 
 class DuckDuckGoSearchManager:
@@ -18,10 +24,25 @@ class DuckDuckGoSearchManager:
         Returns:
         - list of str: A list containing the URLs of the search results. Each URL in the list corresponds to a page that matches the search query.
         """
-        with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=num_results)
-            urls = [result['href'] for result in results]
-            return urls
+        return list(self.iter_text_search(query, num_results))
+
+    def iter_text_search(self, query, max_results: Optional[int] = None) -> Iterator[str]:
+        """
+        Performs a DuckDuckGo text search and yields the URLs of the results as they arrive.
+
+        Results are requested page by page while the generator is consumed, so a caller can act on the first URLs
+        before the later pages are fetched, and stop early.
+
+        Parameters:
+        - query (str): The search query string for finding relevant text results.
+        - max_results (int | None): The maximum number of URLs to yield. None for as many as the search returns.
+
+        Yields:
+        - str: The URL of each search result, best match first.
+        """
+        with _ddgs() as ddgs:
+            for result in ddgs.text(query, max_results=max_results):
+                yield result['href']
 
     def news_search(self, query, num_results=3) -> list:
         """
@@ -34,10 +55,22 @@ class DuckDuckGoSearchManager:
         Returns:
         - list of str: A list containing the URLs of the news articles. Each URL in the list corresponds to a news article that matches the search query.
         """
-        with DDGS() as ddgs:
-            results = ddgs.news(query, max_results=num_results)
-            urls = [result['url'] for result in results]
-            return urls
+        return list(self.iter_news_search(query, num_results))
+
+    def iter_news_search(self, query, max_results: Optional[int] = None) -> Iterator[str]:
+        """
+        Performs a DuckDuckGo news search and yields the URLs of the news articles as they arrive.
+
+        Parameters:
+        - query (str): The search query string for finding relevant news articles.
+        - max_results (int | None): The maximum number of URLs to yield. None for as many as the search returns.
+
+        Yields:
+        - str: The URL of each news article, best match first.
+        """
+        with _ddgs() as ddgs:
+            for result in ddgs.news(query, max_results=max_results):
+                yield result['url']
 
     def images_search(self, query, num_results=3) -> list:
         """
@@ -52,7 +85,7 @@ class DuckDuckGoSearchManager:
             'image': URL of the actual image,
             'thumbnail': URL of the thumbnail of the image.
         """
-        with DDGS() as ddgs:
+        with _ddgs() as ddgs:
             results = ddgs.images(query, max_results=num_results)
             # Extract image and thumbnail URLs
             image_info = [{'image': result['image'], 'thumbnail': result['thumbnail']} for result in results]
@@ -70,7 +103,7 @@ class DuckDuckGoSearchManager:
         - list of dict: A list where each dictionary contains 'title' and 'content' keys.
           'title' is the title of the video, and 'content' is the URL of the video.
         """
-        with DDGS() as ddgs:
+        with _ddgs() as ddgs:
             results = ddgs.videos(query, max_results=num_results)
             video_info = [{'title': result['title'], 'content': result['content']} for result in results]
             return video_info
@@ -94,7 +127,7 @@ class DuckDuckGoSearchManager:
 
         Each dictionary represents one map search result, providing concise details about a location relevant to the search query.
         """
-        with DDGS() as ddgs:
+        with _ddgs() as ddgs:
             results = ddgs.maps(query, place, max_results=num_results)
             map_info = [{'title': result['title'],
                          'address': result['address'],
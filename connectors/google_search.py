@@ -1,5 +1,5 @@
 import logging
-from serpapi import GoogleSearch
+from typing import Iterator
 import config
 
 # Configure logging
@@ -15,11 +15,32 @@ class GoogleSearchManager:
         """
         Performs a Google Search and returns a list of URLs.
         """
+        try:
+            return list(self.iter_google_search(query, num_results, location))
+        except Exception as e:
+            return f"Error in performing Google Search: {e}"
+
+    def iter_google_search(self, query, max_results=10, location="United States", page_size=10) -> Iterator[str]:
+        """
+        Performs a Google News search and yields the URLs of the results as they arrive.
+
+        Results are requested page by page while the generator is consumed, so a caller can act on the first URLs
+        before the later pages are fetched, and stop early. Errors of the search are raised to the caller.
+
+        Parameters:
+        - query (str): The search query.
+        - max_results (int): The maximum number of URLs to yield.
+        - location (str): The location to search from.
+        - page_size (int): The number of results requested per page.
+        """
+        # serpapi is imported by the first search, not when the search tools are loaded
+        from serpapi import GoogleSearch
+        page_size = min(page_size, max_results)
         params = {
             "api_key": config.serpapi_key,
             "engine": "google",
             "q": query,
-            "num": str(num_results),
+            "num": str(page_size),
             "tbm": "nws",  # Search type: news, images, videos, shopping, books, apps
             "location": location,
             "hl": "en",  # language
@@ -28,14 +49,15 @@ class GoogleSearchManager:
             "output": "json",
             "safe": "active",
         }
-        try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
-            news_results = results.get("news_results", [])
-            urls = [result["link"] for result in news_results]
-            return urls
-        except Exception as e:
-            return f"Error in performing Google Search: {e}"
+        count = 0
+        for page in GoogleSearch(params).pagination(start=0, end=max_results, page_size=page_size):
+            if "error" in page:
+                raise RuntimeError(page["error"])
+            for result in page.get("news_results", []):
+                yield result["link"]
+                count += 1
+                if count >= max_results:
+                    return
 
 
 # Usage Example
@@ -1,32 +1,48 @@
 import json
-import psycopg2
-from psycopg2 import pool
 import logging
 import hashlib
+import threading
 
 # Configure logging
 logging = logging.getLogger(__name__)
 
+# psycopg2 is imported by the first query, see _driver()
+psycopg2 = None
+
+
+def _driver():
+    """Imports psycopg2 on first use, so loading the changelog tool does not pay for it."""
+    global psycopg2
+    if psycopg2 is None:
+        # Binds the module-level name, declared global above, to the psycopg2 package
+        import psycopg2.pool
+    return psycopg2
+
 
 class KubernetesChangelog:
     def __init__(self, dbname, user, password, host, port):
-        try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1, 10,
-                dbname=dbname,
-                user=user,
-                password=password,
-                host=host,
-                port=port
-            )
-            logging.debug("Database connection pool created successfully")
-        except psycopg2.DatabaseError as e:
-            logging.error("Error creating database connection pool: %s", e)
-            raise
+        # The connection pool is opened by the first query rather than here, so the assistant starts (and its other
+        # tools work) while the changelog database is down
+        self.connection_pool = None
+        self._connect_args = {"dbname": dbname, "user": user, "password": password, "host": host, "port": port}
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        driver = _driver()
+        with self._pool_lock:
+            if self.connection_pool is None:
+                try:
+                    self.connection_pool = driver.pool.SimpleConnectionPool(1, 10, **self._connect_args)
+                    logging.debug("Database connection pool created successfully")
+                except driver.DatabaseError as e:
+                    logging.error("Error creating database connection pool: %s", e)
+                    raise
+        return self.connection_pool
 
     def _get_connection(self):
+        connection_pool = self._get_pool()
         try:
-            return self.connection_pool.getconn()
+            return connection_pool.getconn()
         except psycopg2.DatabaseError as e:
             logging.error("Error getting connection from pool: %s", e)
             raise
@@ -1,16 +1,49 @@
+import contextvars
 import json
 import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+
+from core.deadline import cap_timeout, current_deadline, deadline_scope, remaining_time
+from core.http_client import get_http_client
 
 # Configure logging
 logging = logging.getLogger(__name__)
 
 
 class WebContentScraper:
-    def __init__(self, user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"):
+    def __init__(self, user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)", max_concurrency=8,
+                 max_per_host=2, connect_timeout=5.0, read_timeout=10.0, budget=20.0, min_content_length=200):
+        """
+        Parameters:
+        - user_agent (str): User-Agent header sent with every request.
+        - max_concurrency (int): Maximum number of pages fetched at once, across all the calls sharing this scraper.
+        - max_per_host (int): Maximum number of pages fetched at once from the same host.
+        - connect_timeout (float): Seconds allowed to connect to a host.
+        - read_timeout (float): Seconds allowed between two reads of a response.
+        - budget (float | None): Seconds a call to scrape_multiple_websites may take overall; pages still loading
+          when it runs out are reported as timed out. None for no limit other than the calling run's deadline.
+        - min_content_length (int): Characters of text a page must yield to count as good content in scrape_first;
+          shorter pages are usually cookie walls, paywalls or pages rendered by JavaScript.
+        """
         self.headers = {"User-Agent": user_agent}
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.budget = budget
+        self.min_content_length = min_content_length
+        self._executor = None
+        # Guards the fetch counts below; notified whenever a fetch finishes and frees its slots
+        self._slots = threading.Condition()
+        self._active = 0
+        self._active_per_host = Counter()
 
     def _fetch_page_content(self, url):
         """Fetches the content of a web page from a given URL.
@@ -21,11 +54,16 @@ class WebContentScraper:
         Returns:
         - bytes: The content of the web page in bytes if the request is successful; otherwise, None.
         """
+        if remaining_time() == 0:
+            logging.warning(f"Not fetching {url}: the time budget ran out")
+            return None
+        # Both timeouts are cut to the time left in the budget of the calling scrape, or the deadline of its run
+        timeout = httpx.Timeout(cap_timeout(self.read_timeout), connect=cap_timeout(self.connect_timeout))
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()  # Raises HTTPError for bad requests
+            response = get_http_client().get(url, headers=self.headers, timeout=timeout)
+            response.raise_for_status()  # Raises HTTPStatusError for bad requests
             return response.content
-        except requests.exceptions.HTTPError as http_err:
+        except httpx.HTTPStatusError as http_err:
             logging.error(f"HTTP error occurred: {http_err}")
             return None
         except Exception as err:
@@ -43,6 +81,8 @@ class WebContentScraper:
         - str: A single string containing all the extracted text from paragraph elements,
           separated by newlines. If parsing fails, returns None.
         """
+        # bs4 is imported by the first page parsed, not when the scraping tools are loaded
+        from bs4 import BeautifulSoup
         try:
             soup = BeautifulSoup(content, "html.parser")
             paragraphs = soup.find_all("p")
@@ -73,18 +113,202 @@ class WebContentScraper:
                 return {"url": url, "error": "Failed to parse content"}
         return {"url": url, "error": "Failed to fetch page content"}
 
-    def scrape_multiple_websites(self, urls):
-        """Scrapes the content from multiple websites.
+    def iter_scrape(self, urls: Iterable[str], budget: Optional[float] = None) -> Iterator[Tuple[int, Dict]]:
+        """Scrapes websites concurrently, yielding each result as soon as its page is done.
+
+        Fetches start in input order as soon as a slot is free, within the scraper's global and per-host limits,
+        which are shared with every other call in progress. Once the budget runs out, the pages still loading are
+        yielded as timed out and those never started as skipped; the fetches in flight finish in the background.
+
+        urls may be a generator, e.g. the results of a search as its pages arrive: it is consumed on a background
+        thread and each page fetch starts as soon as its URL is produced. Closing this generator early stops the
+        consumption of urls.
+
+        Parameters:
+        - urls (iterable of str): The URLs of the websites to be scraped.
+        - budget (float | None): Seconds allowed for the whole call. Defaults to the scraper's budget; never extends
+          the deadline of the calling run.
+
+        Yields:
+        - tuple: The index of the URL in urls and its result, as returned by scrape_website.
+
+        Raises:
+        - Exception: The error of a generator of urls that failed before producing any URL.
+        """
+        budget = self.budget if budget is None else budget
+        deadline = current_deadline()
+        if budget is not None:
+            deadline = time.monotonic() + budget if deadline is None else min(deadline, time.monotonic() + budget)
+        waiting = deque()
+        running = {}
+        feed = None
+        if isinstance(urls, (list, tuple)):
+            waiting.extend(enumerate(urls))
+        else:
+            feed = _UrlFeed(urls, waiting, self._slots, deadline)
+        try:
+            while True:
+                with self._slots:
+                    self._start_waiting(waiting, running, deadline)
+                    done = [future for future in running if future.done()]
+                    if not done:
+                        if not (waiting or running or (feed is not None and not feed.done)):
+                            break
+                        timeout = None if deadline is None else deadline - time.monotonic()
+                        if timeout is not None and timeout <= 0:
+                            break
+                        self._slots.wait(timeout)
+                        continue
+                for future in done:
+                    index, url = running.pop(future)
+                    yield index, future.result()
+        finally:
+            if feed is not None:
+                feed.stop()
+
+        if feed is not None and feed.error is not None and feed.count == 0:
+            raise feed.error
+        for index, url in running.values():
+            yield index, {"url": url, "error": "Timed out: the page did not load within the time budget"}
+        for index, url in waiting:
+            yield index, {"url": url, "error": "Skipped: the time budget ran out before the page was fetched"}
+
+    def _start_waiting(self, waiting: deque, running: Dict, deadline: Optional[float]):
+        # Called with self._slots held. A URL whose host is busy is passed over, not waited for.
+        for item in list(waiting):
+            if self._active >= self.max_concurrency:
+                return
+            host = urlsplit(item[1]).netloc.lower()
+            if self._active_per_host[host] >= self.max_per_host:
+                continue
+            waiting.remove(item)
+            self._active += 1
+            self._active_per_host[host] += 1
+            # Run in a copy of the caller's context, so the fetch is part of the caller's trace
+            future = self._get_executor().submit(contextvars.copy_context().run, self._scrape_before,
+                                                 item[1], deadline)
+            future.add_done_callback(lambda _, host=host: self._release(host))
+            running[future] = item
+
+    def _scrape_before(self, url: str, deadline: Optional[float]) -> Dict:
+        with deadline_scope(deadline):
+            return self.scrape_website(url)
+
+    def _release(self, host: str):
+        with self._slots:
+            self._active -= 1
+            self._active_per_host[host] -= 1
+            if not self._active_per_host[host]:
+                del self._active_per_host[host]
+            self._slots.notify_all()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created with the first fetch; fetches never exceed max_concurrency, so none waits in its queue
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="scraper")
+        return self._executor
+
+    def scrape_first(self, urls: Iterable[str], count: int, budget: Optional[float] = None):
+        """Scrapes websites as their URLs arrive until `count` of them gave good content.
+
+        Meant for the results of a search, given as a generator of more candidate URLs than needed: the pages are
+        fetched concurrently as the search produces them, and the call returns as soon as `count` pages yielded at
+        least min_content_length characters of text, without waiting for the rest of the search or the slower pages.
+
+        Parameters:
+        - urls (iterable of str): Candidate URLs, best first.
+        - count (int): The number of pages with good content wanted.
+        - budget (float | None): Seconds allowed for the whole call. Defaults to the scraper's budget.
+
+        Returns:
+        - str: A JSON-formatted string listing the pages with good content in the order of urls. If fewer than
+          count were found before the candidates or the budget ran out, the failed results follow them.
+        """
+        good, failed = [], []
+        pages = self.iter_scrape(urls, budget)
+        try:
+            for index, result in pages:
+                if len(result.get("content") or "") >= self.min_content_length:
+                    good.append((index, result))
+                    if len(good) >= count:
+                        break
+                else:
+                    failed.append((index, result))
+        except Exception as e:
+            logging.error(f"Error during scraping search results: {e}")
+            if not good and not failed:
+                return json.dumps({"error": str(e)})
+        finally:
+            pages.close()
+        results = sorted(good, key=lambda item: item[0])
+        if len(results) < count:
+            results += sorted(failed, key=lambda item: item[0])
+        return json.dumps([result for _, result in results])
+
+    def scrape_multiple_websites(self, urls, budget: Optional[float] = None):
+        """Scrapes the content from multiple websites concurrently.
 
         Parameters:
         - urls (list of str): A list of URLs of the websites to be scraped.
+        - budget (float | None): Seconds allowed for the whole call. Defaults to the scraper's budget.
 
         Returns:
         - str: A JSON-formatted string. Each element in the JSON represents the result
-          of scraping a single URL, containing either the scraped content or an error message.
+          of scraping a single URL, in the order of urls, containing either the scraped content or an error message.
+          Pages that did not load within the budget or the deadline of the calling run are reported as timed out or
+          skipped.
         """
         try:
-            return json.dumps([self.scrape_website(url) for url in urls], indent=2)
+            urls = list(urls)
+            results: List[Optional[Dict]] = [None] * len(urls)
+            for index, result in self.iter_scrape(urls, budget):
+                results[index] = result
+            return json.dumps(results)
         except Exception as e:
             logging.error(f"Error during scraping multiple websites: {e}")
             return json.dumps({"error": str(e)})
+
+
+class _UrlFeed:
+    """
+    Consumes a generator of URLs on a background thread for WebContentScraper.iter_scrape, appending each URL to the
+    queue of pages waiting to be fetched as soon as it is produced.
+    """
+
+    def __init__(self, urls: Iterable[str], waiting: deque, slots: threading.Condition, deadline: Optional[float]):
+        self.waiting = waiting
+        self.slots = slots
+        self.count = 0
+        self.done = False
+        self.error = None
+        self._stopped = False
+        # The generator runs in a copy of the caller's context, bounded by the deadline of the scrape
+        threading.Thread(target=contextvars.copy_context().run, args=(self._run, urls, deadline),
+                         name="scrape-feed", daemon=True).start()
+
+    def _run(self, urls: Iterable[str], deadline: Optional[float]):
+        iterator = iter(urls)
+        try:
+            with deadline_scope(deadline):
+                for url in iterator:
+                    with self.slots:
+                        if self._stopped:
+                            break
+                        self.waiting.append((self.count, url))
+                        self.count += 1
+                        self.slots.notify_all()
+        except Exception as e:
+            logging.error(f"Error while producing the URLs to scrape: {e}")
+            self.error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            with self.slots:
+                self.done = True
+                self.slots.notify_all()
+
+    def stop(self):
+        """Stops consuming the generator once it produces its next URL."""
+        with self.slots:
+            self._stopped = True
@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import re
+import threading
+import uuid
+from typing import Dict, Iterable, Optional
+
+from core.cache import MemoryCacheBackend, _MISSING
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_message(text: str) -> str:
+    """
+    Normalizes a user message for lookups: case, runs of whitespace and trailing punctuation are ignored, so
+    "What is the latest version of Kubernetes?" and "what is the latest  version of kubernetes" share an entry.
+    """
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", text.casefold())).strip()
+
+
+class CachedResponse:
+    """
+    A cached answer, shaped like the page returned by messages.list: `data[0]` is the assistant Message.
+    """
+    cached = True
+
+    def __init__(self, message):
+        self.message = message
+
+    @property
+    def data(self) -> list:
+        return [self.message]
+
+
+class AnswerCache:
+    """
+    Caches the final answers of get_assistant_response, so a repeated question is answered without any API call.
+
+    Entries are keyed by the normalized user message and the fingerprint of the assistant definition (model,
+    instructions and tools), and expire after `ttl` seconds. Each entry records the tools its run called, along with
+    the epoch of each tool: a token kept in the backend and replaced whenever the cached data of the tool changes. An
+    entry is served only while the epochs of its tools are unchanged, so a change to one tool drops only the answers
+    that depended on it, and answers of runs that overlapped such a change are not stored.
+
+    Answers do not depend on the conversation history and a cached answer is never added to a thread, so the cache
+    only serves single-shot requests, made without a thread, and is opt-in.
+    """
+
+    def __init__(self, ttl=3600, backend=None, max_message_length=2000):
+        """
+        Args:
+            ttl (float): Time-to-live of an answer in seconds. Default is one hour.
+            backend: Storage backend, e.g. a SQLiteCacheBackend with table='answer_cache' to share answers between
+                processes. Defaults to an in-process MemoryCacheBackend.
+            max_message_length (int): Messages longer than this are never cached; they are unlikely to repeat.
+        """
+        self.ttl = ttl
+        self.backend = backend or MemoryCacheBackend()
+        self.max_message_length = max_message_length
+        self.generation = 0
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def key(self, user_message: str, definition_fingerprint: str) -> Optional[str]:
+        """
+        Returns the cache key of a question, or None if it is not cacheable.
+
+        Args:
+            user_message (str): The user's message.
+            definition_fingerprint (str): Fingerprint of the model, instructions and tools answering it.
+        """
+        if not user_message or len(user_message) > self.max_message_length:
+            return None
+        digest = hashlib.sha256(f"{definition_fingerprint}\n{normalize_message(user_message)}".encode())
+        return f"answer:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Returns the cached answer, a Message serialized as a dict, or None. An entry depending on a tool whose data
+        changed since it was stored is discarded.
+        """
+        value = self.backend.get(key)
+        if value is not _MISSING and not self._is_current(value):
+            self.backend.delete(key)
+            value = _MISSING
+        with self._lock:
+            self._stats["misses" if value is _MISSING else "hits"] += 1
+        return None if value is _MISSING else value["message"]
+
+    def _is_current(self, value) -> bool:
+        if not isinstance(value, dict) or "message" not in value or not isinstance(value.get("tools"), dict):
+            # Written by an earlier version, without the tools it depends on
+            return False
+        return all(self.backend.get(self._epoch_key(name)) == epoch for name, epoch in value["tools"].items())
+
+    def snapshot(self, tool_names: Iterable[str]) -> Dict:
+        """
+        The current epochs of the given tools, read at the start of a run and passed to `put` with its answer.
+
+        Args:
+            tool_names: Names of the tools the run may call.
+        """
+        with self._lock:
+            generation = self.generation
+        return {"generation": generation, "epochs": {name: self._epoch(name) for name in tool_names}}
+
+    def _epoch(self, func_name: str) -> str:
+        epoch = self.backend.get(self._epoch_key(func_name))
+        if epoch is _MISSING:
+            # Never invalidated, or evicted from the backend: a new epoch also retires the entries of the old one
+            epoch = uuid.uuid4().hex
+            self.backend.set(self._epoch_key(func_name), epoch, None)
+        return epoch
+
+    @staticmethod
+    def _epoch_key(func_name: str) -> str:
+        return f"answer-epoch:{func_name}"
+
+    def put(self, key: str, message: Dict, snapshot: Dict, tools_used: Iterable[str] = ()):
+        """
+        Stores an answer along with the tools its run called, unless the data of one of them changed since `snapshot`
+        was taken at the start of the run.
+
+        Args:
+            key (str): Cache key of the question.
+            message (Dict): The final assistant Message, serialized as a dict.
+            snapshot (Dict): The epochs returned by `snapshot` before the run was created.
+            tools_used: Names of the tools the run called.
+        """
+        epochs = {name: snapshot["epochs"].get(name) for name in set(tools_used)}
+        with self._lock:
+            if snapshot["generation"] != self.generation:
+                logger.debug("Not caching an answer computed while the answer cache was cleared")
+                return
+        if any(epoch is None or self.backend.get(self._epoch_key(name)) != epoch for name, epoch in epochs.items()):
+            logger.debug(f"Not caching an answer computed while the data of {sorted(epochs)} changed")
+            return
+        with self._lock:
+            self._stats["stored"] += 1
+        self.backend.set(key, {"message": message, "tools": epochs}, self.ttl)
+
+    def discard(self, key: str):
+        self.backend.delete(key)
+
+    def invalidate(self, func_name: Optional[str] = None):
+        """
+        Drops the cached answers that depended on a function, or every cached answer when func_name is None.
+        Registered as a ToolResultCache listener, it receives the function whose cached data changed.
+        """
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if func_name is None:
+                self.generation += 1
+        if func_name is None:
+            logger.debug("Answer cache cleared")
+            self.backend.clear()
+            return
+        logger.debug(f"Answers depending on '{func_name}' invalidated after its data changed")
+        self.backend.set(self._epoch_key(func_name), uuid.uuid4().hex, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
@@ -1,15 +1,41 @@
 import time
 import json
+import hashlib
 import logging
+import threading
+import contextvars
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Optional, Callable, List, Dict, Generator
+import httpx
 from openai import OpenAI, OpenAIError
+from openai.types.beta.threads import Message
+from core.answer_cache import CachedResponse
 from core.parser import FunctionDefinitionParser
+from core.cache import canonical_call_key
+from core.deadline import (CANCEL_GRACE_PERIOD, RunTimeout, cap_timeout, current_deadline, deadline_scope,
+                           remaining_time, request_deadline)
+from core.poller import RunPoller
+from core.run_journal import COMPLETED, FINISHED_PHASES, MESSAGE_ADDED, STARTED
+from core.singleflight import SingleFlight
+from core.streaming import ResponseStream, extract_text_deltas, message_text, TERMINAL_RUN_EVENTS
+from core.tracing import Tracer
+from core.validation import compile_validator, enum_parameters
 
 logger = logging.getLogger(__name__)
 
+FINGERPRINT_METADATA_KEY = "definition_fingerprint"
+
 
 class AssistantManager:
-    def __init__(self, api_key, assistant_id, model="gpt-4-1106-preview", functions: Optional[List[Callable]] = None):
+    client_class = OpenAI
+    run_poller_class = RunPoller
+
+    def __init__(self, api_key, assistant_id, model="gpt-4-1106-preview", functions: Optional[List[Callable]] = None,
+                 max_tool_workers=8, tool_timeouts: Optional[Dict[str, float]] = None, default_tool_timeout=60,
+                 run_poller=None, tool_cache=None, coalesce_tool_calls=True, message_store=None,
+                 sync_definition=False, thread_pool=None, tracer=None, base_url=None, scheduler=None,
+                 output_budget=None, http_client=None, run_deadline=None, answer_cache=None, run_journal=None):
         """
         Initialize the AssistantManager with the necessary OpenAI parameters.
 
@@ -17,6 +43,34 @@ class AssistantManager:
             api_key (str): API key for OpenAI.
             assistant_id (str): Identifier for the specific assistant.
             model (str): The model version to be used, default is 'gpt-4-1106-preview'.
+            functions (List[Callable] | None): Functions exposed to the assistant as tools.
+            max_tool_workers (int): Maximum number of tool calls executed concurrently. Default is 8.
+            tool_timeouts (Dict[str, float] | None): Per-function timeouts in seconds, keyed by function name.
+            default_tool_timeout (float | None): Timeout in seconds for functions without an entry in tool_timeouts.
+                If None, wait indefinitely. Default is 60 seconds.
+            run_poller (RunPoller | None): Poller shared with other managers. If None, a dedicated one is created.
+            tool_cache (ToolResultCache | None): Cache for the results of functions with a declared TTL.
+            coalesce_tool_calls (bool): If True, identical tool calls in flight at the same time share one execution.
+            message_store (MessageStore | None): Local mirror of thread messages, synced incrementally after each run.
+            sync_definition (bool): If True, the model, instructions and tools are written to the remote assistant
+                once (only when their fingerprint changed) and runs are created without per-run overrides.
+            thread_pool (ThreadPool | None): Pool of pre-created threads handed out when no thread_id is given.
+            tracer (Tracer | None): Records a span per request phase and tool call. If None, a tracer without
+                exporters is used.
+            base_url (str | None): Base URL of the API, e.g. a local fake server for benchmarks. If None, the
+                client default (or OPENAI_BASE_URL) is used.
+            scheduler (RequestScheduler | None): Admission control shared by all API calls of the client: rate-limit
+                budgets, priorities and retries within the caller's deadline. If None, the SDK's own retries apply.
+            output_budget (ToolOutputBudget | None): Compacts tool outputs and cuts them to a per-tool size budget
+                before they are submitted. If None, outputs are submitted as returned.
+            http_client (HttpClient | None): Shared HTTP layer whose keep-alive connection pool the OpenAI client
+                uses. If None, the client opens its own connections.
+            run_deadline (float | None): End-to-end deadline in seconds of requests made without a max_wait_time. If
+                None, such requests wait indefinitely.
+            answer_cache (AnswerCache | None): Serves repeated questions from earlier answers without any API call.
+                It is cleared whenever the data cached in tool_cache changes.
+            run_journal (RunJournal | None): Write-ahead journal of in-flight runs, so a request retried after a crash
+                (or `resume_runs` on restart) reattaches to its run instead of creating a new one.
 
         Raises:
             ValueError: If any required parameters are missing or invalid.
@@ -24,12 +78,38 @@ class AssistantManager:
         if not api_key or not assistant_id:
             raise ValueError("API key and Assistant ID are required")
 
-        self.client = OpenAI(api_key=api_key)
+        client_options = {"api_key": api_key, "base_url": base_url}
+        if scheduler is not None:
+            # The scheduler retries within the caller's deadline; SDK retries on top would multiply the attempts
+            client_options.update(max_retries=0, http_client=self._scheduled_http_client(scheduler, http_client))
+        elif http_client is not None:
+            client_options["http_client"] = self._pooled_http_client(http_client)
+        self.client = self.client_class(**client_options)
+        self.scheduler = scheduler
+        self.output_budget = output_budget
+        self.run_deadline = run_deadline
         self.assistant_id = assistant_id
         self.model = model
         self.function_parser = FunctionDefinitionParser()  # Initialize the parser first
         self.functions = self._parse_functions(functions)  # Then use it in _parse_functions
         self.func_mapping = self._create_func_mapping(functions)
+        self.tool_executor = ThreadPoolExecutor(max_workers=max_tool_workers, thread_name_prefix="assistant-tool")
+        self.tool_timeouts = tool_timeouts or {}
+        self.default_tool_timeout = default_tool_timeout
+        self.run_poller = run_poller or self.run_poller_class(self.client)
+        self.tool_cache = tool_cache
+        self.singleflight = SingleFlight() if coalesce_tool_calls else None
+        self.message_store = message_store
+        self.sync_definition = sync_definition
+        self._synced_instructions = None
+        self._definition_synced = False
+        self._sync_lock = threading.Lock()
+        self.thread_pool = thread_pool
+        self.tracer = tracer or Tracer()
+        self.answer_cache = answer_cache
+        self.run_journal = run_journal
+        if answer_cache is not None and tool_cache is not None:
+            tool_cache.add_listener(answer_cache.invalidate)
 
         # Unpacking the generator here
         self.tools = [
@@ -37,12 +117,20 @@ class AssistantManager:
             {"type": "retrieval"},
             *self.functions  # Unpack the generator
         ]
+        self.tool_validators = self._compile_validators()
+
+        if self.thread_pool is not None:
+            self.thread_pool.start(self)
 
     def _parse_functions(self, functions: Optional[List[Callable]]) -> Generator[Dict, None, None]:
-        """Yields each 'python function' as a JSON-serializable dict."""
+        """
+        Yields each 'python function' as a JSON-serializable dict.
+
+        Tools from a ToolRegistry carry their cached schema as `tool_schema` and are not parsed again.
+        """
         if functions is not None:
             for func in functions:
-                yield self.function_parser.convert_function_to_json_schema(func)
+                yield getattr(func, "tool_schema", None) or self.function_parser.convert_function_to_json_schema(func)
 
     def _create_func_mapping(self, functions: Optional[List[Callable]]) -> Dict[str, Callable]:
         """Creates a mapping between the function names and function definitions."""
@@ -50,9 +138,98 @@ class AssistantManager:
             return {}
         return {func.__name__: func for func in functions}
 
+    def _compile_validators(self) -> Dict[str, Callable]:
+        """Compiles the argument validator of each function tool from its schema."""
+        validators = {}
+        for tool in self.tools:
+            if tool["type"] != "function":
+                continue
+            name = tool["function"]["name"]
+            validators[name] = compile_validator(name, tool["function"].get("parameters"),
+                                                 enum_parameters(self.func_mapping.get(name)))
+        return validators
+
     def debug_tools(self):
         print(self.tools)
 
+    @staticmethod
+    def _scheduled_http_client(scheduler, http_client=None):
+        return scheduler.http_client(transport=http_client.shared_transport() if http_client else None)
+
+    @staticmethod
+    def _pooled_http_client(http_client):
+        return http_client.openai_http_client()
+
+    def definition_fingerprint(self, instructions) -> str:
+        """
+        Computes a fingerprint of the assistant definition generated locally.
+
+        Args:
+            instructions (str): Instructions for the assistant.
+
+        Returns:
+            str: SHA-256 hex digest of the model, instructions and tools.
+        """
+        definition = {"model": self.model, "instructions": instructions, "tools": self.tools}
+        return hashlib.sha256(json.dumps(definition, sort_keys=True).encode()).hexdigest()
+
+    def sync_assistant(self, instructions):
+        """
+        Make the remote assistant match the local model, instructions and tools.
+
+        The fingerprint of the local definition is compared with the one stored in the assistant's metadata by the
+        previous sync, and the assistant is only updated when they differ. Once synced, runs are created without
+        resending the definition.
+
+        Args:
+            instructions (str): Instructions for the assistant.
+
+        Returns:
+            bool: True if the remote assistant was updated.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        with self._sync_lock:
+            if self._definition_synced:
+                return False
+            try:
+                assistant = self.client.beta.assistants.retrieve(self.assistant_id)
+                update = self._definition_update(instructions, assistant)
+                if update is not None:
+                    self.client.beta.assistants.update(self.assistant_id, **update)
+            except OpenAIError as e:
+                logger.error(f"Failed to sync assistant {self.assistant_id}: {e}")
+                raise
+            self._synced_instructions = instructions
+            self._definition_synced = True
+            return update is not None
+
+    def _definition_update(self, instructions, assistant) -> Optional[Dict]:
+        """
+        The parameters of assistants.update that write the local definition to the remote assistant, or None if the
+        fingerprint stored in its metadata shows it already matches.
+        """
+        fingerprint = self.definition_fingerprint(instructions)
+        metadata = dict(assistant.metadata or {})
+        if metadata.get(FINGERPRINT_METADATA_KEY) == fingerprint:
+            return None
+        logger.info(f"Updating definition of assistant {self.assistant_id}")
+        metadata[FINGERPRINT_METADATA_KEY] = fingerprint
+        return {"model": self.model, "instructions": instructions, "tools": self.tools, "metadata": metadata}
+
+    def _run_parameters(self, instructions) -> Dict:
+        """
+        Returns the per-run overrides to send with runs.create.
+
+        Once the assistant definition is synced, only instructions differing from the synced ones are sent.
+        """
+        if not self._definition_synced:
+            return {"model": self.model, "instructions": instructions, "tools": self.tools}
+        if instructions != self._synced_instructions:
+            return {"instructions": instructions}
+        return {}
+
     def create_thread(self):
         """
         Create a new conversation thread.
@@ -64,7 +241,8 @@ class AssistantManager:
             OpenAIError: If the API call fails.
         """
         try:
-            thread = self.client.beta.threads.create()
+            with self.tracer.span("thread.create"):
+                thread = self.client.beta.threads.create()
             return thread
         except OpenAIError as e:
             logger.error(f"Failed to create thread: {e}")
@@ -82,6 +260,8 @@ class AssistantManager:
         """
         try:
             self.client.beta.threads.delete(thread_id)
+            if self.message_store is not None:
+                self.message_store.forget(thread_id)
         except OpenAIError as e:
             logger.error(f"Failed to delete thread {thread_id}: {e}")
             raise
@@ -101,12 +281,13 @@ class AssistantManager:
         if file_ids is None:
             file_ids = []
         try:
-            self.client.beta.threads.messages.create(
-                thread_id=thread_id,
-                role=role,
-                content=content,
-                file_ids=file_ids
-            )
+            with self.tracer.span("message.create", thread_id=thread_id):
+                self.client.beta.threads.messages.create(
+                    thread_id=thread_id,
+                    role=role,
+                    content=content,
+                    file_ids=file_ids
+                )
         except OpenAIError as e:
             logger.error(f"Failed to add message to thread {thread_id}: {e}")
             raise
@@ -126,13 +307,15 @@ class AssistantManager:
             OpenAIError: If the API call fails.
         """
         try:
-            run = self.client.beta.threads.runs.create(
-                thread_id=thread_id,
-                assistant_id=self.assistant_id,
-                model=self.model,
-                instructions=instructions,
-                tools=self.tools
-            )
+            if self.sync_definition:
+                self.sync_assistant(instructions)
+            with self.tracer.span("run.create", thread_id=thread_id) as span:
+                run = self.client.beta.threads.runs.create(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id,
+                    **self._run_parameters(instructions)
+                )
+                span.set_attribute("run_id", run.id)
             return run
         except OpenAIError as e:
             logger.error(f"Failed to run assistant on thread {thread_id}: {e}")
@@ -155,89 +338,325 @@ class AssistantManager:
             logger.error(f"Failed to cancel run {run_id} on thread {thread_id}: {e}")
             raise
 
-    def _wait_for_run_completion(self, run_id, thread_id, check_interval=3, max_wait_time=10):
+    def _wait_for_run_completion(self, run_id, thread_id, check_interval=3, max_wait_time=10, started=None,
+                                 journal_key=None, tools_used=None):
         """
-        Wait for a run to complete, checking its status periodically.
+        Wait for a run to complete, using the shared run poller to track its status.
+
+        The poller checks the run quickly right after it is created and after tool outputs are submitted, then backs
+        off exponentially while the run stays queued or in progress. The deadline is checked on every iteration: once
+        it passes, the run is cancelled and RunTimeout is raised with the text the run produced so far.
+
+        With a journal key, tool outputs are journaled before they are submitted and the final status once the run
+        ends. Outputs journaled by an earlier process for the tool calls the run still requires are submitted as they
+        are, without calling the functions again.
 
         Args: run_id (str): The ID of the run. thread_id (str): The ID of the thread.
-        check_interval (int): Time in seconds to wait between status checks. Default is 5 seconds.
-        max_wait_time (int | None): Maximum time in seconds to wait for the run to complete. If None, wait indefinitely.
+        check_interval (float): Upper bound in seconds on the time between status checks. Default is 3 seconds.
+        max_wait_time (int | None): Maximum time in seconds to wait for the run to complete. If None, wait until the
+        deadline of the enclosing request, or indefinitely without one.
+        started (float | None): time.monotonic() at the start of the request, for the elapsed time of a RunTimeout.
+        journal_key (str | None): Key of the request in the run journal, or None if it is not journaled.
+        tools_used (set | None): Receives the names of the tools the run calls, for the answer cache.
 
         Returns:
             Messages: Messages from the completed run.
 
         Raises:
-            OpenAIError: If the API call fails or the maximum wait time is exceeded.
+            OpenAIError: If the API call fails.
+            RunTimeout: If the deadline passes before the run completes.
         """
-        start_time = time.time()
-        while True:
-            try:
-                run_status = self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-                current_time = time.time()
-
-                logger.debug(f"Run status: {run_status.status}")
-
-                if run_status.status == 'completed':
-                    return self._retrieve_thread_messages(thread_id)
-                elif run_status.status == 'requires_action':
-                    logger.debug("Processing required tool calls.")
-                    required_actions = run_status.required_action.submit_tool_outputs.model_dump()
-                    logger.debug(f"Required actions: {required_actions}")
-                    tool_outputs = self._handle_tool_call(required_actions)
-                    logger.debug(f"Tool outputs: {tool_outputs}")
-
-                    # Submitting tool outputs back to the assistant
-                    self.client.beta.threads.runs.submit_tool_outputs(
-                        thread_id=thread_id,
-                        run_id=run_id,
-                        tool_outputs=tool_outputs
-                    )
-                elif max_wait_time and (current_time - start_time) > max_wait_time:
-                    error_msg = f"Maximum wait time exceeded for run {run_id}"
-                    logger.warning(error_msg)
-                    raise TimeoutError(error_msg)
-                elif run_status.status not in ["queued", "in_progress"]:
-                    logger.warning(f"Run {run_id} ended with status: {run_status.status}")
-                    break
-
-                time.sleep(check_interval)
-            except OpenAIError as e:
-                logger.error(f"Error while waiting for run completion: {e}")
-                raise
+        started = time.monotonic() if started is None else started
+        queue_wait_recorded = False
+        with request_deadline(max_wait_time):
+            while True:
+                try:
+                    remaining = remaining_time()
+                    if remaining == 0:
+                        raise self._abort_run(thread_id, run_id, started, journal_key=journal_key)
+                    future = self.run_poller.watch(thread_id, run_id, max_interval=check_interval)
+                    with self.tracer.span("run.wait", thread_id=thread_id, run_id=run_id) as span:
+                        try:
+                            run_status = future.result(timeout=remaining)
+                        except FutureTimeoutError:
+                            self.run_poller.unwatch(thread_id, run_id)
+                            span.set_attribute("status", "deadline_exceeded")
+                            run_status = None
+                        else:
+                            self._record_run_status(span, run_status)
+                    if run_status is None:
+                        raise self._abort_run(thread_id, run_id, started, journal_key=journal_key)
+
+                    logger.debug(f"Run status: {run_status.status}")
+                    if not queue_wait_recorded:
+                        queue_wait_recorded = self._record_queue_wait(thread_id, run_id, run_status)
+
+                    if run_status.status == 'completed':
+                        messages = self._retrieve_thread_messages(thread_id)
+                        if journal_key is not None:
+                            self.run_journal.finish(journal_key)
+                        return messages
+                    elif run_status.status == 'requires_action':
+                        required_actions = self._required_actions(run_status, tools_used)
+                        tool_outputs = self._journaled_outputs(journal_key, required_actions)
+                        if tool_outputs is None:
+                            with self.tracer.span("tool.dispatch", thread_id=thread_id, run_id=run_id):
+                                tool_outputs = self._handle_tool_call(required_actions)
+                            logger.debug(f"Tool outputs: {tool_outputs}")
+                            if remaining_time() == 0:
+                                raise self._abort_run(thread_id, run_id, started, journal_key=journal_key)
+                            if journal_key is not None:
+                                self.run_journal.submitting(journal_key, tool_outputs)
+
+                        # Submitting tool outputs back to the assistant
+                        with self.tracer.span("run.submit_tool_outputs", thread_id=thread_id, run_id=run_id):
+                            self.client.beta.threads.runs.submit_tool_outputs(
+                                thread_id=thread_id,
+                                run_id=run_id,
+                                tool_outputs=tool_outputs
+                            )
+                        if journal_key is not None:
+                            self.run_journal.submitted(journal_key, [output["tool_call_id"] for output in tool_outputs])
+                    else:
+                        logger.warning(f"Run {run_id} ended with status: {run_status.status}")
+                        if journal_key is not None:
+                            self.run_journal.finish(journal_key, run_status.status)
+                        break
+                except OpenAIError as e:
+                    if remaining_time() == 0:
+                        # e.g. the request scheduler gave up on a call at the deadline
+                        raise self._abort_run(thread_id, run_id, started, journal_key=journal_key) from e
+                    logger.error(f"Error while waiting for run completion: {e}")
+                    raise
+
+    def _record_run_status(self, span, run_status):
+        span.set_attribute("status", run_status.status)
+        if run_status.usage is not None:
+            span.set_attribute("usage", run_status.usage.model_dump())
+
+    def _record_queue_wait(self, thread_id, run_id, run_status) -> bool:
+        """Records the time a run spent queued, once it has started. Returns whether it was recorded."""
+        if not (run_status.started_at and run_status.created_at):
+            return False
+        # Server-side timestamps, with a resolution of one second
+        self.tracer.record("run.queue_wait", run_status.started_at - run_status.created_at,
+                           thread_id=thread_id, run_id=run_id)
+        return True
+
+    @staticmethod
+    def _required_actions(run, tools_used=None) -> Dict:
+        """The tool calls a run requires, as a dict. Their names are added to tools_used."""
+        logger.debug("Processing required tool calls.")
+        required_actions = run.required_action.submit_tool_outputs.model_dump()
+        logger.debug(f"Required actions: {required_actions}")
+        if tools_used is not None:
+            tools_used.update(call['function']['name'] for call in required_actions['tool_calls'])
+        return required_actions
+
+    def _abort_run(self, thread_id, run_id, started, partial_text=None, journal_key=None) -> RunTimeout:
+        """
+        Cancels a run that passed its deadline and builds the RunTimeout to raise, carrying its partial output.
+
+        Cancelling and collecting the partial output get a short grace period of their own, since the request's
+        deadline has already passed.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            run_id (str | None): The ID of the run, or None if the deadline passed before it was created.
+            started (float): time.monotonic() at the start of the request.
+            partial_text (str | None): Text already received from a streamed run. If None, it is read from the
+                messages the run created.
+            journal_key (str | None): Key of the request in the run journal, marked as timed out.
+
+        Returns:
+            RunTimeout: The exception to raise.
+        """
+        elapsed = self._deadline_passed(thread_id, run_id, started, journal_key)
+        cancelled = False
+        messages = []
+        with deadline_scope(time.monotonic() + CANCEL_GRACE_PERIOD), \
+                self.tracer.span("run.cancel", thread_id=thread_id, run_id=run_id) as span:
+            if run_id is not None:
+                try:
+                    self.cancel_run(run_id, thread_id)
+                    cancelled = True
+                except (OpenAIError, httpx.HTTPError):
+                    # Already logged; the run may have ended in the meantime
+                    pass
+                if partial_text is None:
+                    messages = self._run_messages(thread_id, run_id)
+            span.set_attribute("cancelled", cancelled)
+        return self._run_timeout(thread_id, run_id, elapsed, partial_text, messages, cancelled)
+
+    def _deadline_passed(self, thread_id, run_id, started, journal_key) -> float:
+        """Logs and journals a run that passed its deadline. Returns the seconds spent on the request."""
+        elapsed = time.monotonic() - started
+        logger.warning(f"Run {run_id} on thread {thread_id} passed its deadline after {elapsed:.1f}s")
+        if journal_key is not None:
+            self.run_journal.finish(journal_key, "timeout")
+        return elapsed
+
+    @staticmethod
+    def _run_timeout(thread_id, run_id, elapsed, partial_text, messages, cancelled) -> RunTimeout:
+        """The RunTimeout of a cancelled run. Without streamed text, its partial output is read from its messages."""
+        if partial_text is None:
+            partial_text = "\n".join(message_text(message) for message in reversed(messages))
+        return RunTimeout(f"Run {run_id} on thread {thread_id} exceeded its deadline after {elapsed:.1f} seconds",
+                          thread_id=thread_id, run_id=run_id, elapsed=elapsed, partial_text=partial_text,
+                          messages=messages, cancelled=cancelled)
+
+    def _journaled_outputs(self, journal_key, required_actions) -> Optional[List[Dict]]:
+        """Tool outputs journaled for exactly the required tool calls, or None if they must be computed."""
+        if journal_key is None:
+            return None
+        tool_outputs = self.run_journal.pending_outputs(journal_key,
+                                                        [action["id"] for action in required_actions["tool_calls"]])
+        if tool_outputs is not None:
+            logger.info(f"Submitting {len(tool_outputs)} journaled tool outputs of request {journal_key}")
+        return tool_outputs
+
+    def _run_messages(self, thread_id, run_id) -> list:
+        """Assistant messages created by a run, newest first, or an empty list if they cannot be retrieved."""
+        try:
+            page = self.client.beta.threads.messages.list(thread_id, limit=20)
+        except (OpenAIError, httpx.HTTPError) as e:
+            logger.warning(f"Failed to retrieve the partial output of run {run_id}: {e}")
+            return []
+        return self._messages_of_run(page, run_id)
+
+    @staticmethod
+    def _messages_of_run(page, run_id) -> list:
+        return [message for message in page.data if message.run_id == run_id and message.role == "assistant"]
 
     def _handle_tool_call(self, required_actions):
         """
         Handles tool calls made by the OpenAI Assistant.
 
+        The arguments of every call are validated first; a call with invalid arguments is not dispatched and yields an
+        error output telling the model what to fix. The other calls are dispatched at once on the tool executor and
+        gathered in the order of their tool_call_id. A call that fails or exceeds its timeout yields an error output
+        instead of aborting the whole submission. Timeouts are cut to the time left before the request's deadline. A
+        timed-out call cannot be interrupted and keeps its worker until the function returns.
+
         Args:
             required_actions: Actions required as indicated by the OpenAI Assistant.
 
         Returns:
             List of tool outputs to submit back to the Assistant.
         """
-        tool_outputs = []
+        dispatched_at = time.monotonic()
+        # Each call runs in a copy of the current context so its span is attached to the request's trace, and the
+        # request's deadline bounds the HTTP calls the function makes
+        pending = []
         for action in required_actions["tool_calls"]:
+            arguments, error = self._validate_tool_call(action)
+            future = None if error is not None else self.tool_executor.submit(
+                contextvars.copy_context().run, self._execute_tool_call, action, arguments)
+            pending.append((action, future, error))
+
+        tool_outputs = []
+        for action, future, output in pending:
             func_name = action['function']['name']
-            arguments = json.loads(action['function']['arguments'])
-
-            if func_name in self.func_mapping:
-                output = self._call_function(func_name, arguments)
-                # Convert output to JSON string if it's a dictionary
-                if isinstance(output, dict):
-                    output = json.dumps(output)
-                tool_outputs.append({
-                    "tool_call_id": action['id'],
-                    "output": output
-                })
-            else:
-                raise ValueError(f"Unknown function: {func_name}")
+            timeout = self.tool_timeouts.get(func_name, self.default_tool_timeout)
+            remaining = None if timeout is None else max(0.0, dispatched_at + timeout - time.monotonic())
+            try:
+                if future is not None:
+                    output = future.result(timeout=cap_timeout(remaining))
+            except FutureTimeoutError:
+                future.cancel()
+                output = self._tool_timeout_output(func_name, timeout)
+            tool_outputs.append({
+                "tool_call_id": action['id'],
+                "output": output
+            })
 
         return tool_outputs
 
+    def _tool_timeout_output(self, func_name, timeout) -> str:
+        """The error output of a call that exceeded its timeout, or was cut short by the request's deadline."""
+        if remaining_time() == 0:
+            logger.warning(f"Function '{func_name}' was still running at the request deadline")
+            return self._format_tool_error(f"Function {func_name} did not finish before the deadline")
+        logger.warning(f"Function '{func_name}' timed out after {timeout} seconds")
+        return self._format_tool_error(f"Function {func_name} timed out after {timeout} seconds")
+
+    def _validate_tool_call(self, action):
+        """
+        Checks that a tool call names a known function and validates its arguments against the function's schema.
+
+        Args:
+            action: One entry of the 'tool_calls' list in the required actions.
+
+        Returns:
+            Tuple of the validated, coerced arguments and None, or of None and the JSON error output to submit instead
+            of calling the function.
+        """
+        func_name = action['function']['name']
+        if func_name not in self.func_mapping:
+            logger.error(f"Unknown function: {func_name}")
+            return None, self._format_tool_error(f"Unknown function: {func_name}")
+        validator = self.tool_validators.get(func_name)
+        try:
+            if validator is None:
+                return json.loads(action['function']['arguments'] or "{}"), None
+            return validator(action['function']['arguments']), None
+        except ValueError as e:  # A ToolArgumentError, or invalid JSON for a function without a validator
+            logger.warning(f"Rejected the arguments of function '{func_name}': {e}")
+            with self.tracer.span("tool.call", tool=func_name, tool_call_id=action['id']) as span:
+                span.error = "invalid_arguments"
+            return None, self._format_tool_error(str(e))
+
+    def _execute_tool_call(self, action, arguments: Dict) -> str:
+        """
+        Executes a single tool call and serializes its result.
+
+        Args:
+            action: One entry of the 'tool_calls' list in the required actions.
+            arguments: The call's arguments, as returned by _validate_tool_call.
+
+        Returns:
+            The output string to submit, or a JSON error object if the call could not be completed.
+        """
+        func_name = action['function']['name']
+        with self.tracer.span("tool.call", tool=func_name, tool_call_id=action['id']) as span:
+            try:
+                return self._prepare_tool_output(func_name, self._call_function(func_name, arguments), span)
+            except Exception as e:
+                span.error = f"{type(e).__name__}: {e}"
+                return self._format_tool_error(f"Function {func_name} failed: {e}")
+
+    def _prepare_tool_output(self, func_name, output, span) -> str:
+        """Serializes a tool result and applies the output budget, recording the sizes on the tool.call span."""
+        output = self._serialize_tool_output(output)
+        if self.output_budget is None:
+            return output
+        output, stats = self.output_budget.apply(func_name, output)
+        span.set_attribute("output_tokens", stats["tokens"])
+        span.set_attribute("output_tokens_cut", stats["original_tokens"] - stats["tokens"])
+        if stats["excerpted"] or stats["dropped_items"]:
+            span.set_attribute("output_excerpted", stats["excerpted"])
+            span.set_attribute("output_dropped_items", stats["dropped_items"])
+        return output
+
+    @staticmethod
+    def _serialize_tool_output(output) -> str:
+        """Converts a tool result to the string expected by submit_tool_outputs."""
+        if isinstance(output, str):
+            return output
+        return json.dumps(output, default=str)
+
+    @staticmethod
+    def _format_tool_error(message: str) -> str:
+        """Builds the JSON error output submitted for a failed tool call."""
+        return json.dumps({"error": message})
+
     def _call_function(self, func_name: str, args: Dict):
         """
         Calls the actual function when invoked in _handle_tool_call.
 
+        If a tool cache is configured and the function has a declared TTL, the result is served from the cache.
+        Concurrent calls with the same name and arguments are coalesced into a single execution.
+
         Args:
             func_name: The name of the function to call.
             args: Arguments for the function.
@@ -249,7 +668,15 @@ class AssistantManager:
             logger.debug(f"Calling function '{func_name}' with arguments: {args}")
             func = self.func_mapping.get(func_name)
             if func:
-                result = func(**args)
+                def execute():
+                    if self.singleflight is not None:
+                        return self.singleflight.do(canonical_call_key(func_name, args), lambda: func(**args))
+                    return func(**args)
+
+                if self.tool_cache is not None:
+                    result = self.tool_cache.get_or_call(func_name, args, execute)
+                else:
+                    result = execute()
                 logger.debug(f"Function '{func_name}' returned: {result}")
                 return result
             else:
@@ -262,51 +689,383 @@ class AssistantManager:
         """
         Retrieve all messages from a specified thread.
 
+        When a message store is configured, only messages newer than the last mirrored one are downloaded and a lazy
+        ThreadHistory over the local mirror is returned instead.
+
         Args:
             thread_id (str): The ID of the thread.
 
         Returns:
-            List[Message]: A list of messages from the thread.
+            List[Message]: A list of messages from the thread, newest first.
 
         Raises:
             OpenAIError: If the API call fails.
         """
         try:
-            messages = self.client.beta.threads.messages.list(thread_id)
-            return messages
+            with self.tracer.span("message.retrieve", thread_id=thread_id):
+                if self.message_store is not None:
+                    self.message_store.sync(self.client, thread_id)
+                    return self.message_store.history(thread_id)
+                messages = self.client.beta.threads.messages.list(thread_id)
+                return messages
         except OpenAIError as e:
             logger.error(f"Failed to retrieve messages from thread {thread_id}: {e}")
             raise
 
+    def _stream_run(self, thread_id, instructions, parent_span=None, deadline=None, started=None, journal_key=None,
+                    tools_used=None):
+        """
+        Start a streamed run and consume its event stream.
+
+        Text deltas are yielded as they arrive. 'requires_action' events are handled inline: the tool calls are
+        executed and their outputs submitted on a new stream, which is then consumed in turn. The deadline is checked
+        on every event and bounds the wait for the next one; once it passes, the run is cancelled and RunTimeout is
+        raised with the text streamed so far.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            instructions (str): Instructions for the assistant.
+            parent_span (Span | None): Span of the request, which has already ended when the stream is consumed.
+            deadline (float | None): Absolute time.monotonic() deadline of the request, which has also left its
+                context by then. If None, the stream is consumed without a deadline.
+            started (float | None): time.monotonic() at the start of the request, for the elapsed time of a RunTimeout.
+            journal_key (str | None): Key of the request in the run journal, or None if it is not journaled.
+            tools_used (set | None): Receives the names of the tools the run calls, for the answer cache.
+
+        Returns:
+            Generator yielding text deltas and returning the final assistant Message.
+
+        Raises:
+            OpenAIError: If the API call fails.
+            RunTimeout: If the deadline passes before the run completes.
+        """
+        started = time.monotonic() if started is None else started
+        final_message = None
+        first_token_recorded = False
+        run_id = None
+        chunks = []
+        # The deadline is set around each step rather than around the whole generator, so it never leaks into the
+        # consumer's context between two deltas
+        try:
+            with deadline_scope(deadline):
+                if self.sync_definition:
+                    self.sync_assistant(instructions)
+                with self.tracer.span("run.create", parent=parent_span, thread_id=thread_id):
+                    stream = self.client.beta.threads.runs.create(
+                        thread_id=thread_id,
+                        assistant_id=self.assistant_id,
+                        stream=True,
+                        **self._run_parameters(instructions),
+                        **self._stream_timeout()
+                    )
+            while stream is not None:
+                pending_run = None
+                with self.tracer.span("run.stream", parent=parent_span, thread_id=thread_id) as span:
+                    with stream:
+                        events = iter(stream)
+                        while pending_run is None:
+                            with deadline_scope(deadline):
+                                event = next(events, None)
+                                if event is None:
+                                    break
+                                self._record_stream_event(event, span, journal_key)
+                                if event.event == "thread.run.created":
+                                    run_id = event.data.id
+                                elif event.event == "thread.message.completed":
+                                    final_message = event.data
+                                elif event.event == "thread.run.requires_action":
+                                    pending_run = event.data
+                                expired = remaining_time() == 0
+                            for chunk in extract_text_deltas(event):
+                                if not first_token_recorded and parent_span is not None:
+                                    self._record_first_token(parent_span, span, thread_id)
+                                    first_token_recorded = True
+                                chunks.append(chunk)
+                                yield chunk
+                            if expired:
+                                break
+
+                with deadline_scope(deadline):
+                    if remaining_time() == 0 and (pending_run is not None or final_message is None):
+                        raise self._abort_run(thread_id, run_id, started, partial_text="".join(chunks),
+                                              journal_key=journal_key)
+                    stream = None
+                    if pending_run is not None:
+                        required_actions = self._required_actions(pending_run, tools_used)
+                        with self.tracer.span("tool.dispatch", parent=parent_span, thread_id=thread_id,
+                                              run_id=pending_run.id):
+                            tool_outputs = self._handle_tool_call(required_actions)
+                        logger.debug(f"Tool outputs: {tool_outputs}")
+                        if remaining_time() == 0:
+                            raise self._abort_run(thread_id, run_id, started, partial_text="".join(chunks),
+                                                  journal_key=journal_key)
+                        if journal_key is not None:
+                            self.run_journal.submitting(journal_key, tool_outputs)
+                        with self.tracer.span("run.submit_tool_outputs", parent=parent_span, thread_id=thread_id,
+                                              run_id=pending_run.id):
+                            stream = self.client.beta.threads.runs.submit_tool_outputs(
+                                thread_id=thread_id,
+                                run_id=pending_run.id,
+                                tool_outputs=tool_outputs,
+                                stream=True,
+                                **self._stream_timeout()
+                            )
+                        if journal_key is not None:
+                            self.run_journal.submitted(journal_key, [output["tool_call_id"] for output in tool_outputs])
+        except (OpenAIError, httpx.TimeoutException) as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                # The wait for the next event was cut at the deadline
+                raise self._abort_run(thread_id, run_id, started, partial_text="".join(chunks),
+                                      journal_key=journal_key) from e
+            logger.error(f"Error while streaming run on thread {thread_id}: {e}")
+            raise
+        return final_message
+
+    def _record_stream_event(self, event, span, journal_key):
+        """Records the lifecycle events of a streamed run on its span and in the run journal."""
+        if event.event == "thread.run.created":
+            span.set_attribute("run_id", event.data.id)
+            if journal_key is not None:
+                self.run_journal.run_created(journal_key, event.data.id)
+        elif event.event == "thread.run.completed":
+            if event.data.usage is not None:
+                span.set_attribute("usage", event.data.usage.model_dump())
+            if journal_key is not None:
+                self.run_journal.finish(journal_key)
+        elif event.event in TERMINAL_RUN_EVENTS:
+            logger.warning(f"Run {event.data.id} ended with status: {event.data.status}")
+            if journal_key is not None:
+                self.run_journal.finish(journal_key, event.data.status)
+
+    def _record_first_token(self, parent_span, span, thread_id):
+        self.tracer.record("run.time_to_first_token", time.time() - parent_span.start_time, parent=parent_span,
+                           thread_id=thread_id, run_id=span.attributes.get("run_id"))
+
+    @staticmethod
+    def _stream_timeout() -> Dict:
+        """Request options bounding the wait for the next stream event by the time left before the deadline."""
+        remaining = remaining_time()
+        return {} if remaining is None else {"timeout": max(remaining, 0.001)}
+
     def get_assistant_response(self, instructions, user_message, file_ids=None, thread_id=None, check_interval=5,
-                               max_wait_time=None):
+                               max_wait_time=None, stream=False, use_cache=True, request_id=None):
         """
         Send a message, run the assistant, and retrieve the response.
 
+        With a run journal, each step is journaled before it is taken. A request retried with the same request_id
+        after a crash carries on from the last journaled step: it reattaches to the run already created and returns
+        its result instead of running the assistant again.
+
         Args:
             instructions (str): Instructions for the assistant.
             user_message (str): The user's message to add to the thread.
             file_ids (List[str] | None): A list of File IDs that the message should use.
-            thread_id (str | None): The ID of the thread. If None, a new thread is created.
+            thread_id (str | None): The ID of the thread. If None, a thread is taken from the thread pool, or a new
+                thread is created when there is no pool.
             check_interval (int): Time in seconds to wait between status checks. Default is 5 seconds.
-            max_wait_time (float | None): Maximum time in seconds to wait for the run to complete. If None, wait indefinitely.
+            max_wait_time (float | None): End-to-end deadline of the request in seconds, from adding the message to the
+                final reply, tool calls included. If None, the manager's run_deadline applies.
+            stream (bool): If True, consume the run event stream instead of polling the run status.
+            use_cache (bool): If False, the answer cache is neither read nor written for this request. Only
+                single-shot requests, without a thread_id, use the answer cache.
+            request_id (str | None): Idempotency key of the request in the run journal. If None, a random key is used,
+                so the run can still be finished by `resume_runs` but a retry starts over.
 
         Returns:
             List of Messages: The list of messages after the assistant has completed the run.
+            ResponseStream: When streaming, an iterable of text deltas whose `message` is the final reply.
+            CachedResponse: A cached answer to a request without a thread_id, when not streaming and the answer cache
+                has one. No thread is created for it.
 
         Raises:
             OpenAIError: If any step in the process fails.
+            RunTimeout: If the deadline passes first. The run has been cancelled and the exception carries the text
+                it produced so far. When streaming, it is raised while iterating the ResponseStream.
         """
+        started = time.monotonic()
+        budget = self.run_deadline if max_wait_time is None else max_wait_time
         try:
-            if thread_id is None:
-                thread = self.create_thread()
-                thread_id = thread.id
+            with request_deadline(budget), \
+                    self.tracer.span("assistant.response", thread_id=thread_id, stream=stream) as span:
+                journal_key, entry = self._journal_entry(request_id)
+                if self._resumable(entry):
+                    span.set_attribute("resumed", True)
+                    return self._resume_run(entry, check_interval, started, stream)
+                thread_id, message_added = self._restart_point(entry, thread_id)
+
+                cache_key = self._answer_cache_key(instructions, user_message, file_ids, thread_id) \
+                    if use_cache else None
+                tools_used = None
+                if cache_key is not None:
+                    cached = self._cached_answer(cache_key)
+                    span.set_attribute("cached", cached is not None)
+                    if cached is not None:
+                        return self._cached_response(cached, stream)
+                    snapshot = self.answer_cache.snapshot(self.func_mapping)
+                    tools_used = set()
 
-            self._add_message_to_thread(thread_id=thread_id, role="user", content=user_message, file_ids=file_ids)
-            run = self._run_assistant(thread_id=thread_id, instructions=instructions)
+                if thread_id is None:
+                    if self.thread_pool is not None:
+                        thread_id = self.thread_pool.acquire()
+                    else:
+                        thread = self.create_thread()
+                        thread_id = thread.id
+                    span.set_attribute("thread_id", thread_id)
+                elif self.thread_pool is not None:
+                    self.thread_pool.touch(thread_id)
 
-            return self._wait_for_run_completion(thread_id=thread_id, run_id=run.id, check_interval=check_interval,
-                                                 max_wait_time=max_wait_time)
+                if not message_added:
+                    if journal_key is not None:
+                        self.run_journal.begin(journal_key, thread_id)
+                    self._add_message_to_thread(thread_id=thread_id, role="user", content=user_message,
+                                                file_ids=file_ids)
+                    if journal_key is not None:
+                        self.run_journal.message_added(journal_key)
+                if stream:
+                    events = self._stream_run(thread_id=thread_id, instructions=instructions, parent_span=span,
+                                              deadline=current_deadline(), started=started, journal_key=journal_key,
+                                              tools_used=tools_used)
+                    if cache_key is not None:
+                        events = self._caching_stream(events, cache_key, snapshot, tools_used)
+                    return ResponseStream(events)
+                run = self._run_assistant(thread_id=thread_id, instructions=instructions)
+                span.set_attribute("run_id", run.id)
+                if journal_key is not None:
+                    self.run_journal.run_created(journal_key, run.id)
+
+                messages = self._wait_for_run_completion(thread_id=thread_id, run_id=run.id,
+                                                         check_interval=check_interval, max_wait_time=None,
+                                                         started=started, journal_key=journal_key,
+                                                         tools_used=tools_used)
+                if cache_key is not None and messages is not None and len(messages.data) > 0:
+                    self._store_answer(cache_key, snapshot, tools_used, messages.data[0], run.id)
+                return messages
         except OpenAIError as e:
+            if budget is not None and time.monotonic() - started >= budget:
+                # The deadline passed before the run was created
+                raise RunTimeout(f"Request on thread {thread_id} exceeded its deadline after {budget} seconds",
+                                 thread_id=thread_id, elapsed=time.monotonic() - started) from e
             logger.error(f"Failed to get assistant response: {e}")
             raise
+
+    def _journal_entry(self, request_id):
+        """The journal key of a request and the entry left by an earlier attempt, if any."""
+        if self.run_journal is None:
+            return None, None
+        if request_id is None:
+            return uuid.uuid4().hex, None
+        return request_id, self.run_journal.get(request_id)
+
+    @staticmethod
+    def _resumable(entry) -> bool:
+        """Whether a journal entry has a run to reattach to, either still in flight or completed."""
+        return entry is not None and entry["run_id"] is not None and \
+            (entry["phase"] == COMPLETED or entry["phase"] not in FINISHED_PHASES)
+
+    @staticmethod
+    def _restart_point(entry, thread_id):
+        """
+        The thread of a request and whether its message was already added. An earlier attempt that stopped before
+        creating its run is carried on with its own thread.
+        """
+        if entry is not None and entry["phase"] in (STARTED, MESSAGE_ADDED):
+            return entry["thread_id"], entry["phase"] == MESSAGE_ADDED
+        return thread_id, False
+
+    def _resume_run(self, entry, check_interval, started, stream):
+        """Returns the result of a journaled run, waiting for it to complete if it had not finished."""
+        thread_id, run_id = entry["thread_id"], entry["run_id"]
+        if entry["phase"] == COMPLETED:
+            logger.info(f"Request {entry['key']} already completed with run {run_id}")
+            messages = self._retrieve_thread_messages(thread_id)
+        else:
+            logger.info(f"Reattaching request {entry['key']} to run {run_id} on thread {thread_id}")
+            messages = self._wait_for_run_completion(run_id, thread_id, check_interval=check_interval,
+                                                     max_wait_time=None, started=started, journal_key=entry["key"])
+        if stream:
+            message = messages.data[0] if messages is not None and len(messages.data) > 0 else None
+            return ResponseStream(self._replay_answer(message))
+        return messages
+
+    def resume_runs(self, check_interval=3, max_wait_time=None) -> Dict[str, object]:
+        """
+        Reattaches to the runs a previous process left unfinished in the run journal and waits for them to complete.
+
+        Journaled tool outputs the runs are still waiting for are submitted, and new tool calls are executed as usual.
+        Requests whose run was never created are left for a retry with the same request_id.
+
+        Args:
+            check_interval (float): Upper bound in seconds on the time between status checks.
+            max_wait_time (float | None): Deadline in seconds of each run. If None, the manager's run_deadline applies.
+
+        Returns:
+            Dict[str, object]: The messages of each resumed request by journal key, or the exception it raised.
+        """
+        results = {}
+        if self.run_journal is None:
+            return results
+        budget = self.run_deadline if max_wait_time is None else max_wait_time
+        for entry in self.run_journal.unfinished():
+            started = time.monotonic()
+            try:
+                with request_deadline(budget), self.tracer.span("run.resume", thread_id=entry["thread_id"],
+                                                                run_id=entry["run_id"]):
+                    results[entry["key"]] = self._resume_run(entry, check_interval, started, stream=False)
+            except (OpenAIError, RunTimeout) as e:
+                self._resume_failed(entry, e)
+                results[entry["key"]] = e
+        return results
+
+    def _resume_failed(self, entry, error):
+        logger.error(f"Failed to resume run {entry['run_id']} of request {entry['key']}: {error}")
+        if getattr(error, "status_code", None) == 404:
+            # The run or its thread no longer exists on the server
+            self.run_journal.finish(entry["key"], "expired")
+
+    def _answer_cache_key(self, instructions, user_message, file_ids, thread_id) -> Optional[str]:
+        """
+        Key of the request in the answer cache, or None if it cannot be answered from the cache.
+
+        Answers do not depend on the conversation history and a cached one is never added to a thread, so requests on
+        an existing thread always run the assistant.
+        """
+        if self.answer_cache is None or file_ids or thread_id is not None:
+            return None
+        return self.answer_cache.key(user_message, self.definition_fingerprint(instructions))
+
+    def _cached_answer(self, cache_key) -> Optional[Message]:
+        """The cached answer to a request, or None. Entries that no longer parse as a Message are discarded."""
+        cached = self.answer_cache.get(cache_key)
+        if cached is None:
+            return None
+        try:
+            return Message.model_validate(cached)
+        except ValueError as e:
+            logger.warning(f"Discarding unreadable answer cache entry: {e}")
+            self.answer_cache.discard(cache_key)
+            return None
+
+    def _cached_response(self, message, stream):
+        logger.debug(f"Answered from the answer cache with message {message.id}")
+        if stream:
+            return ResponseStream(self._replay_answer(message))
+        return CachedResponse(message)
+
+    @staticmethod
+    def _replay_answer(message):
+        # A ResponseStream over a cached answer: its whole text as a single delta
+        text = message_text(message) if message is not None else ""
+        if text:
+            yield text
+        return message
+
+    def _caching_stream(self, events, cache_key, snapshot, tools_used):
+        message = yield from events
+        self._store_answer(cache_key, snapshot, tools_used, message)
+        return message
+
+    def _store_answer(self, cache_key, snapshot, tools_used, message, run_id=None):
+        """Stores the final assistant message of a run in the answer cache, with the tools the run called."""
+        if message is None or message.role != "assistant" or (run_id is not None and message.run_id != run_id):
+            return
+        self.answer_cache.put(cache_key, message.model_dump(mode="json"), snapshot, tools_used)
@@ -0,0 +1,709 @@
+import asyncio
+import contextvars
+import inspect
+import logging
+import time
+from typing import Optional, Callable, List, Dict
+import httpx
+from openai import AsyncOpenAI, OpenAIError
+from core.answer_cache import CachedResponse
+from core.assistant import AssistantManager
+from core.deadline import (CANCEL_GRACE_PERIOD, RunTimeout, cap_timeout, current_deadline, deadline_scope,
+                           remaining_time, request_deadline)
+from core.poller import AsyncRunPoller
+from core.run_journal import COMPLETED
+from core.streaming import AsyncResponseStream, extract_text_deltas, message_text
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAssistantManager(AssistantManager):
+    """
+    Asyncio counterpart of AssistantManager built on AsyncOpenAI.
+
+    Every API call is awaited instead of blocking, so many runs can be in flight on a single event loop.
+    Synchronous tool functions are offloaded to a thread pool executor; coroutine functions are awaited directly.
+    """
+    client_class = AsyncOpenAI
+    run_poller_class = AsyncRunPoller
+
+    def __init__(self, api_key, assistant_id, model="gpt-4-1106-preview", functions: Optional[List[Callable]] = None,
+                 max_tool_workers=8, tool_timeouts: Optional[Dict[str, float]] = None, default_tool_timeout=60,
+                 run_poller=None, tool_cache=None, coalesce_tool_calls=True, message_store=None,
+                 sync_definition=False, tracer=None, base_url=None, scheduler=None, output_budget=None,
+                 http_client=None, run_deadline=None, answer_cache=None, run_journal=None):
+        """
+        Initialize the AsyncAssistantManager with the necessary OpenAI parameters.
+
+        Args:
+            api_key (str): API key for OpenAI.
+            assistant_id (str): Identifier for the specific assistant.
+            model (str): The model version to be used, default is 'gpt-4-1106-preview'.
+            functions (List[Callable] | None): Functions exposed to the assistant as tools.
+            max_tool_workers (int): Size of the executor running synchronous tool functions. Default is 8.
+            tool_timeouts (Dict[str, float] | None): Per-function timeouts in seconds, keyed by function name.
+            default_tool_timeout (float | None): Timeout in seconds for functions without an entry in tool_timeouts.
+                If None, wait indefinitely. Default is 60 seconds.
+            run_poller (AsyncRunPoller | None): Poller shared with other managers. If None, a dedicated one is created.
+            tool_cache (ToolResultCache | None): Cache for the results of functions with a declared TTL.
+            coalesce_tool_calls (bool): If True, identical tool calls in flight at the same time share one execution.
+            message_store (MessageStore | None): Local mirror of thread messages, synced incrementally after each run.
+            sync_definition (bool): If True, the model, instructions and tools are written to the remote assistant
+                once (only when their fingerprint changed) and runs are created without per-run overrides.
+            tracer (Tracer | None): Records a span per request phase and tool call. If None, a tracer without
+                exporters is used.
+            base_url (str | None): Base URL of the API, e.g. a local fake server for benchmarks. If None, the
+                client default (or OPENAI_BASE_URL) is used.
+            scheduler (RequestScheduler | None): Admission control shared by all API calls of the client: rate-limit
+                budgets, priorities and retries within the caller's deadline. If None, the SDK's own retries apply.
+            output_budget (ToolOutputBudget | None): Compacts tool outputs and cuts them to a per-tool size budget.
+            http_client (HttpClient | None): Shared HTTP layer. Its pool is synchronous, so the async OpenAI client
+                keeps its own connections; the argument is accepted for symmetry with AssistantManager.
+            run_deadline (float | None): End-to-end deadline in seconds of requests made without a max_wait_time. If
+                None, such requests wait indefinitely.
+            answer_cache (AnswerCache | None): Serves repeated questions from earlier answers without any API call.
+            run_journal (RunJournal | None): Write-ahead journal of in-flight runs, so a request retried after a crash
+                (or `resume_runs` on restart) reattaches to its run instead of creating a new one.
+
+        Raises:
+            ValueError: If any required parameters are missing or invalid.
+        """
+        super().__init__(api_key=api_key, assistant_id=assistant_id, model=model, functions=functions,
+                         max_tool_workers=max_tool_workers, tool_timeouts=tool_timeouts,
+                         default_tool_timeout=default_tool_timeout, run_poller=run_poller,
+                         tool_cache=tool_cache, coalesce_tool_calls=coalesce_tool_calls,
+                         message_store=message_store, sync_definition=sync_definition,
+                         tracer=tracer, base_url=base_url, scheduler=scheduler,
+                         output_budget=output_budget, http_client=http_client, run_deadline=run_deadline,
+                         answer_cache=answer_cache, run_journal=run_journal)
+        # Tasks of the event loop starting runs at the same time sync the definition once
+        self._sync_lock = asyncio.Lock()
+
+    @staticmethod
+    def _scheduled_http_client(scheduler, http_client=None):
+        # The shared pool of an HttpClient is synchronous; the async client keeps its own connections
+        return scheduler.async_http_client()
+
+    @staticmethod
+    def _pooled_http_client(http_client):
+        return None
+
+    async def sync_assistant(self, instructions):
+        """
+        Make the remote assistant match the local model, instructions and tools.
+
+        Args:
+            instructions (str): Instructions for the assistant.
+
+        Returns:
+            bool: True if the remote assistant was updated.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        async with self._sync_lock:
+            if self._definition_synced:
+                return False
+            try:
+                assistant = await self.client.beta.assistants.retrieve(self.assistant_id)
+                update = self._definition_update(instructions, assistant)
+                if update is not None:
+                    await self.client.beta.assistants.update(self.assistant_id, **update)
+            except OpenAIError as e:
+                logger.error(f"Failed to sync assistant {self.assistant_id}: {e}")
+                raise
+            self._synced_instructions = instructions
+            self._definition_synced = True
+            return update is not None
+
+    async def create_thread(self):
+        """
+        Create a new conversation thread.
+
+        Returns:
+            Thread: The newly created thread object.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        try:
+            with self.tracer.span("thread.create"):
+                thread = await self.client.beta.threads.create()
+            return thread
+        except OpenAIError as e:
+            logger.error(f"Failed to create thread: {e}")
+            raise
+
+    async def delete_thread(self, thread_id):
+        """
+        Delete a conversation thread.
+
+        Args:
+            thread_id (str): The ID of the thread to delete.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        try:
+            await self.client.beta.threads.delete(thread_id)
+            if self.message_store is not None:
+                self.message_store.forget(thread_id)
+        except OpenAIError as e:
+            logger.error(f"Failed to delete thread {thread_id}: {e}")
+            raise
+
+    async def _add_message_to_thread(self, thread_id, role, content, file_ids=None):
+        """
+        Add a message to a specified thread.
+
+        Args:
+            thread_id (str): The ID of the thread to create a message for.
+            role (str): The role of the entity that is creating the message. Currently only user is supported.
+            content (str): The content of the message.
+            file_ids (List[str] | None): A list of File IDs that the message should use.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        if file_ids is None:
+            file_ids = []
+        try:
+            with self.tracer.span("message.create", thread_id=thread_id):
+                await self.client.beta.threads.messages.create(
+                    thread_id=thread_id,
+                    role=role,
+                    content=content,
+                    file_ids=file_ids
+                )
+        except OpenAIError as e:
+            logger.error(f"Failed to add message to thread {thread_id}: {e}")
+            raise
+
+    async def _run_assistant(self, thread_id, instructions):
+        """
+        Run the assistant on the specified thread with given instructions.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            instructions (str): Instructions for the assistant.
+
+        Returns:
+            Run: The run object initiated by the assistant.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        try:
+            if self.sync_definition:
+                await self.sync_assistant(instructions)
+            with self.tracer.span("run.create", thread_id=thread_id) as span:
+                run = await self.client.beta.threads.runs.create(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id,
+                    **self._run_parameters(instructions)
+                )
+                span.set_attribute("run_id", run.id)
+            return run
+        except OpenAIError as e:
+            logger.error(f"Failed to run assistant on thread {thread_id}: {e}")
+            raise
+
+    async def cancel_run(self, run_id, thread_id):
+        """
+        Cancel a run.
+
+        Args:
+            run_id (str): The ID of the run.
+            thread_id (str): The ID of the thread.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        try:
+            await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except OpenAIError as e:
+            logger.error(f"Failed to cancel run {run_id} on thread {thread_id}: {e}")
+            raise
+
+    async def _wait_for_run_completion(self, run_id, thread_id, check_interval=3, max_wait_time=10, started=None,
+                                       journal_key=None, tools_used=None):
+        """
+        Wait for a run to complete, using the shared run poller to track its status without blocking the event loop.
+
+        The deadline is checked on every iteration: once it passes, the run is cancelled and RunTimeout is raised with
+        the text the run produced so far.
+
+        Args:
+            run_id (str): The ID of the run.
+            thread_id (str): The ID of the thread.
+            check_interval (float): Upper bound in seconds on the time between status checks.
+            max_wait_time (int | None): Maximum time in seconds to wait for the run to complete.
+                If None, wait until the deadline of the enclosing request, or indefinitely without one.
+            started (float | None): time.monotonic() at the start of the request, for the elapsed time of a RunTimeout.
+            journal_key (str | None): Key of the request in the run journal, or None if it is not journaled.
+            tools_used (set | None): Receives the names of the tools the run calls, for the answer cache.
+
+        Returns:
+            Messages: Messages from the completed run.
+
+        Raises:
+            OpenAIError: If the API call fails.
+            RunTimeout: If the deadline passes before the run completes.
+        """
+        started = time.monotonic() if started is None else started
+        queue_wait_recorded = False
+        with request_deadline(max_wait_time):
+            while True:
+                try:
+                    remaining = remaining_time()
+                    if remaining == 0:
+                        raise await self._abort_run(thread_id, run_id, started, journal_key=journal_key)
+                    future = self.run_poller.watch(thread_id, run_id, max_interval=check_interval)
+                    with self.tracer.span("run.wait", thread_id=thread_id, run_id=run_id) as span:
+                        try:
+                            run_status = await asyncio.wait_for(asyncio.shield(future), timeout=remaining)
+                        except asyncio.TimeoutError:
+                            self.run_poller.unwatch(thread_id, run_id)
+                            span.set_attribute("status", "deadline_exceeded")
+                            run_status = None
+                        else:
+                            self._record_run_status(span, run_status)
+                    if run_status is None:
+                        raise await self._abort_run(thread_id, run_id, started, journal_key=journal_key)
+
+                    logger.debug(f"Run status: {run_status.status}")
+                    if not queue_wait_recorded:
+                        queue_wait_recorded = self._record_queue_wait(thread_id, run_id, run_status)
+
+                    if run_status.status == 'completed':
+                        messages = await self._retrieve_thread_messages(thread_id)
+                        if journal_key is not None:
+                            self.run_journal.finish(journal_key)
+                        return messages
+                    elif run_status.status == 'requires_action':
+                        required_actions = self._required_actions(run_status, tools_used)
+                        tool_outputs = self._journaled_outputs(journal_key, required_actions)
+                        if tool_outputs is None:
+                            with self.tracer.span("tool.dispatch", thread_id=thread_id, run_id=run_id):
+                                tool_outputs = await self._handle_tool_call(required_actions)
+                            logger.debug(f"Tool outputs: {tool_outputs}")
+                            if remaining_time() == 0:
+                                raise await self._abort_run(thread_id, run_id, started, journal_key=journal_key)
+                            if journal_key is not None:
+                                self.run_journal.submitting(journal_key, tool_outputs)
+
+                        # Submitting tool outputs back to the assistant
+                        with self.tracer.span("run.submit_tool_outputs", thread_id=thread_id, run_id=run_id):
+                            await self.client.beta.threads.runs.submit_tool_outputs(
+                                thread_id=thread_id,
+                                run_id=run_id,
+                                tool_outputs=tool_outputs
+                            )
+                        if journal_key is not None:
+                            self.run_journal.submitted(journal_key, [output["tool_call_id"] for output in tool_outputs])
+                    else:
+                        logger.warning(f"Run {run_id} ended with status: {run_status.status}")
+                        if journal_key is not None:
+                            self.run_journal.finish(journal_key, run_status.status)
+                        break
+                except OpenAIError as e:
+                    if remaining_time() == 0:
+                        raise await self._abort_run(thread_id, run_id, started, journal_key=journal_key) from e
+                    logger.error(f"Error while waiting for run completion: {e}")
+                    raise
+
+    async def _abort_run(self, thread_id, run_id, started, partial_text=None, journal_key=None) -> RunTimeout:
+        """Cancels a run that passed its deadline and builds the RunTimeout to raise, carrying its partial output."""
+        elapsed = self._deadline_passed(thread_id, run_id, started, journal_key)
+        cancelled = False
+        messages = []
+        with deadline_scope(time.monotonic() + CANCEL_GRACE_PERIOD), \
+                self.tracer.span("run.cancel", thread_id=thread_id, run_id=run_id) as span:
+            if run_id is not None:
+                try:
+                    await self.cancel_run(run_id, thread_id)
+                    cancelled = True
+                except (OpenAIError, httpx.HTTPError):
+                    pass
+                if partial_text is None:
+                    messages = await self._run_messages(thread_id, run_id)
+            span.set_attribute("cancelled", cancelled)
+        return self._run_timeout(thread_id, run_id, elapsed, partial_text, messages, cancelled)
+
+    async def _run_messages(self, thread_id, run_id) -> list:
+        """Assistant messages created by a run, newest first, or an empty list if they cannot be retrieved."""
+        try:
+            page = await self.client.beta.threads.messages.list(thread_id, limit=20)
+        except (OpenAIError, httpx.HTTPError) as e:
+            logger.warning(f"Failed to retrieve the partial output of run {run_id}: {e}")
+            return []
+        return self._messages_of_run(page, run_id)
+
+    async def _handle_tool_call(self, required_actions):
+        """
+        Handles tool calls made by the OpenAI Assistant.
+
+        The arguments of every call are validated first; a call with invalid arguments is not run and yields an error
+        output telling the model what to fix. The other calls run concurrently and are gathered in the order of their
+        tool_call_id. A call that fails or exceeds its timeout, cut to the time left before the request's deadline,
+        yields an error output instead of aborting the whole submission.
+
+        Args:
+            required_actions: Actions required as indicated by the OpenAI Assistant.
+
+        Returns:
+            List of tool outputs to submit back to the Assistant.
+        """
+        actions = required_actions["tool_calls"]
+        outputs = await asyncio.gather(*(self._execute_tool_call_async(action) for action in actions))
+        return [{"tool_call_id": action['id'], "output": output} for action, output in zip(actions, outputs)]
+
+    async def _execute_tool_call_async(self, action) -> str:
+        """
+        Validates a single tool call, executes it within its timeout and serializes its result.
+
+        Args:
+            action: One entry of the 'tool_calls' list in the required actions.
+
+        Returns:
+            The output string to submit, or a JSON error object if the call could not be completed.
+        """
+        arguments, error = self._validate_tool_call(action)
+        if error is not None:
+            return error
+        func_name = action['function']['name']
+        timeout = self.tool_timeouts.get(func_name, self.default_tool_timeout)
+        with self.tracer.span("tool.call", tool=func_name, tool_call_id=action['id']) as span:
+            try:
+                output = await asyncio.wait_for(self._call_function_async(func_name, arguments),
+                                                timeout=cap_timeout(timeout))
+                return self._prepare_tool_output(func_name, output, span)
+            except asyncio.TimeoutError:
+                span.error = "timeout"
+                return self._tool_timeout_output(func_name, timeout)
+            except Exception as e:
+                span.error = f"{type(e).__name__}: {e}"
+                return self._format_tool_error(f"Function {func_name} failed: {e}")
+
+    async def _call_function_async(self, func_name: str, args: Dict):
+        """
+        Calls the actual function without blocking the event loop.
+
+        Coroutine functions are awaited directly; everything else goes through _call_function on the executor.
+
+        Args:
+            func_name: The name of the function to call.
+            args: Arguments for the function.
+
+        Returns:
+            The result of the function call.
+        """
+        func = self.func_mapping.get(func_name)
+        # Callable objects such as LazyCoroutineTool declare the coroutine on their __call__
+        if inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None)):
+            try:
+                logger.debug(f"Awaiting function '{func_name}' with arguments: {args}")
+                result = await func(**args)
+                logger.debug(f"Function '{func_name}' returned: {result}")
+                return result
+            except Exception as e:
+                logger.error(f"Error in calling function {func_name} with arguments: {args}, error: {e}",
+                             exc_info=True)
+                raise
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.tool_executor, context.run, self._call_function, func_name, args)
+
+    async def _retrieve_thread_messages(self, thread_id):
+        """
+        Retrieve all messages from a specified thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            List[Message]: A list of messages from the thread.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        try:
+            with self.tracer.span("message.retrieve", thread_id=thread_id):
+                if self.message_store is not None:
+                    await self.message_store.sync_async(self.client, thread_id)
+                    return self.message_store.history(thread_id)
+                messages = await self.client.beta.threads.messages.list(thread_id)
+                return messages
+        except OpenAIError as e:
+            logger.error(f"Failed to retrieve messages from thread {thread_id}: {e}")
+            raise
+
+    async def _stream_run(self, thread_id, instructions, set_message, parent_span=None, deadline=None,
+                          started=None, journal_key=None, tools_used=None):
+        """
+        Start a streamed run and consume its event stream.
+
+        The deadline is checked on every event and bounds the wait for the next one; once it passes, the run is
+        cancelled and RunTimeout is raised with the text streamed so far.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            instructions (str): Instructions for the assistant.
+            set_message (Callable): Receives the final assistant Message once it is completed.
+            parent_span (Span | None): Span of the request, which has already ended when the stream is consumed.
+            deadline (float | None): Absolute time.monotonic() deadline of the request. If None, the stream is
+                consumed without a deadline.
+            started (float | None): time.monotonic() at the start of the request, for the elapsed time of a RunTimeout.
+            journal_key (str | None): Key of the request in the run journal, or None if it is not journaled.
+            tools_used (set | None): Receives the names of the tools the run calls, for the answer cache.
+
+        Returns:
+            Async generator yielding text deltas.
+
+        Raises:
+            OpenAIError: If the API call fails.
+            RunTimeout: If the deadline passes before the run completes.
+        """
+        started = time.monotonic() if started is None else started
+        first_token_recorded = False
+        completed = False
+        run_id = None
+        chunks = []
+        # The deadline is set around each step rather than around the whole generator, so it never leaks into the
+        # consumer's context between two deltas
+        try:
+            with deadline_scope(deadline):
+                if self.sync_definition:
+                    await self.sync_assistant(instructions)
+                with self.tracer.span("run.create", parent=parent_span, thread_id=thread_id):
+                    stream = await self.client.beta.threads.runs.create(
+                        thread_id=thread_id,
+                        assistant_id=self.assistant_id,
+                        stream=True,
+                        **self._run_parameters(instructions),
+                        **self._stream_timeout()
+                    )
+            while stream is not None:
+                pending_run = None
+                with self.tracer.span("run.stream", parent=parent_span, thread_id=thread_id) as span:
+                    async with stream:
+                        events = aiter(stream)
+                        while pending_run is None:
+                            with deadline_scope(deadline):
+                                event = await anext(events, None)
+                                if event is None:
+                                    break
+                                self._record_stream_event(event, span, journal_key)
+                                if event.event == "thread.run.created":
+                                    run_id = event.data.id
+                                elif event.event == "thread.message.completed":
+                                    completed = True
+                                    set_message(event.data)
+                                elif event.event == "thread.run.requires_action":
+                                    pending_run = event.data
+                                expired = remaining_time() == 0
+                            for chunk in extract_text_deltas(event):
+                                if not first_token_recorded and parent_span is not None:
+                                    self._record_first_token(parent_span, span, thread_id)
+                                    first_token_recorded = True
+                                chunks.append(chunk)
+                                yield chunk
+                            if expired:
+                                break
+
+                with deadline_scope(deadline):
+                    if remaining_time() == 0 and (pending_run is not None or not completed):
+                        raise await self._abort_run(thread_id, run_id, started, partial_text="".join(chunks),
+                                                    journal_key=journal_key)
+                    stream = None
+                    if pending_run is not None:
+                        required_actions = self._required_actions(pending_run, tools_used)
+                        with self.tracer.span("tool.dispatch", parent=parent_span, thread_id=thread_id,
+                                              run_id=pending_run.id):
+                            tool_outputs = await self._handle_tool_call(required_actions)
+                        logger.debug(f"Tool outputs: {tool_outputs}")
+                        if remaining_time() == 0:
+                            raise await self._abort_run(thread_id, run_id, started, partial_text="".join(chunks),
+                                                        journal_key=journal_key)
+                        if journal_key is not None:
+                            self.run_journal.submitting(journal_key, tool_outputs)
+                        with self.tracer.span("run.submit_tool_outputs", parent=parent_span, thread_id=thread_id,
+                                              run_id=pending_run.id):
+                            stream = await self.client.beta.threads.runs.submit_tool_outputs(
+                                thread_id=thread_id,
+                                run_id=pending_run.id,
+                                tool_outputs=tool_outputs,
+                                stream=True,
+                                **self._stream_timeout()
+                            )
+                        if journal_key is not None:
+                            self.run_journal.submitted(journal_key, [output["tool_call_id"] for output in tool_outputs])
+        except (OpenAIError, httpx.TimeoutException) as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                # The wait for the next event was cut at the deadline
+                raise await self._abort_run(thread_id, run_id, started, partial_text="".join(chunks),
+                                            journal_key=journal_key) from e
+            logger.error(f"Error while streaming run on thread {thread_id}: {e}")
+            raise
+
+    async def get_assistant_response(self, instructions, user_message, file_ids=None, thread_id=None,
+                                     check_interval=5, max_wait_time=None, stream=False, use_cache=True,
+                                     request_id=None):
+        """
+        Send a message, run the assistant, and retrieve the response.
+
+        With a run journal, a request retried with the same request_id after a crash reattaches to the run already
+        created and returns its result instead of running the assistant again.
+
+        Args:
+            instructions (str): Instructions for the assistant.
+            user_message (str): The user's message to add to the thread.
+            file_ids (List[str] | None): A list of File IDs that the message should use.
+            thread_id (str | None): The ID of the thread. If None, a new thread is created.
+            check_interval (int): Time in seconds to wait between status checks. Default is 5 seconds.
+            max_wait_time (float | None): End-to-end deadline of the request in seconds, from adding the message to the
+                final reply, tool calls included. If None, the manager's run_deadline applies.
+            stream (bool): If True, consume the run event stream instead of polling the run status.
+            use_cache (bool): If False, the answer cache is neither read nor written for this request. Only
+                single-shot requests, without a thread_id, use the answer cache.
+            request_id (str | None): Idempotency key of the request in the run journal. If None, a random key is used.
+
+        Returns:
+            List of Messages: The list of messages after the assistant has completed the run.
+            AsyncResponseStream: When streaming, an async iterable of text deltas whose `message` is the final reply.
+            CachedResponse: A cached answer to a request without a thread_id, when not streaming and the answer cache
+                has one.
+
+        Raises:
+            OpenAIError: If any step in the process fails.
+            RunTimeout: If the deadline passes first. The run has been cancelled and the exception carries the text
+                it produced so far. When streaming, it is raised while iterating the AsyncResponseStream.
+        """
+        started = time.monotonic()
+        budget = self.run_deadline if max_wait_time is None else max_wait_time
+        try:
+            with request_deadline(budget), \
+                    self.tracer.span("assistant.response", thread_id=thread_id, stream=stream) as span:
+                journal_key, entry = self._journal_entry(request_id)
+                if self._resumable(entry):
+                    span.set_attribute("resumed", True)
+                    return await self._resume_run(entry, check_interval, started, stream)
+                thread_id, message_added = self._restart_point(entry, thread_id)
+
+                cache_key = self._answer_cache_key(instructions, user_message, file_ids, thread_id) \
+                    if use_cache else None
+                tools_used = None
+                if cache_key is not None:
+                    cached = self._cached_answer(cache_key)
+                    span.set_attribute("cached", cached is not None)
+                    if cached is not None:
+                        return self._cached_response(cached, stream)
+                    snapshot = self.answer_cache.snapshot(self.func_mapping)
+                    tools_used = set()
+
+                if thread_id is None:
+                    thread = await self.create_thread()
+                    thread_id = thread.id
+                    span.set_attribute("thread_id", thread_id)
+
+                if not message_added:
+                    if journal_key is not None:
+                        self.run_journal.begin(journal_key, thread_id)
+                    await self._add_message_to_thread(thread_id=thread_id, role="user", content=user_message,
+                                                      file_ids=file_ids)
+                    if journal_key is not None:
+                        self.run_journal.message_added(journal_key)
+                if stream:
+                    deadline = current_deadline()
+
+                    def events(set_message):
+                        if cache_key is not None:
+                            set_message = self._caching_setter(set_message, cache_key, snapshot, tools_used)
+                        return self._stream_run(thread_id=thread_id, instructions=instructions,
+                                                set_message=set_message, parent_span=span, deadline=deadline,
+                                                started=started, journal_key=journal_key, tools_used=tools_used)
+
+                    return AsyncResponseStream(events)
+                run = await self._run_assistant(thread_id=thread_id, instructions=instructions)
+                span.set_attribute("run_id", run.id)
+                if journal_key is not None:
+                    self.run_journal.run_created(journal_key, run.id)
+
+                messages = await self._wait_for_run_completion(thread_id=thread_id, run_id=run.id,
+                                                               check_interval=check_interval, max_wait_time=None,
+                                                               started=started, journal_key=journal_key,
+                                                               tools_used=tools_used)
+                if cache_key is not None and messages is not None and len(messages.data) > 0:
+                    self._store_answer(cache_key, snapshot, tools_used, messages.data[0], run.id)
+                return messages
+        except OpenAIError as e:
+            if budget is not None and time.monotonic() - started >= budget:
+                raise RunTimeout(f"Request on thread {thread_id} exceeded its deadline after {budget} seconds",
+                                 thread_id=thread_id, elapsed=time.monotonic() - started) from e
+            logger.error(f"Failed to get assistant response: {e}")
+            raise
+
+    async def _resume_run(self, entry, check_interval, started, stream):
+        """Returns the result of a journaled run, waiting for it to complete if it had not finished."""
+        thread_id, run_id = entry["thread_id"], entry["run_id"]
+        if entry["phase"] == COMPLETED:
+            logger.info(f"Request {entry['key']} already completed with run {run_id}")
+            messages = await self._retrieve_thread_messages(thread_id)
+        else:
+            logger.info(f"Reattaching request {entry['key']} to run {run_id} on thread {thread_id}")
+            messages = await self._wait_for_run_completion(run_id, thread_id, check_interval=check_interval,
+                                                           max_wait_time=None, started=started,
+                                                           journal_key=entry["key"])
+        if stream:
+            message = messages.data[0] if messages is not None and len(messages.data) > 0 else None
+            return AsyncResponseStream(lambda set_message: self._replay_answer_async(message, set_message))
+        return messages
+
+    async def resume_runs(self, check_interval=3, max_wait_time=None) -> Dict[str, object]:
+        """
+        Reattaches to the runs a previous process left unfinished in the run journal, concurrently.
+
+        Returns:
+            Dict[str, object]: The messages of each resumed request by journal key, or the exception it raised.
+        """
+        if self.run_journal is None:
+            return {}
+        budget = self.run_deadline if max_wait_time is None else max_wait_time
+        entries = self.run_journal.unfinished()
+
+        async def resume(entry):
+            with request_deadline(budget), self.tracer.span("run.resume", thread_id=entry["thread_id"],
+                                                            run_id=entry["run_id"]):
+                return await self._resume_run(entry, check_interval, time.monotonic(), stream=False)
+
+        outcomes = await asyncio.gather(*(resume(entry) for entry in entries), return_exceptions=True)
+        for entry, outcome in zip(entries, outcomes):
+            if isinstance(outcome, Exception):
+                self._resume_failed(entry, outcome)
+        return {entry["key"]: outcome for entry, outcome in zip(entries, outcomes)}
+
+    def _cached_response(self, message, stream):
+        logger.debug(f"Answered from the answer cache with message {message.id}")
+        if stream:
+            return AsyncResponseStream(lambda set_message: self._replay_answer_async(message, set_message))
+        return CachedResponse(message)
+
+    @staticmethod
+    async def _replay_answer_async(message, set_message):
+        set_message(message)
+        text = message_text(message) if message is not None else ""
+        if text:
+            yield text
+
+    def _caching_setter(self, set_message, cache_key, snapshot, tools_used):
+        # The last completed message of a streamed run is its answer; each one replaces the previous entry
+        def set_and_store(message):
+            set_message(message)
+            self._store_answer(cache_key, snapshot, tools_used, message)
+        return set_and_store
+
+    async def close(self):
+        """Close the underlying HTTP client and shut down the tool executor."""
+        await self.run_poller.stop()
+        await self.client.close()
+        self.tool_executor.shutdown(wait=False)
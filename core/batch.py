@@ -0,0 +1,260 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Set, Tuple
+
+from core.deadline import RunTimeout
+from core.scheduler import BATCH, request_priority
+from core.streaming import message_text
+
+logger = logging.getLogger(__name__)
+
+
+class TraceCollector:
+    """
+    Span exporter keeping the spans of selected traces, so a batch item can read back its own phases and usage.
+    """
+
+    def __init__(self):
+        self._spans = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def watch(self, trace_id):
+        with self._lock:
+            self._spans.setdefault(trace_id, [])
+
+    def export(self, span):
+        with self._lock:
+            if span.trace_id in self._spans:
+                self._spans[span.trace_id].append(span)
+
+    def pop(self, trace_id) -> list:
+        with self._lock:
+            return self._spans.pop(trace_id, [])
+
+
+class BatchRunner:
+    """
+    Answers the queries of a JSONL file with bounded concurrency and appends one JSON result per line to an output
+    file as soon as each query completes.
+
+    Each input line is a JSON object with a 'query' and optionally an 'id' (copied to the result), a 'thread_id' to
+    continue an existing conversation and 'file_ids'. Other queries run on their own conversation thread, taken from
+    the manager's thread pool when it has one. Results carry the input line number, so a crashed batch resumes by
+    skipping the lines already present in the output, whatever order they completed in.
+
+    With a run journal on the manager, each query is journaled under a key derived from the input file, its line and
+    its text, so a query whose run was in flight when the batch crashed picks up that run instead of starting another.
+    """
+
+    def __init__(self, manager, instructions, concurrency=4, stream=False, check_interval=5, max_wait_time=None,
+                 delete_threads=True):
+        """
+        Args:
+            manager (AssistantManager): The manager answering the queries.
+            instructions (str): Instructions for the assistant.
+            concurrency (int): Maximum number of queries in flight. Default is 4.
+            stream (bool): If True, runs are streamed instead of polled.
+            check_interval (float): Upper bound in seconds on the time between status checks when polling.
+            max_wait_time (float | None): Deadline in seconds of each query. If None, the manager's run_deadline
+                applies. Queries past their deadline are recorded with status 'timeout' and their partial answer.
+            delete_threads (bool): If True, threads created for a query are deleted (or returned to the thread pool)
+                once it is answered. Threads given in the input are never deleted.
+        """
+        self.manager = manager
+        self.instructions = instructions
+        self.concurrency = concurrency
+        self.stream = stream
+        self.check_interval = check_interval
+        self.max_wait_time = max_wait_time
+        self.delete_threads = delete_threads
+        self._collector = TraceCollector()
+        self.manager.tracer.add_exporter(self._collector)
+        self._write_lock = threading.Lock()
+
+    def run(self, input_path, output_path, resume=True) -> Dict[str, int]:
+        """
+        Runs every query of the input file that has no result in the output file yet.
+
+        Args:
+            input_path (str): JSONL file of queries.
+            output_path (str): JSONL file the results are appended to.
+            resume (bool): If True, lines with a result in the output are skipped. If False, the output is truncated.
+
+        Returns:
+            Dict[str, int]: Number of results per status, plus 'skipped' for lines answered by a previous run.
+        """
+        completed = self.completed_lines(output_path) if resume else set()
+        input_key = hashlib.sha256(os.path.abspath(input_path).encode()).hexdigest()[:16]
+        stats = Counter(skipped=0)
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        with open(output_path, "a" if resume else "w") as output, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+
+            def on_done(future):
+                try:
+                    record = future.result()
+                    stats[record["status"]] += 1
+                finally:
+                    slots.release()
+
+            for line_number, request in self.read_requests(input_path):
+                if line_number in completed:
+                    stats["skipped"] += 1
+                    continue
+                # Queries are read lazily: wait for a free slot before reading the next line
+                slots.acquire()
+                request_id = self._request_id(input_key, line_number, request)
+                executor.submit(self._run_query, output, line_number, request, request_id).add_done_callback(on_done)
+
+        logger.info(f"Batch finished: {dict(stats)}")
+        return dict(stats)
+
+    @staticmethod
+    def read_requests(input_path) -> Iterator[Tuple[int, Dict]]:
+        """Yields the 1-based line number and parsed request of each non-blank input line."""
+        with open(input_path) as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    request = {"error": f"Invalid JSON: {e}"}
+                if not isinstance(request, dict):
+                    request = {"query": request} if isinstance(request, str) else {"error": "Expected a JSON object"}
+                yield line_number, request
+
+    @staticmethod
+    def completed_lines(output_path) -> Set[int]:
+        """
+        Returns the input line numbers that already have a result in the output file.
+
+        A partially written last line, left by a crash, is truncated so that new results start on a clean line.
+        """
+        if not os.path.exists(output_path):
+            return set()
+        completed = set()
+        valid_size = 0
+        with open(output_path, "rb+") as file:
+            for raw_line in file:
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    completed.add(json.loads(raw_line)["line"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    break
+                valid_size += len(raw_line)
+            if valid_size < file.seek(0, os.SEEK_END):
+                logger.warning(f"Truncating incomplete results at byte {valid_size} of {output_path}")
+                file.truncate(valid_size)
+        return completed
+
+    def _write(self, output, record):
+        line = json.dumps(record, default=str)
+        with self._write_lock:
+            output.write(line + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+
+    @staticmethod
+    def _request_id(input_key, line_number, request) -> str:
+        query = str(request.get("query"))
+        return f"batch:{input_key}:{line_number}:{hashlib.sha256(query.encode()).hexdigest()[:16]}"
+
+    def _journaled_thread(self, request_id):
+        """Thread of a query journaled by an earlier, interrupted batch, or None."""
+        run_journal = getattr(self.manager, "run_journal", None)
+        entry = run_journal.get(request_id) if run_journal is not None else None
+        return entry["thread_id"] if entry is not None else None
+
+    def _run_query(self, output, line_number, request, request_id=None) -> Dict:
+        """
+        Answers one query and appends its result to the output, then deletes the thread created for it.
+
+        The result is written before the thread is deleted: a crash in between leaves a thread behind instead of a
+        journaled run whose thread no longer exists.
+        """
+        record = self._answer(line_number, request, request_id)
+        self._write(output, record)
+        if self.delete_threads and request.get("thread_id") is None and record.get("thread_id") is not None:
+            self._release_thread(record["thread_id"])
+        return record
+
+    def _answer(self, line_number, request, request_id=None) -> Dict:
+        record = {"line": line_number, "id": request.get("id"), "query": request.get("query")}
+        if "error" in request or not request.get("query"):
+            record.update(status="invalid", error=request.get("error", "Missing 'query'"))
+            return record
+
+        started_at = time.time()
+        # Batch calls yield to interactive ones when the request scheduler is short of rate-limit budget
+        with request_priority(BATCH), self.manager.tracer.span("batch.item", line=line_number) as span:
+            self._collector.watch(span.trace_id)
+            thread_id = request.get("thread_id")
+            try:
+                if thread_id is None:
+                    thread_id = self._journaled_thread(request_id) or self._acquire_thread()
+                record["thread_id"] = thread_id
+                message = self._ask(thread_id, request, request_id)
+                record.update(status="completed" if message is not None else "failed", answer=message_text(message))
+            except RunTimeout as e:
+                logger.warning(f"Query on line {line_number} timed out: {e}")
+                record.update(status="timeout", error=str(e), answer=e.partial_text or None, cancelled=e.cancelled)
+            except Exception as e:
+                # One failing query must not stop the batch; the error is recorded in its result instead
+                logger.error(f"Query on line {line_number} failed: {e}")
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record.update(started_at=started_at, duration=time.time() - started_at,
+                      **self._summarize(self._collector.pop(span.trace_id)))
+        return record
+
+    def _ask(self, thread_id, request, request_id=None):
+        response = self.manager.get_assistant_response(
+            instructions=self.instructions,
+            user_message=request["query"],
+            file_ids=request.get("file_ids"),
+            thread_id=thread_id,
+            check_interval=self.check_interval,
+            max_wait_time=self.max_wait_time,
+            stream=self.stream,
+            request_id=request_id
+        )
+        if self.stream:
+            return response.until_done()
+        if response is None or len(response.data) == 0:
+            return None
+        return response.data[0]
+
+    def _acquire_thread(self):
+        if self.manager.thread_pool is not None:
+            return self.manager.thread_pool.acquire()
+        return self.manager.create_thread().id
+
+    def _release_thread(self, thread_id):
+        try:
+            if self.manager.thread_pool is not None and self.manager.thread_pool.owns(thread_id):
+                self.manager.thread_pool.release(thread_id)
+            else:
+                self.manager.delete_thread(thread_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete thread {thread_id}: {e}")
+
+    @staticmethod
+    def _summarize(spans) -> Dict:
+        """Run ID, summed token usage and seconds spent per phase, from the spans of one query."""
+        run_id = None
+        usage = Counter()
+        phases = Counter()
+        for span in spans:
+            run_id = run_id or span.attributes.get("run_id")
+            usage.update(span.attributes.get("usage") or {})
+            if span.duration is not None and span.name != "batch.item":
+                phases[span.name] += span.duration
+        return {"run_id": run_id, "usage": dict(usage) or None, "phases": dict(phases)}
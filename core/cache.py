@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def canonical_call_key(func_name: str, args: Dict) -> str:
+    """
+    Builds a stable key for a tool call from the function name and its arguments.
+
+    Arguments are serialized with sorted keys and without whitespace, so {"a": 1, "b": 2} and {"b": 2, "a": 1}
+    produce the same key.
+
+    :param func_name: The name of the called function.
+    :param args: The arguments of the call.
+    :return: The cache key.
+    """
+    return f"{func_name}:{json.dumps(args, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+def is_cacheable_result(result) -> bool:
+    """
+    Default policy deciding whether a tool result may be cached: empty results and error payloads are not.
+
+    :param result: The value returned by the tool.
+    :return: True if the result can be stored.
+    """
+    if result is None:
+        return False
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return True
+    return not (isinstance(result, dict) and "error" in result)
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU cache with per-entry expiry. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Returns the stored value, or the module-level _MISSING sentinel if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: Optional[float]):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    LRU cache stored in a SQLite file, so several worker processes on one host reuse the same entries.
+
+    Values are stored as JSON and must therefore be JSON-serializable. Caches sharing a file use different tables.
+    """
+
+    def __init__(self, path, max_entries=10000, table="tool_cache"):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ("
+                         "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so each thread keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Returns the stored value, or the module-level _MISSING sentinel if absent or expired."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return _MISSING
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return _MISSING
+            conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value, ttl: Optional[float]):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                         "VALUES (?, ?, ?, ?)", (key, json.dumps(value), now + ttl if ttl else None, now))
+            conn.execute(f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                         "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def delete(self, key: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+
+class ToolResultCache:
+    """
+    Caches tool results keyed by function name and canonicalized arguments.
+
+    Only functions with a declared TTL are cached, so tools with side effects are never served from the cache unless
+    explicitly opted in. Listeners are notified when the data of a function changes: a fresh result differing from
+    the one previously stored for the same call, or an explicit invalidation.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, backend=None,
+                 cacheable: Callable[[Any], bool] = is_cacheable_result):
+        """
+        Args:
+            ttls (Dict[str, float] | None): Time-to-live in seconds per function name.
+            backend: Storage backend. Defaults to an in-process MemoryCacheBackend.
+            cacheable (Callable): Decides whether a result may be stored. By default, errors and None are skipped.
+        """
+        self.ttls = dict(ttls or {})
+        self.backend = backend or MemoryCacheBackend()
+        self.cacheable = cacheable
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        # Digest of the result last stored per key, kept beyond the entry's expiry to detect changed data
+        self._digests = OrderedDict()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def register(self, func_name: str, ttl: float):
+        """Declares the TTL of a function, enabling caching for it."""
+        self.ttls[func_name] = ttl
+
+    def is_enabled_for(self, func_name: str) -> bool:
+        return func_name in self.ttls
+
+    def lookup(self, func_name: str, args: Dict) -> Tuple[bool, Any]:
+        """
+        Looks up a cached result.
+
+        :return: A (found, value) pair.
+        """
+        value = self.backend.get(canonical_call_key(func_name, args))
+        self._count(func_name, "misses" if value is _MISSING else "hits")
+        return (False, None) if value is _MISSING else (True, value)
+
+    def store(self, func_name: str, args: Dict, value):
+        """Stores a result if the cacheable policy accepts it."""
+        if self.cacheable(value):
+            key = canonical_call_key(func_name, args)
+            self.backend.set(key, value, self.ttls.get(func_name))
+            self._track_change(func_name, key, value)
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Registers a callback called with the function name whenever the cached data of a function changes."""
+        self._listeners.append(callback)
+
+    def _track_change(self, func_name, key, value):
+        digest = hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+        with self._stats_lock:
+            previous = self._digests.get(key)
+            self._digests[key] = digest
+            self._digests.move_to_end(key)
+            while len(self._digests) > getattr(self.backend, "max_entries", 1024):
+                self._digests.popitem(last=False)
+        if previous is not None and previous != digest:
+            self._notify(func_name)
+
+    def _notify(self, func_name):
+        logger.debug(f"Cached data of '{func_name}' changed")
+        for callback in self._listeners:
+            try:
+                callback(func_name)
+            except Exception as e:
+                logger.error(f"Tool cache listener failed: {e}")
+
+    def get_or_call(self, func_name: str, args: Dict, call: Callable[[], Any]):
+        """
+        Returns the cached result of a call, invoking `call` and caching its result on a miss.
+
+        Functions without a declared TTL bypass the cache entirely.
+        """
+        if not self.is_enabled_for(func_name):
+            return call()
+        found, value = self.lookup(func_name, args)
+        if found:
+            logger.debug(f"Tool cache hit for '{func_name}' with arguments: {args}")
+            return value
+        value = call()
+        self.store(func_name, args, value)
+        return value
+
+    def invalidate(self, func_name: str, args: Dict):
+        self.backend.delete(canonical_call_key(func_name, args))
+        self._notify(func_name)
+
+    def _count(self, func_name: str, counter: str):
+        with self._stats_lock:
+            stats = self._stats.setdefault(func_name, {"hits": 0, "misses": 0})
+            stats[counter] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit and miss counters per function, plus a 'total' entry."""
+        with self._stats_lock:
+            stats = {name: dict(counters) for name, counters in self._stats.items()}
+        stats["total"] = {
+            "hits": sum(counters["hits"] for counters in stats.values()),
+            "misses": sum(counters["misses"] for counters in stats.values()),
+        }
+        return stats
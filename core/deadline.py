@@ -0,0 +1,97 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+_request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+# Time given to cancelling a run and collecting its partial output once its deadline has passed
+CANCEL_GRACE_PERIOD = 10.0
+
+
+def current_deadline() -> Optional[float]:
+    """The absolute deadline of the current context, on the time.monotonic() clock, or None without one."""
+    return _request_deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Seconds left before the deadline of the current context, never negative, or None without a deadline.
+
+    Tool functions run in the context of the request that called them, so they can use this to cut slow work short.
+    """
+    deadline = _request_deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def cap_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Returns the smaller of timeout and the time remaining before the deadline; None means no limit."""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+@contextmanager
+def request_deadline(seconds):
+    """
+    Bounds the time the API calls and tool calls made in the enclosed block may take, e.g. `with request_deadline(30):`.
+
+    Nested deadlines never extend an enclosing one. None leaves the enclosing deadline unchanged.
+    """
+    enclosing = _request_deadline.get()
+    if seconds is None:
+        deadline = enclosing
+    else:
+        deadline = time.monotonic() + seconds
+        deadline = deadline if enclosing is None else min(enclosing, deadline)
+    with deadline_scope(deadline):
+        yield
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """
+    Sets the absolute deadline of the enclosed block, replacing the enclosing one.
+
+    Used to carry a deadline into a generator consumed after the block that computed it has exited, and to give
+    cleanup calls a grace period after the deadline has passed.
+    """
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        try:
+            _request_deadline.reset(token)
+        except ValueError:
+            # The block was resumed in another context, e.g. a generator consumed from a different thread
+            pass
+
+
+class RunTimeout(TimeoutError):
+    """
+    Raised when a request passes its deadline. The run, if one was started, has been cancelled.
+
+    Attributes:
+        thread_id (str | None): The ID of the thread.
+        run_id (str | None): The ID of the cancelled run, or None if the deadline passed before it was created.
+        elapsed (float): Seconds spent on the request.
+        partial_text (str): Assistant text produced by the run before it was cancelled; may be empty.
+        messages (List[Message]): Assistant messages the run created before it was cancelled, newest first.
+        cancelled (bool): Whether the run was cancelled successfully.
+    """
+
+    def __init__(self, message, thread_id=None, run_id=None, elapsed=0.0, partial_text="",
+                 messages: Optional[List] = None, cancelled=False):
+        super().__init__(message)
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.elapsed = elapsed
+        self.partial_text = partial_text
+        self.messages = messages or []
+        self.cancelled = cancelled
+
+    def __reduce__(self):
+        # Keeps the attributes when the exception is sent to another process
+        return (self.__class__, (str(self), self.thread_id, self.run_id, self.elapsed, self.partial_text,
+                                 self.messages, self.cancelled))
@@ -0,0 +1,202 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.deadline import remaining_time
+from core.poller import retry_after_from_headers
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (pip install httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    Retries idempotent requests answered with 429 or a transient 5xx, with jittered exponential backoff that honours
+    Retry-After, unless the backoff would outlast the caller's deadline. Connection failures are retried by the wrapped
+    transport.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, retries=2, backoff=0.5, max_backoff=8.0):
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = self.transport.handle_request(request)
+            if (response.status_code not in RETRYABLE_STATUS_CODES or request.method not in IDEMPOTENT_METHODS
+                    or attempt >= self.retries):
+                return response
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.8, 1.2)
+            delay = max(delay, min(self.max_backoff, retry_after_from_headers(response.headers)))
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                # The retry could not finish before the caller's deadline
+                return response
+            logger.debug(f"Retrying {request.method} {request.url.host} in {delay:.2f}s after "
+                         f"HTTP {response.status_code}")
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class HttpClient:
+    """
+    Process-wide HTTP layer shared by the OpenAI client and the tool connectors.
+
+    One connection pool keeps keep-alive connections per host, so repeated calls to the same API skip the TCP and TLS
+    handshakes. HTTP/2 is negotiated when the 'h2' package is installed. Tool requests get default timeouts and
+    retries of transient failures; the OpenAI client shares the pool but keeps the SDK's long timeouts and its own
+    retry policy (or the RequestScheduler's).
+    """
+
+    def __init__(self, timeout=10.0, connect_timeout=5.0, max_connections=100, max_keepalive_connections=20,
+                 keepalive_expiry=60.0, retries=2, http2: Optional[bool] = None, headers: Optional[Dict] = None):
+        """
+        Args:
+            timeout (float): Default read/write timeout of tool requests, in seconds. Default is 10 seconds.
+            connect_timeout (float): Timeout for establishing a connection, in seconds. Default is 5 seconds.
+            max_connections (int): Maximum number of open connections across all hosts. Default is 100.
+            max_keepalive_connections (int): Maximum number of idle connections kept open. Default is 20.
+            keepalive_expiry (float): Seconds an idle connection is kept open. Default is 60 seconds.
+            retries (int): Retries of failed connections and of idempotent requests answered with 429/502/503/504.
+                Default is 2.
+            http2 (bool | None): Whether to negotiate HTTP/2. If None, it is enabled when 'h2' is installed.
+            headers (Dict | None): Headers sent with every tool request, e.g. a User-Agent.
+        """
+        self.http2 = http2_available() if http2 is None else http2
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections,
+                              keepalive_expiry=keepalive_expiry)
+        self.pool = httpx.HTTPTransport(http2=self.http2, limits=limits, retries=retries)
+        self.connect_timeout = connect_timeout
+        self.client = httpx.Client(transport=RetryTransport(self.pool, retries=retries),
+                                   timeout=httpx.Timeout(timeout, connect=connect_timeout), headers=headers,
+                                   follow_redirects=True)
+
+    def get(self, url, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs) -> httpx.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def request(self, method, url, **kwargs) -> httpx.Response:
+        """
+        Sends a request with the client's defaults. Inside a `request_deadline` block, e.g. a tool call of a run with
+        a deadline, the timeouts, the client's or the caller's own, are cut to the time remaining and no request is
+        sent once the deadline has passed.
+        """
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise httpx.TimeoutException(f"Request deadline passed before {method} {url}")
+            timeout = kwargs.get("timeout", httpx.USE_CLIENT_DEFAULT)
+            timeout = self.client.timeout if timeout is httpx.USE_CLIENT_DEFAULT else httpx.Timeout(timeout)
+            kwargs["timeout"] = httpx.Timeout(
+                connect=min(timeout.connect or remaining, remaining), read=min(timeout.read or remaining, remaining),
+                write=min(timeout.write or remaining, remaining), pool=min(timeout.pool or remaining, remaining))
+        return self.client.request(method, url, **kwargs)
+
+    def shared_transport(self) -> httpx.BaseTransport:
+        """A transport over the connection pool that leaves the pool open when its client is closed."""
+        return _SharedTransport(self.pool)
+
+    def openai_http_client(self) -> httpx.Client:
+        """An httpx client for `OpenAI(http_client=...)` sharing the connection pool, with the SDK's timeouts."""
+        return httpx.Client(transport=self.shared_transport(),
+                            timeout=httpx.Timeout(600.0, connect=self.connect_timeout), follow_redirects=True)
+
+    def preconnect(self, urls: Iterable[str], wait=False) -> Optional[Dict[str, object]]:
+        """
+        Opens a keep-alive connection to each URL's host ahead of the first real request.
+
+        Args:
+            urls (Iterable[str]): URLs or base URLs; only their scheme and host are used.
+            wait (bool): If True, block until all hosts answered and return the connect times. Otherwise the
+                connections are opened in the background.
+
+        Returns:
+            Dict[str, float | str] | None: When waiting, seconds per origin, or the error message if it failed.
+        """
+        origins = sorted({f"{parts.scheme}://{parts.netloc}" for parts in map(urlsplit, urls) if parts.netloc})
+        if not wait:
+            threading.Thread(target=self.preconnect, args=(origins, True), name="http-preconnect",
+                             daemon=True).start()
+            return None
+        with ThreadPoolExecutor(max_workers=max(1, len(origins))) as executor:
+            return dict(zip(origins, executor.map(self._preconnect_origin, origins)))
+
+    def _preconnect_origin(self, origin):
+        started = time.monotonic()
+        try:
+            # Any response leaves the connection in the pool; the status code does not matter
+            with httpx.Client(transport=self.shared_transport(), timeout=self.connect_timeout) as client:
+                client.head(origin + "/")
+        except httpx.HTTPError as e:
+            logger.debug(f"Pre-connecting to {origin} failed: {e}")
+            return str(e)
+        elapsed = time.monotonic() - started
+        logger.debug(f"Pre-connected to {origin} in {elapsed:.3f}s")
+        return elapsed
+
+    def close(self):
+        self.client.close()
+
+
+class _SharedTransport(httpx.BaseTransport):
+    # Lets several httpx clients use one pool without closing it when one of them is closed
+    def __init__(self, pool: httpx.BaseTransport):
+        self.pool = pool
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.pool.handle_request(request)
+
+    def close(self):
+        pass
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Returns the shared HttpClient, creating one with default settings on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def set_http_client(client: HttpClient):
+    """Replaces the shared HttpClient, e.g. with one built from the application config."""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
@@ -0,0 +1,362 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from core.deadline import RunTimeout
+from core.streaming import message_text
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    def __init__(self, session_id, thread_id):
+        self.session_id = session_id
+        self.thread_id = thread_id
+        self.lock = threading.Lock()  # One run at a time per thread
+        self.last_used = time.monotonic()
+
+
+class SessionRegistry:
+    """
+    Maps client session IDs to conversation threads.
+
+    A session gets its thread on first use, from the manager's thread pool when it has one. Sessions idle for longer
+    than `idle_timeout`, or the least recently used ones beyond `max_sessions`, are closed and their thread deleted.
+    Session threads are taken out of the pool's accounting: their lifetime is the session's, so they neither count
+    towards the pool's max_threads nor expire with its idle_timeout.
+    """
+
+    def __init__(self, manager, max_sessions=1000, idle_timeout=30 * 60):
+        """
+        Args:
+            manager (AssistantManager): Used to create and delete threads.
+            max_sessions (int): Maximum number of open sessions. Default is 1000.
+            idle_timeout (float | None): Seconds after which an unused session is closed. If None, sessions are only
+                closed explicitly or evicted by the cap. Default is 30 minutes.
+        """
+        self.manager = manager
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+
+    def get_or_create(self, session_id) -> Session:
+        """
+        Returns the session, creating its thread if it does not exist yet.
+
+        Raises:
+            OpenAIError: If a thread has to be created and the API call fails.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return session
+
+        # The thread is created outside the lock so new sessions do not wait on each other
+        thread_id = self._acquire_thread()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, thread_id)
+                thread_id = None
+            expired = self._expire()
+        if thread_id is not None:
+            # Another request created the session first
+            expired.append(thread_id)
+        for expired_thread_id in expired:
+            self._release_thread(expired_thread_id)
+        return session
+
+    def close(self, session_id) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._release_thread(session.thread_id)
+        return True
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._release_thread(session.thread_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            busy = sum(1 for session in self._sessions.values() if session.lock.locked())
+            return {"sessions": len(self._sessions), "busy": busy}
+
+    def _expire(self):
+        # Called with the lock held; returns the threads of the closed sessions
+        now = time.monotonic()
+        expired = []
+        for session_id, session in list(self._sessions.items()):
+            over_cap = len(self._sessions) > self.max_sessions
+            idle = self.idle_timeout is not None and now - session.last_used > self.idle_timeout
+            if not (over_cap or idle):
+                break
+            if session.lock.locked():
+                continue
+            del self._sessions[session_id]
+            expired.append(session.thread_id)
+        return expired
+
+    def _acquire_thread(self):
+        if self.manager.thread_pool is not None:
+            return self.manager.thread_pool.acquire(lease=False)
+        return self.manager.create_thread().id
+
+    def _release_thread(self, thread_id):
+        try:
+            if self.manager.thread_pool is not None:
+                self.manager.thread_pool.release(thread_id)
+            else:
+                self.manager.delete_thread(thread_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete thread {thread_id}: {e}")
+
+
+class AssistantHTTPServer:
+    """
+    HTTP front end serving many sessions from one process.
+
+    Endpoints:
+        POST /sessions/{session_id}/ask      {"message": ..., "file_ids": [...]} -> {"answer": ..., ...}, or 504
+                                             with the 'partial_text' of a run cancelled at its deadline
+        POST /sessions/{session_id}/stream   Same body; replies with Server-Sent Events ('delta', then 'done',
+                                             'timeout' or 'error')
+        DELETE /sessions/{session_id}        Closes the session and deletes its thread
+        GET /health                          Session and capacity counters
+
+    Backpressure: at most `max_concurrent_runs` runs are in flight. A request waits up to `queue_timeout` seconds for a
+    free slot, then gets 503 with a Retry-After header. A session accepts one request at a time; a second concurrent
+    request on it gets 409. Streamed deltas are written as they are produced, so a slow client slows down its own
+    stream only, and a client that stops reading for `write_timeout` seconds is disconnected.
+    """
+
+    def __init__(self, manager, instructions, host="127.0.0.1", port=8000, max_concurrent_runs=16,
+                 queue_timeout=5.0, max_sessions=1000, session_idle_timeout=30 * 60, write_timeout=30.0,
+                 max_wait_time=None):
+        """
+        Args:
+            manager (AssistantManager): The manager answering the requests.
+            instructions (str): Instructions for the assistant.
+            host (str): Interface to bind. Default is localhost.
+            port (int): Port to listen on. Default is 8000.
+            max_concurrent_runs (int): Maximum number of runs in flight. Default is 16.
+            queue_timeout (float): Seconds a request waits for a free run slot before 503. Default is 5 seconds.
+            max_sessions (int): Maximum number of open sessions. Default is 1000.
+            session_idle_timeout (float | None): Seconds after which an unused session is closed.
+            write_timeout (float): Seconds a socket write may block before the client is dropped. Default is 30.
+            max_wait_time (float | None): Deadline in seconds of each request. If None, the manager's run_deadline
+                applies.
+        """
+        self.manager = manager
+        self.instructions = instructions
+        self.sessions = SessionRegistry(manager, max_sessions=max_sessions, idle_timeout=session_idle_timeout)
+        self.max_concurrent_runs = max_concurrent_runs
+        self.queue_timeout = queue_timeout
+        self.max_wait_time = max_wait_time
+        self._run_slots = threading.BoundedSemaphore(max_concurrent_runs)
+        self._in_flight = 0
+        self._rejected = 0
+        self._counter_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class(write_timeout))
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        logger.info(f"Serving assistant on http://{self.address[0]}:{self.address[1]}")
+        self.httpd.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """Serves from a background thread."""
+        thread = threading.Thread(target=self.serve_forever, name="assistant-http", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self, close_sessions=True):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if close_sessions:
+            self.sessions.close_all()
+
+    def health(self) -> Dict:
+        with self._counter_lock:
+            capacity = {"in_flight": self._in_flight, "max_concurrent_runs": self.max_concurrent_runs,
+                        "rejected": self._rejected}
+        return {"status": "ok", **capacity, **self.sessions.stats()}
+
+    def _acquire_slot(self) -> bool:
+        if not self._run_slots.acquire(timeout=self.queue_timeout):
+            with self._counter_lock:
+                self._rejected += 1
+            return False
+        with self._counter_lock:
+            self._in_flight += 1
+        return True
+
+    def _release_slot(self):
+        with self._counter_lock:
+            self._in_flight -= 1
+        self._run_slots.release()
+
+    def _start_response(self, session, body):
+        return self.manager.get_assistant_response(
+            instructions=self.instructions,
+            user_message=body["message"],
+            file_ids=body.get("file_ids"),
+            thread_id=session.thread_id,
+            max_wait_time=self.max_wait_time,
+            stream=True
+        )
+
+    def _handler_class(self, write_timeout):
+        server = self
+
+        class AssistantRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            timeout = write_timeout
+
+            def do_GET(self):
+                if self.path.split("?")[0] == "/health":
+                    self._send_json(200, server.health())
+                else:
+                    self._send_json(404, {"error": "Not found"})
+
+            def do_DELETE(self):
+                match = re.fullmatch(r"/sessions/([\w.-]{1,128})", self.path.split("?")[0])
+                if match is None:
+                    self._send_json(404, {"error": "Not found"})
+                elif server.sessions.close(match.group(1)):
+                    self._send_json(200, {"session_id": match.group(1), "closed": True})
+                else:
+                    self._send_json(404, {"error": f"Unknown session {match.group(1)}"})
+
+            def do_POST(self):
+                match = re.fullmatch(r"/sessions/([\w.-]{1,128})/(ask|stream)", self.path.split("?")[0])
+                if match is None:
+                    self._send_json(404, {"error": "Not found"})
+                    return
+                session_id, action = match.groups()
+                body = self._read_json()
+                if body is None or not isinstance(body.get("message"), str) or not body["message"].strip():
+                    self._send_json(400, {"error": "Expected a JSON body with a non-empty 'message'"})
+                    return
+                if not server._acquire_slot():
+                    self._send_json(503, {"error": "Server is at capacity, retry later"}, {"Retry-After": "1"})
+                    return
+                try:
+                    session = server.sessions.get_or_create(session_id)
+                    if not session.lock.acquire(blocking=False):
+                        self._send_json(409, {"error": f"Session {session_id} already has a request running"})
+                        return
+                    try:
+                        if action == "ask":
+                            self._ask(session, body)
+                        else:
+                            self._stream(session, body)
+                    finally:
+                        session.last_used = time.monotonic()
+                        session.lock.release()
+                except RunTimeout as e:
+                    self._send_json(504, self._timeout_payload(session_id, e))
+                except Exception as e:
+                    logger.error(f"Request on session {session_id} failed: {e}")
+                    if not self.wfile.closed:
+                        self._send_json(502, {"error": f"{type(e).__name__}: {e}"})
+                finally:
+                    server._release_slot()
+
+            def _ask(self, session, body):
+                response = server._start_response(session, body)
+                message = response.until_done()
+                if message is None:
+                    self._send_json(502, {"error": "The run did not complete", "session_id": session.session_id})
+                    return
+                self._send_json(200, {"session_id": session.session_id, "thread_id": session.thread_id,
+                                      "message_id": message.id, "run_id": message.run_id,
+                                      "answer": message_text(message)})
+
+            def _stream(self, session, body):
+                response = server._start_response(session, body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunks = iter(response)
+                try:
+                    for chunk in chunks:
+                        self._send_event("delta", {"text": chunk})
+                    message = response.message
+                    if message is None:
+                        self._send_event("error", {"error": "The run did not complete"})
+                    else:
+                        self._send_event("done", {"session_id": session.session_id, "message_id": message.id,
+                                                  "run_id": message.run_id, "text": message_text(message)})
+                    self._write_chunk(b"")
+                except RunTimeout as e:
+                    # Caught before OSError, of which it is a subclass through TimeoutError
+                    self._send_event("timeout", self._timeout_payload(session.session_id, e))
+                    self._write_chunk(b"")
+                except OSError as e:
+                    # The client went away or stopped reading. The run is finished anyway, so the thread accepts
+                    # the session's next message.
+                    logger.info(f"Stream client of session {session.session_id} disconnected: {e}")
+                    self.close_connection = True
+                    try:
+                        for _ in chunks:
+                            pass
+                    except RunTimeout:
+                        pass
+                except Exception as e:
+                    logger.error(f"Stream on session {session.session_id} failed: {e}")
+                    self._send_event("error", {"error": f"{type(e).__name__}: {e}"})
+                    self._write_chunk(b"")
+
+            @staticmethod
+            def _timeout_payload(session_id, timeout: RunTimeout) -> Dict:
+                return {"error": str(timeout), "session_id": session_id, "run_id": timeout.run_id,
+                        "cancelled": timeout.cancelled, "partial_text": timeout.partial_text}
+
+            def _send_event(self, event, data):
+                self._write_chunk(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _read_json(self) -> Optional[Dict]:
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = json.loads(self.rfile.read(length)) if length else {}
+                except (ValueError, OSError):
+                    return None
+                return body if isinstance(body, dict) else None
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return AssistantRequestHandler
@@ -0,0 +1,218 @@
+import json
+import logging
+import sqlite3
+import threading
+from typing import Iterator, Optional
+from openai import NOT_GIVEN
+from openai.types.beta.threads import Message
+
+logger = logging.getLogger(__name__)
+
+
+class MessageStore:
+    """
+    Local SQLite mirror of thread messages.
+
+    `sync` downloads only the messages created after the last one seen for a thread, using the cursor pagination of
+    messages.list in ascending order. Reads never touch the API: the latest reply is a single indexed lookup and the
+    full history is exposed as a lazy iterator.
+    """
+
+    def __init__(self, path, page_size=100):
+        """
+        Args:
+            path (str): Path of the SQLite database file.
+            page_size (int): Number of messages requested per page when syncing. Default is 100, the API maximum.
+        """
+        self.path = path
+        self.page_size = page_size
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS messages ("
+                         "seq INTEGER PRIMARY KEY AUTOINCREMENT, thread_id TEXT NOT NULL, message_id TEXT NOT NULL, "
+                         "role TEXT NOT NULL, created_at INTEGER, payload TEXT NOT NULL, "
+                         "UNIQUE (thread_id, message_id))")
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_thread_seq ON messages (thread_id, seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_thread_role_seq ON messages (thread_id, role, seq)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so each thread keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def last_message_id(self, thread_id) -> Optional[str]:
+        """ID of the newest mirrored message of a thread, or None if nothing is mirrored yet."""
+        row = self._connect().execute(
+            "SELECT message_id FROM messages WHERE thread_id = ? ORDER BY seq DESC LIMIT 1", (thread_id,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, client, thread_id) -> int:
+        """
+        Fetches the messages of a thread created after the last mirrored one.
+
+        Args:
+            client (OpenAI): The client used to list messages.
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            int: The number of new messages stored.
+
+        Raises:
+            OpenAIError: If the API call fails.
+        """
+        after = self.last_message_id(thread_id)
+        rows = []
+        while True:
+            page = client.beta.threads.messages.list(thread_id, order="asc", limit=self.page_size,
+                                                     after=after or NOT_GIVEN)
+            rows.extend(self._rows(thread_id, page.data))
+            if not self._has_more(page):
+                break
+            after = page.data[-1].id
+        self._insert(rows)
+        logger.debug(f"Mirrored {len(rows)} new messages of thread {thread_id}")
+        return len(rows)
+
+    async def sync_async(self, client, thread_id) -> int:
+        """
+        Same as `sync`, using an AsyncOpenAI client.
+
+        Args:
+            client (AsyncOpenAI): The client used to list messages.
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            int: The number of new messages stored.
+        """
+        after = self.last_message_id(thread_id)
+        rows = []
+        while True:
+            page = await client.beta.threads.messages.list(thread_id, order="asc", limit=self.page_size,
+                                                           after=after or NOT_GIVEN)
+            rows.extend(self._rows(thread_id, page.data))
+            if not self._has_more(page):
+                break
+            after = page.data[-1].id
+        self._insert(rows)
+        logger.debug(f"Mirrored {len(rows)} new messages of thread {thread_id}")
+        return len(rows)
+
+    @staticmethod
+    def _rows(thread_id, messages):
+        return [(thread_id, message.id, message.role, message.created_at, message.model_dump_json())
+                for message in messages]
+
+    @staticmethod
+    def _has_more(page) -> bool:
+        # The SDK's own pagination ignores has_more and always requests one more, empty page after the last one
+        return bool(page.data) and getattr(page, "has_more", True) is not False
+
+    def _insert(self, rows):
+        if rows:
+            conn = self._connect()
+            with conn:
+                conn.executemany("INSERT OR IGNORE INTO messages (thread_id, message_id, role, created_at, payload) "
+                                 "VALUES (?, ?, ?, ?, ?)", rows)
+
+    def latest(self, thread_id, role=None) -> Optional[Message]:
+        """
+        Returns the newest mirrored message of a thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            role (str | None): Restrict the lookup to 'user' or 'assistant' messages.
+        """
+        if role is None:
+            row = self._connect().execute("SELECT payload FROM messages WHERE thread_id = ? ORDER BY seq DESC LIMIT 1",
+                                          (thread_id,)).fetchone()
+        else:
+            row = self._connect().execute("SELECT payload FROM messages WHERE thread_id = ? AND role = ? "
+                                          "ORDER BY seq DESC LIMIT 1", (thread_id, role)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def message_at(self, thread_id, index) -> Optional[Message]:
+        """Returns the message at a position counted from the newest (index 0)."""
+        row = self._connect().execute("SELECT payload FROM messages WHERE thread_id = ? ORDER BY seq DESC "
+                                      "LIMIT 1 OFFSET ?", (thread_id, index)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def count(self, thread_id) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM messages WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+
+    def iter_messages(self, thread_id, newest_first=True, batch_size=50) -> Iterator[Message]:
+        """
+        Lazily iterates the mirrored history of a thread, loading `batch_size` rows at a time.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            newest_first (bool): Iteration order. Default is newest first, like messages.list.
+            batch_size (int): Number of rows read per query.
+        """
+        comparison, order = ("<", "DESC") if newest_first else (">", "ASC")
+        cursor_seq = None
+        while True:
+            if cursor_seq is None:
+                rows = self._connect().execute(f"SELECT seq, payload FROM messages WHERE thread_id = ? "
+                                               f"ORDER BY seq {order} LIMIT ?", (thread_id, batch_size)).fetchall()
+            else:
+                rows = self._connect().execute(f"SELECT seq, payload FROM messages WHERE thread_id = ? "
+                                               f"AND seq {comparison} ? ORDER BY seq {order} LIMIT ?",
+                                               (thread_id, cursor_seq, batch_size)).fetchall()
+            if not rows:
+                return
+            for seq, payload in rows:
+                yield self._load(payload)
+            cursor_seq = rows[-1][0]
+
+    def history(self, thread_id) -> "ThreadHistory":
+        return ThreadHistory(self, thread_id)
+
+    def forget(self, thread_id):
+        """Removes the mirrored messages of a thread, e.g. after it was deleted."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+
+    @staticmethod
+    def _load(payload) -> Message:
+        return Message.construct(**json.loads(payload))
+
+
+class ThreadHistory:
+    """
+    Lazy, newest-first view over the mirrored messages of a thread.
+
+    Exposes `data` like the page returned by messages.list, so `history.data[0]` is the latest message, but rows are
+    only read from the store when accessed.
+    """
+
+    def __init__(self, store: MessageStore, thread_id):
+        self.store = store
+        self.thread_id = thread_id
+
+    @property
+    def data(self) -> "ThreadHistory":
+        return self
+
+    def latest(self, role=None) -> Optional[Message]:
+        return self.store.latest(self.thread_id, role=role)
+
+    def __getitem__(self, index) -> Message:
+        if not isinstance(index, int):
+            raise TypeError("ThreadHistory indices must be integers")
+        if index < 0:
+            index += len(self)
+        message = self.store.message_at(self.thread_id, index) if index >= 0 else None
+        if message is None:
+            raise IndexError("ThreadHistory index out of range")
+        return message
+
+    def __iter__(self) -> Iterator[Message]:
+        return self.store.iter_messages(self.thread_id)
+
+    def __len__(self) -> int:
+        return self.store.count(self.thread_id)
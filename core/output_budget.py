@@ -0,0 +1,173 @@
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_INLINE_WHITESPACE = re.compile(r"[^\S\n]+")
+_LINE_BREAKS = re.compile(r"\s*\n\s*")
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapses runs of spaces and tabs, drops blank lines and trims the ends."""
+    return _LINE_BREAKS.sub("\n", _INLINE_WHITESPACE.sub(" ", text)).strip()
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ToolOutputBudget:
+    """
+    Caps the size of tool outputs before they are submitted to the run, in estimated tokens.
+
+    Every output is compacted: JSON is re-serialized without indentation and whitespace inside strings is normalized.
+    Outputs still over their tool's budget are cut fairly: long strings (e.g. scraped page contents) share the budget
+    so that every result keeps an excerpt, short fields such as URLs and titles are left intact, and each excerpt ends
+    with a marker telling the model how much was cut. Lists too long to fit even with empty strings lose their last
+    items.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, default_budget: Optional[int] = None,
+                 chars_per_token=4.0):
+        """
+        Args:
+            budgets (Dict[str, int] | None): Per-function budgets in estimated tokens, keyed by function name.
+            default_budget (int | None): Budget of functions without an entry in budgets. If None, they are only
+                compacted.
+            chars_per_token (float): Characters per token used to estimate sizes. Default is 4, a good average for
+                English text.
+        """
+        self.budgets = budgets or {}
+        self.default_budget = default_budget
+        self.chars_per_token = chars_per_token
+
+    def budget_for(self, func_name) -> Optional[int]:
+        return self.budgets.get(func_name, self.default_budget)
+
+    def estimate_tokens(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token + 0.5)
+
+    def apply(self, func_name, output: str) -> Tuple[str, Dict[str, int]]:
+        """
+        Compacts a serialized tool output and cuts it down to the function's budget.
+
+        Args:
+            func_name (str): The name of the function that produced the output.
+            output (str): The serialized output.
+
+        Returns:
+            Tuple[str, Dict[str, int]]: The output to submit, and statistics: estimated tokens before and after,
+            number of excerpted strings and of dropped list items.
+        """
+        stats = {"original_tokens": self.estimate_tokens(output), "excerpted": 0, "dropped_items": 0}
+        try:
+            value = json.loads(output)
+        except ValueError:
+            value = None
+        structured = isinstance(value, (dict, list))
+        value = self._normalize(value if structured else output)
+
+        budget = self.budget_for(func_name)
+        if budget is not None:
+            max_chars = int(budget * self.chars_per_token)
+            if structured:
+                value = self._fit_structure(value, max_chars, stats)
+            elif len(value) > max_chars:
+                value = self._excerpt(value, max_chars)
+                stats["excerpted"] = 1
+
+        result = compact_json(value) if structured else value
+        stats["tokens"] = self.estimate_tokens(result)
+        if stats["tokens"] < stats["original_tokens"]:
+            logger.debug(f"Output of {func_name} reduced from {stats['original_tokens']} to {stats['tokens']} "
+                         f"estimated tokens")
+        return result, stats
+
+    def _normalize(self, value):
+        if isinstance(value, str):
+            return normalize_whitespace(value)
+        if isinstance(value, list):
+            return [self._normalize(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._normalize(item) for key, item in value.items()}
+        return value
+
+    def _fit_structure(self, value, max_chars, stats):
+        size = len(compact_json(value))
+        if size <= max_chars:
+            return value
+
+        strings = self._string_paths(value)
+        # Serialized lengths, escapes included, without the quotes
+        lengths = [len(compact_json(text)) - 2 for _, text in strings]
+        # Size of everything but the string contents, which is what remains when all strings are emptied
+        skeleton = size - sum(lengths)
+        available = max_chars - skeleton
+        if available > 0 and strings:
+            allocation = self._fair_shares(lengths, available)
+            for (path, text), length, share in zip(strings, lengths, allocation):
+                if share < length:
+                    # Shares are in serialized characters; scale back to characters of the text
+                    self._set_path(value, path, self._excerpt(text, int(share * len(text) / length)))
+                    stats["excerpted"] += 1
+            size = len(compact_json(value))
+
+        # The structure alone is too large: drop trailing items of the top-level list
+        while isinstance(value, list) and len(value) > 1 and size > max_chars:
+            value.pop()
+            stats["dropped_items"] += 1
+            size = len(compact_json(value))
+        return value
+
+    @staticmethod
+    def _fair_shares(lengths: List[int], available: int) -> List[int]:
+        """
+        Max-min fair split of `available` characters: strings shorter than an equal share keep their full length and
+        the remainder is split evenly among the longer ones.
+        """
+        shares = [0] * len(lengths)
+        remaining = available
+        pending = sorted(range(len(lengths)), key=lambda index: lengths[index])
+        while pending:
+            share = remaining // len(pending)
+            index = pending[0]
+            if lengths[index] <= share:
+                shares[index] = lengths[index]
+                remaining -= lengths[index]
+                pending.pop(0)
+            else:
+                for index in pending:
+                    shares[index] = share
+                break
+        return shares
+
+    @staticmethod
+    def _excerpt(text: str, max_chars: int) -> str:
+        """Cuts text to about max_chars at a word boundary, ending with a marker of how much was cut."""
+        marker = " [... {} more characters]"
+        keep = max(0, max_chars - len(marker.format(len(text))))
+        cut = text[:keep]
+        boundary = cut.rfind(" ")
+        if boundary > keep * 0.8:
+            cut = cut[:boundary]
+        return cut + marker.format(len(text) - len(cut))
+
+    @classmethod
+    def _string_paths(cls, value, path=()) -> List[Tuple[tuple, str]]:
+        if isinstance(value, str):
+            return [(path, value)]
+        if isinstance(value, list):
+            items = enumerate(value)
+        elif isinstance(value, dict):
+            items = value.items()
+        else:
+            return []
+        return [entry for key, item in items for entry in cls._string_paths(item, path + (key,))]
+
+    @staticmethod
+    def _set_path(value, path, new):
+        for key in path[:-1]:
+            value = value[key]
+        value[path[-1]] = new
@@ -1,7 +1,10 @@
+import enum
 import functools
 import inspect
 import re
 import logging
+import types
+import typing
 from typing import Callable, Dict, List, Optional, Any
 
 # Configure logger
@@ -22,15 +25,69 @@ class FunctionDefinitionParser:
         :param dtype: The Python data type.
         :return: Corresponding JSON schema data type as a string.
         """
-        if dtype == float:
+        if dtype == bool:
+            return "boolean"
+        elif dtype == float:
             return "number"
         elif dtype == int:
             return "integer"
         elif dtype == str:
             return "string"
+        elif dtype in (list, tuple, set, frozenset):
+            return "array"
+        elif dtype == dict:
+            return "object"
         else:
             return "string"
 
+    def get_json_schema_from_python_type(self, dtype) -> Dict[str, Any]:
+        """
+        Maps a type annotation to a JSON schema.
+
+        Supports the types of get_json_type_from_python_type plus Optional and other unions, parameterized lists and
+        dicts (List[int], dict[str, float]), Literal and Enum. Optional[X] maps to the schema of X; whether the
+        argument may be left out is decided by its default. Anything else maps to a string.
+
+        :param dtype: The type annotation.
+        :return: The JSON schema of the type.
+        """
+        origin = typing.get_origin(dtype)
+        args = typing.get_args(dtype)
+        if origin is typing.Union or (hasattr(types, "UnionType") and origin is types.UnionType):
+            options = [self.get_json_schema_from_python_type(arg) for arg in args if arg is not type(None)]
+            return options[0] if len(options) == 1 else {"anyOf": options}
+        if origin is typing.Literal:
+            return self._enum_schema(list(args))
+        if isinstance(dtype, type) and issubclass(dtype, enum.Enum):
+            return self._enum_schema([member.value for member in dtype])
+        if origin in (list, tuple, set, frozenset):
+            schema = {"type": "array"}
+            item_types = [arg for arg in args if arg is not Ellipsis]
+            if len(set(item_types)) == 1:
+                schema["items"] = self.get_json_schema_from_python_type(item_types[0])
+            return schema
+        if origin is dict:
+            schema = {"type": "object"}
+            if len(args) == 2:
+                schema["additionalProperties"] = self.get_json_schema_from_python_type(args[1])
+            return schema
+        return {"type": self.get_json_type_from_python_type(dtype)}
+
+    def _enum_schema(self, values: List[Any]) -> Dict[str, Any]:
+        value_types = {self.get_json_type_from_python_type(type(value)) for value in values}
+        schema = {"type": value_types.pop()} if len(value_types) == 1 else {}
+        schema["enum"] = values
+        return schema
+
+    @staticmethod
+    def _schema_default(value):
+        """The default of a parameter as shown in its schema, or None when it should be left out."""
+        if isinstance(value, enum.Enum):
+            return value.value
+        if isinstance(value, (str, int, float, bool)):
+            return value
+        return None
+
     @staticmethod
     def extract_param_descriptions_from_docstring(doc_str: str) -> Dict[str, Dict[str, Any]]:
         """
@@ -71,18 +128,31 @@ class FunctionDefinitionParser:
             func_doc = inspect.getdoc(func) or ""
             func_description = ''.join([line for line in func_doc.split("\n") if not line.strip().startswith(':')])
             param_details = self.extract_param_descriptions_from_docstring(func_doc)
+            annotations = argspec.annotations
+            if any(isinstance(annotation, str) for annotation in annotations.values()):
+                # Forward references and `from __future__ import annotations`
+                try:
+                    annotations = {**annotations, **typing.get_type_hints(func)}
+                except Exception as e:
+                    logger.debug(f"Cannot resolve the annotations of '{func.__name__}': {e}")
+            defaults = dict(zip(argspec.args[len(argspec.args) - len(argspec.defaults or ()):],
+                                argspec.defaults or ()))
 
-            params = {
-                param_name: {
+            params = {}
+            for param_name in argspec.args:
+                if param_name in fixed_args:
+                    continue
+                params[param_name] = {
                     "description": param_details.get(param_name, {}).get("description", ""),
-                    "type": self.get_json_type_from_python_type(argspec.annotations.get(param_name, type(None)))
+                    **self.get_json_schema_from_python_type(annotations.get(param_name, type(None)))
                 }
-                for param_name in argspec.args if param_name not in fixed_args
-            }
+                default = self._schema_default(defaults.get(param_name))
+                if default is not None:
+                    params[param_name]["default"] = default
 
-            # Parameters marked as optional in the docstring are not included in the required list
-            required_params = [p for p in argspec.args if
-                               p not in fixed_args and not param_details.get(p, {}).get("optional", False)]
+            # Parameters with a default or marked as optional in the docstring are not included in the required list
+            required_params = [p for p in argspec.args if p not in fixed_args and p not in defaults and
+                               not param_details.get(p, {}).get("optional", False)]
 
             # Remove the 'optional' key from parameter descriptions
             for param in params.values():
@@ -0,0 +1,424 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from openai import OpenAIError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "cancelling")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Optional[str]) -> float:
+    """
+    Parses the reset durations used by OpenAI rate-limit headers, e.g. '20ms', '1s' or '6m0s'.
+
+    :param value: The header value. Plain numbers are read as seconds.
+    :return: The duration in seconds, or 0 if the value is missing or malformed.
+    """
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * units[unit] for amount, unit in _DURATION_PART.findall(value))
+
+
+def retry_after_from_headers(headers) -> float:
+    """
+    Reads how long to back off from 'retry-after-ms' or 'retry-after' headers.
+
+    :param headers: Response headers of a rate-limited request.
+    :return: Delay in seconds, or 0 if the response carries no hint.
+    """
+    if headers is None:
+        return 0.0
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return 0.0
+
+
+class PollBackoff:
+    """
+    Adaptive poll interval: starts fast and grows exponentially, with jitter, while a run stays active.
+    """
+
+    def __init__(self, initial_interval=0.5, max_interval=8.0, factor=2.0, jitter=0.2):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def first(self) -> float:
+        """Interval used right after a run is created or tool outputs are submitted."""
+        return self.initial_interval
+
+    def next(self, previous: float, status: str, max_interval: Optional[float] = None) -> float:
+        """
+        Computes the interval before the next poll of a run that is still active.
+
+        :param previous: The interval used for the poll that just finished (without jitter).
+        :param status: The status the run reported.
+        :param max_interval: Optional per-run cap overriding the poller-wide one.
+        :return: The next interval, without jitter.
+        """
+        cap = min(self.max_interval, max_interval) if max_interval else self.max_interval
+        # Queued runs are waiting for capacity and back off faster than runs the model is working on
+        factor = self.factor if status == "queued" else max(1.0, self.factor ** 0.5)
+        return min(cap, max(previous, self.initial_interval) * factor)
+
+    def with_jitter(self, interval: float) -> float:
+        """Spreads polls of runs created together so they do not hit the API in lockstep."""
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class RateLimitGate:
+    """
+    Tracks the request budget reported in rate-limit headers and tells pollers when to hold off.
+    """
+
+    def __init__(self, min_remaining_requests=2):
+        self.min_remaining_requests = min_remaining_requests
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, headers):
+        """Updates the gate from the headers of a successful response."""
+        if headers is None:
+            return
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+        if remaining <= self.min_remaining_requests:
+            self.pause(parse_reset_duration(headers.get("x-ratelimit-reset-requests")))
+
+    def pause(self, delay: float):
+        """Holds off all polls for `delay` seconds."""
+        if delay <= 0:
+            return
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        logger.debug(f"Rate limit reached, pausing polls for {delay:.2f} seconds")
+
+    def wait_time(self) -> float:
+        """Seconds left before polls may resume."""
+        return max(0.0, self.paused_until - time.monotonic())
+
+
+class _WatchedRun:
+    def __init__(self, interval, max_interval, future):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.future = future
+        self.generation = 0
+
+
+class RunPoller:
+    """
+    Shared service polling the status of many runs from a single scheduler thread.
+
+    Callers register a (thread_id, run_id) pair with `watch` and receive a Future resolved with the Run object as soon
+    as the run leaves the queued/in_progress states, i.e. when it requires action or reaches a terminal status.
+    Retrieve calls are issued on a small worker pool so a slow response does not delay the other runs.
+    """
+
+    def __init__(self, client, backoff: Optional[PollBackoff] = None, rate_limit_gate: Optional[RateLimitGate] = None,
+                 max_concurrent_polls=4):
+        """
+        Args:
+            client (OpenAI): The client used to retrieve runs.
+            backoff (PollBackoff | None): Interval policy. Defaults to PollBackoff().
+            rate_limit_gate (RateLimitGate | None): Shared rate-limit state. Defaults to RateLimitGate().
+            max_concurrent_polls (int): Maximum number of retrieve calls in flight. Default is 4.
+        """
+        self.client = client
+        self.backoff = backoff or PollBackoff()
+        self.rate_limit_gate = rate_limit_gate or RateLimitGate()
+        self._runs: Dict[Tuple[str, str], _WatchedRun] = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_polls, thread_name_prefix="run-poller")
+        self._thread = None
+        self._stopped = False
+
+    def watch(self, thread_id, run_id, max_interval: Optional[float] = None) -> Future:
+        """
+        Starts polling a run, or restarts fast polling if it is already watched.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            run_id (str): The ID of the run.
+            max_interval (float | None): Upper bound on the interval between status checks of this run.
+
+        Returns:
+            Future: Resolved with the Run once it is no longer queued or in progress.
+        """
+        key = (thread_id, run_id)
+        with self._condition:
+            self._ensure_started()
+            watched = self._runs.get(key)
+            if watched is None or watched.future.done():
+                watched = _WatchedRun(self.backoff.first(), max_interval, Future())
+                self._runs[key] = watched
+            else:
+                watched.interval = self.backoff.first()
+                watched.generation += 1
+            self._push(key, watched, watched.interval)
+            return watched.future
+
+    def unwatch(self, thread_id, run_id):
+        """Stops polling a run. Its pending future, if any, is cancelled."""
+        with self._condition:
+            watched = self._runs.pop((thread_id, run_id), None)
+        if watched is not None:
+            watched.future.cancel()
+
+    def stop(self):
+        """Stops the scheduler thread and cancels all pending futures."""
+        with self._condition:
+            self._stopped = True
+            runs, self._runs = self._runs, {}
+            self._condition.notify_all()
+        for watched in runs.values():
+            watched.future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_scheduler, name="run-poller", daemon=True)
+            self._thread.start()
+
+    def _push(self, key, watched, delay):
+        heapq.heappush(self._schedule,
+                       (time.monotonic() + delay, next(self._sequence), key, watched.generation))
+        self._condition.notify()
+
+    def _run_scheduler(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                if not self._schedule:
+                    self._condition.wait()
+                    continue
+                due_at, _, key, generation = self._schedule[0]
+                delay = max(due_at - time.monotonic(), self.rate_limit_gate.wait_time())
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._schedule)
+                watched = self._runs.get(key)
+                if watched is None or watched.generation != generation:
+                    # Unwatched, or re-armed by a later watch() call with its own schedule entry
+                    continue
+            self._executor.submit(self._poll, key, watched, generation)
+
+    def _poll(self, key, watched, generation):
+        thread_id, run_id = key
+        try:
+            response = self.client.beta.threads.runs.with_raw_response.retrieve(thread_id=thread_id, run_id=run_id)
+            self.rate_limit_gate.observe(response.headers)
+            run = response.parse()
+        except RateLimitError as e:
+            self.rate_limit_gate.pause(retry_after_from_headers(e.response.headers) or watched.interval)
+            self._reschedule(key, watched, generation, watched.interval)
+            return
+        except OpenAIError as e:
+            logger.error(f"Failed to retrieve run {run_id} on thread {thread_id}: {e}")
+            self._finish(key, watched, generation, error=e)
+            return
+        except Exception as e:
+            # Anything else (a malformed response, a bug) must still resolve the waiter's future
+            logger.error(f"Unexpected error while polling run {run_id} on thread {thread_id}: {e}", exc_info=True)
+            self._finish(key, watched, generation, error=e)
+            return
+
+        logger.debug(f"Run {run_id} status: {run.status}")
+        if run.status in ACTIVE_RUN_STATUSES:
+            watched.interval = self.backoff.next(watched.interval, run.status, watched.max_interval)
+            self._reschedule(key, watched, generation, self.backoff.with_jitter(watched.interval))
+        else:
+            self._finish(key, watched, generation, result=run)
+
+    def _reschedule(self, key, watched, generation, delay):
+        with self._condition:
+            if self._runs.get(key) is watched and watched.generation == generation:
+                self._push(key, watched, delay)
+
+    def _finish(self, key, watched, generation, result=None, error=None):
+        with self._condition:
+            if self._runs.get(key) is not watched or watched.generation != generation:
+                return
+            del self._runs[key]
+        if watched.future.done():
+            return
+        if error is not None:
+            watched.future.set_exception(error)
+        else:
+            watched.future.set_result(result)
+
+
+class AsyncRunPoller:
+    """
+    Asyncio counterpart of RunPoller: one task polls every watched run through an AsyncOpenAI client.
+    """
+
+    def __init__(self, client, backoff: Optional[PollBackoff] = None, rate_limit_gate: Optional[RateLimitGate] = None,
+                 max_concurrent_polls=16):
+        """
+        Args:
+            client (AsyncOpenAI): The client used to retrieve runs.
+            backoff (PollBackoff | None): Interval policy. Defaults to PollBackoff().
+            rate_limit_gate (RateLimitGate | None): Shared rate-limit state. Defaults to RateLimitGate().
+            max_concurrent_polls (int): Maximum number of retrieve calls in flight. Default is 16.
+        """
+        self.client = client
+        self.backoff = backoff or PollBackoff()
+        self.rate_limit_gate = rate_limit_gate or RateLimitGate()
+        self.max_concurrent_polls = max_concurrent_polls
+        self._runs: Dict[Tuple[str, str], _WatchedRun] = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._wakeup = None
+        self._semaphore = None
+        self._task = None
+        # The event loop only keeps weak references to tasks, so the poll tasks in flight are held here
+        self._poll_tasks = set()
+
+    def watch(self, thread_id, run_id, max_interval: Optional[float] = None) -> asyncio.Future:
+        """
+        Starts polling a run, or restarts fast polling if it is already watched.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            run_id (str): The ID of the run.
+            max_interval (float | None): Upper bound on the interval between status checks of this run.
+
+        Returns:
+            asyncio.Future: Resolved with the Run once it is no longer queued or in progress.
+        """
+        self._ensure_started()
+        key = (thread_id, run_id)
+        watched = self._runs.get(key)
+        if watched is None or watched.future.done():
+            watched = _WatchedRun(self.backoff.first(), max_interval, asyncio.get_running_loop().create_future())
+            self._runs[key] = watched
+        else:
+            watched.interval = self.backoff.first()
+            watched.generation += 1
+        self._push(key, watched, watched.interval)
+        return watched.future
+
+    def unwatch(self, thread_id, run_id):
+        """Stops polling a run. Its pending future, if any, is cancelled."""
+        watched = self._runs.pop((thread_id, run_id), None)
+        if watched is not None:
+            watched.future.cancel()
+
+    async def stop(self):
+        """Stops the polling task and the polls in flight, and cancels all pending futures."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        tasks, self._poll_tasks = self._poll_tasks, set()
+        for task in tasks:
+            task.cancel()
+        runs, self._runs = self._runs, {}
+        for watched in runs.values():
+            watched.future.cancel()
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_polls)
+            self._task = asyncio.get_running_loop().create_task(self._run_scheduler())
+
+    def _push(self, key, watched, delay):
+        heapq.heappush(self._schedule,
+                       (time.monotonic() + delay, next(self._sequence), key, watched.generation))
+        self._wakeup.set()
+
+    async def _run_scheduler(self):
+        while True:
+            self._wakeup.clear()
+            if not self._schedule:
+                await self._wakeup.wait()
+                continue
+            due_at, _, key, generation = self._schedule[0]
+            delay = max(due_at - time.monotonic(), self.rate_limit_gate.wait_time())
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._schedule)
+            watched = self._runs.get(key)
+            if watched is not None and watched.generation == generation:
+                task = asyncio.get_running_loop().create_task(self._poll(key, watched, generation))
+                self._poll_tasks.add(task)
+                task.add_done_callback(self._poll_tasks.discard)
+
+    async def _poll(self, key, watched, generation):
+        thread_id, run_id = key
+        try:
+            async with self._semaphore:
+                response = await self.client.beta.threads.runs.with_raw_response.retrieve(thread_id=thread_id,
+                                                                                         run_id=run_id)
+            self.rate_limit_gate.observe(response.headers)
+            run = response.parse()
+        except RateLimitError as e:
+            self.rate_limit_gate.pause(retry_after_from_headers(e.response.headers) or watched.interval)
+            self._reschedule(key, watched, generation, watched.interval)
+            return
+        except OpenAIError as e:
+            logger.error(f"Failed to retrieve run {run_id} on thread {thread_id}: {e}")
+            self._finish(key, watched, generation, error=e)
+            return
+        except Exception as e:
+            # Anything else (a malformed response, a bug) must still resolve the waiter's future
+            logger.error(f"Unexpected error while polling run {run_id} on thread {thread_id}: {e}", exc_info=True)
+            self._finish(key, watched, generation, error=e)
+            return
+
+        logger.debug(f"Run {run_id} status: {run.status}")
+        if run.status in ACTIVE_RUN_STATUSES:
+            watched.interval = self.backoff.next(watched.interval, run.status, watched.max_interval)
+            self._reschedule(key, watched, generation, self.backoff.with_jitter(watched.interval))
+        else:
+            self._finish(key, watched, generation, result=run)
+
+    def _reschedule(self, key, watched, generation, delay):
+        if self._runs.get(key) is watched and watched.generation == generation:
+            self._push(key, watched, delay)
+
+    def _finish(self, key, watched, generation, result=None, error=None):
+        if self._runs.get(key) is not watched or watched.generation != generation:
+            return
+        del self._runs[key]
+        if watched.future.done():
+            return
+        if error is not None:
+            watched.future.set_exception(error)
+        else:
+            watched.future.set_result(result)
@@ -0,0 +1,137 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Phases of a journaled request, in order. A request is unfinished until it reaches one of FINISHED_PHASES.
+STARTED = "started"
+MESSAGE_ADDED = "message_added"
+RUN_CREATED = "run_created"
+SUBMITTING = "submitting"
+COMPLETED = "completed"
+FINISHED_PHASES = (COMPLETED, "failed", "cancelled", "expired", "timeout")
+
+
+class RunJournal:
+    """
+    Local write-ahead journal of the runs started by get_assistant_response, stored in a SQLite file.
+
+    Each request is recorded under its key before every step that changes state on the server: the thread it uses,
+    whether its message was added, the run it created, and the tool outputs about to be submitted along with the IDs of
+    the tool calls already answered. Writes are synced to disk before the step they describe is taken.
+
+    If the process dies while a run is in flight, the run keeps going on the server. On restart, `resume_runs` (or a
+    retry of the request with the same key) reattaches to it, submits the journaled tool outputs the run is still
+    waiting for and returns its result, instead of creating a second run that would be paid for twice.
+    """
+
+    def __init__(self, path, retention=7 * 24 * 3600):
+        """
+        Args:
+            path (str): Path of the SQLite database file.
+            retention (float): Seconds after which entries are dropped, finished or not. Default is one week; a run
+                left unattended expires on the server long before that.
+        """
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS run_journal ("
+                         "key TEXT PRIMARY KEY, thread_id TEXT, run_id TEXT, phase TEXT NOT NULL, "
+                         "submitted TEXT NOT NULL DEFAULT '[]', pending TEXT, "
+                         "created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS run_journal_phase ON run_journal (phase)")
+            conn.execute("DELETE FROM run_journal WHERE updated_at < ?", (time.time() - retention,))
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so each thread keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Each entry must reach the disk before the step it records is taken
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, key: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        with conn:
+            conn.execute(f"UPDATE run_journal SET {assignments}, updated_at = ? WHERE key = ?",
+                         (*fields.values(), time.time(), key))
+
+    def begin(self, key: str, thread_id: str):
+        """Records a new request on a thread, replacing any earlier entry with the same key."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO run_journal (key, thread_id, phase, created_at, updated_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (key, thread_id, STARTED, now, now))
+
+    def message_added(self, key: str):
+        self._update(key, phase=MESSAGE_ADDED)
+
+    def run_created(self, key: str, run_id: str):
+        self._update(key, run_id=run_id, phase=RUN_CREATED)
+
+    def submitting(self, key: str, tool_outputs: List[Dict]):
+        """Records tool outputs before they are submitted, so they are not computed again after a crash."""
+        self._update(key, phase=SUBMITTING, pending=json.dumps(tool_outputs))
+
+    def submitted(self, key: str, tool_call_ids: List[str]):
+        """Records the tool calls whose outputs the run has accepted."""
+        entry = self.get(key)
+        if entry is None:
+            return
+        self._update(key, phase=RUN_CREATED, pending=None,
+                     submitted=json.dumps(entry["submitted"] + list(tool_call_ids)))
+
+    def finish(self, key: str, phase: str = COMPLETED):
+        """Marks a request as finished: 'completed', or the final status of a run that did not complete."""
+        self._update(key, phase=phase, pending=None)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Returns the entry of a request, or None.
+
+        The entry is a dict with the keys 'key', 'thread_id', 'run_id', 'phase', 'submitted' (IDs of the tool calls
+        already answered), 'pending' (tool outputs recorded but not yet accepted, or None) and 'updated_at'.
+        """
+        row = self._connect().execute(
+            "SELECT key, thread_id, run_id, phase, submitted, pending, updated_at FROM run_journal WHERE key = ?",
+            (key,)).fetchone()
+        return self._entry(row) if row else None
+
+    def unfinished(self) -> List[Dict]:
+        """Entries of the requests whose run was created but never finished, oldest first."""
+        placeholders = ", ".join("?" for _ in FINISHED_PHASES)
+        rows = self._connect().execute(
+            "SELECT key, thread_id, run_id, phase, submitted, pending, updated_at FROM run_journal "
+            f"WHERE run_id IS NOT NULL AND phase NOT IN ({placeholders}) ORDER BY created_at", FINISHED_PHASES)
+        return [self._entry(row) for row in rows]
+
+    @staticmethod
+    def _entry(row) -> Dict:
+        key, thread_id, run_id, phase, submitted, pending, updated_at = row
+        return {"key": key, "thread_id": thread_id, "run_id": run_id, "phase": phase,
+                "submitted": json.loads(submitted), "pending": json.loads(pending) if pending else None,
+                "updated_at": updated_at}
+
+    def pending_outputs(self, key: str, tool_call_ids: List[str]) -> Optional[List[Dict]]:
+        """
+        Returns the journaled outputs of exactly these tool calls, or None if they were not recorded.
+
+        Used when a resumed run still requires action: outputs recorded before the crash are submitted as they are.
+        """
+        entry = self.get(key)
+        if entry is None or not entry["pending"]:
+            return None
+        outputs = entry["pending"]
+        if sorted(output["tool_call_id"] for output in outputs) != sorted(tool_call_ids):
+            return None
+        return outputs
@@ -0,0 +1,349 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+import httpx
+
+from core.deadline import current_deadline
+from core.poller import parse_reset_duration, retry_after_from_headers
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+INTERACTIVE = 0
+BATCH = 10
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Same connection limits and timeouts as the SDK's default client
+_DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+_DEFAULT_TIMEOUT = httpx.Timeout(timeout=600.0, connect=5.0)
+
+_request_priority = contextvars.ContextVar("request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Sets the priority of the API calls made in the enclosed block, e.g. `with request_priority(BATCH):`.
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Budget of one rate-limited resource (requests or tokens), refilled continuously.
+
+    The bucket is unlimited until the first rate-limit headers are observed; each response then resets its level and
+    refill rate to what the API reports, and local consumption covers the calls in between.
+    """
+
+    def __init__(self):
+        self.capacity = None
+        self.level = 0.0
+        self.refill_rate = None
+        self.blocked_until = 0.0
+        self.updated_at = time.monotonic()
+
+    def observe(self, limit, remaining, reset_seconds):
+        now = time.monotonic()
+        self.capacity = float(limit)
+        self.level = float(remaining)
+        if reset_seconds > 0 and limit > remaining:
+            # The reset header is the time until the bucket is full again
+            self.refill_rate = (limit - remaining) / reset_seconds
+        elif self.refill_rate is None:
+            # OpenAI limits are per minute
+            self.refill_rate = limit / 60.0
+        self.updated_at = now
+
+    def block(self, seconds):
+        """Empties the bucket for `seconds`, e.g. after a 429."""
+        self.level = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.updated_at = time.monotonic()
+
+    def wait_time(self, cost) -> float:
+        """Seconds until `cost` units are available; 0 if they are available now."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.capacity is None or cost <= 0:
+            return 0.0
+        self._refill(now)
+        # A single call costing more than the whole bucket only waits for a full bucket
+        cost = min(cost, self.capacity)
+        if self.level >= cost:
+            return 0.0
+        return (cost - self.level) / self.refill_rate if self.refill_rate else 1.0
+
+    def consume(self, cost):
+        if self.capacity is not None:
+            self.level -= cost
+
+    def _refill(self, now):
+        if self.refill_rate:
+            self.level = min(self.capacity, self.level + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+
+class RequestScheduler:
+    """
+    Admission control in front of every OpenAI API call of a client.
+
+    Calls wait for the request and token budgets tracked from the `x-ratelimit-*` response headers, and are admitted
+    in priority order (interactive before batch, then first come first served). 429 and 5xx responses and connection
+    errors are retried with jittered exponential backoff, honouring Retry-After, as long as the caller's deadline
+    allows. The scheduler plugs into the SDK as an httpx transport, see `http_client` and `async_http_client`.
+    """
+
+    def __init__(self, default_deadline=120.0, max_retries=6, initial_backoff=0.5, max_backoff=20.0, jitter=0.2,
+                 default_priority=INTERACTIVE):
+        """
+        Args:
+            default_deadline (float): Seconds a call may spend queued and retrying when no `request_deadline` is
+                active. Default is 120 seconds.
+            max_retries (int): Maximum number of retries of a single call. Default is 6.
+            initial_backoff (float): Delay in seconds before the first retry. Default is 0.5 seconds.
+            max_backoff (float): Upper bound in seconds on the delay between retries. Default is 20 seconds.
+            jitter (float): Relative random spread of retry delays. Default is 0.2.
+            default_priority (int): Priority of calls made outside `request_priority`. Default is INTERACTIVE.
+        """
+        self.default_deadline = default_deadline
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.default_priority = default_priority
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stats = {"admitted": 0, "retried": 0, "rate_limited": 0, "deadline_exceeded": 0}
+
+    def http_client(self, transport: Optional[httpx.BaseTransport] = None, **kwargs) -> httpx.Client:
+        """
+        Builds an httpx client for `OpenAI(http_client=...)` whose calls all go through the scheduler.
+
+        Args:
+            transport (httpx.BaseTransport | None): Transport actually sending the calls, e.g. the shared connection
+                pool of an HttpClient. If None, a dedicated pool is created.
+        """
+        transport = ScheduledTransport(self, transport or httpx.HTTPTransport(limits=kwargs.pop("limits",
+                                                                                                _DEFAULT_LIMITS)))
+        return httpx.Client(transport=transport, timeout=kwargs.pop("timeout", _DEFAULT_TIMEOUT),
+                            follow_redirects=True, **kwargs)
+
+    def async_http_client(self, **kwargs) -> httpx.AsyncClient:
+        """Builds an httpx client for `AsyncOpenAI(http_client=...)` whose calls all go through the scheduler."""
+        transport = AsyncScheduledTransport(self,
+                                            httpx.AsyncHTTPTransport(limits=kwargs.pop("limits", _DEFAULT_LIMITS)))
+        return httpx.AsyncClient(transport=transport, timeout=kwargs.pop("timeout", _DEFAULT_TIMEOUT),
+                                 follow_redirects=True, **kwargs)
+
+    def stats(self):
+        with self._condition:
+            return {**self._stats, "queued": len(self._waiters)}
+
+    # -- Admission
+
+    def call_context(self) -> Tuple[int, float]:
+        """Priority and absolute deadline of a call made from the current context."""
+        priority = _request_priority.get()
+        deadline = current_deadline()
+        return (self.default_priority if priority is None else priority,
+                time.monotonic() + self.default_deadline if deadline is None else deadline)
+
+    @staticmethod
+    def estimate_tokens(request: httpx.Request) -> int:
+        """Rough token cost of a call: only run creations and tool output submissions invoke the model."""
+        path = request.url.path
+        if request.method != "POST" or not (path.endswith("/runs") or path.endswith("/submit_tool_outputs")):
+            return 0
+        return max(1, len(request.content) // 4)
+
+    def acquire(self, request, priority, deadline):
+        """Blocks until the call may be sent. Raises httpx.PoolTimeout if the deadline passes first."""
+        entry = (priority, next(self._sequence))
+        tokens = self.estimate_tokens(request)
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    delay = self._admit(entry, tokens)
+                    if delay == 0:
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._deadline_exceeded(request)
+                    # Waiters behind the head are woken when it leaves the queue
+                    self._condition.wait(timeout=min(delay, remaining) if delay else remaining)
+            finally:
+                self._leave(entry)
+
+    async def acquire_async(self, request, priority, deadline):
+        """Asyncio counterpart of `acquire`; never blocks the event loop."""
+        entry = (priority, next(self._sequence))
+        tokens = self.estimate_tokens(request)
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._admit(entry, tokens)
+                if delay == 0:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._condition:
+                        raise self._deadline_exceeded(request)
+                await asyncio.sleep(min(delay or 0.01, remaining))
+        finally:
+            with self._condition:
+                self._leave(entry)
+
+    def _admit(self, entry, tokens) -> Optional[float]:
+        # Called with the lock held. Returns 0 if admitted, the refill delay if at the head of the queue, else None.
+        if self._waiters[0] != entry:
+            return None
+        delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if delay > 0:
+            return delay
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        self._stats["admitted"] += 1
+        return 0
+
+    def _leave(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        self._condition.notify_all()
+
+    def _deadline_exceeded(self, request):
+        self._stats["deadline_exceeded"] += 1
+        return httpx.PoolTimeout("Deadline exceeded while waiting for rate-limit budget", request=request)
+
+    # -- Responses and retries
+
+    def observe(self, response: httpx.Response):
+        """Updates the budgets from the rate-limit headers of a response."""
+        headers = response.headers
+        with self._condition:
+            for bucket, resource in ((self.requests, "requests"), (self.tokens, "tokens")):
+                try:
+                    limit = int(headers[f"x-ratelimit-limit-{resource}"])
+                    remaining = int(headers[f"x-ratelimit-remaining-{resource}"])
+                except (KeyError, ValueError):
+                    continue
+                bucket.observe(limit, remaining, parse_reset_duration(headers.get(f"x-ratelimit-reset-{resource}")))
+            if response.status_code == 429:
+                self._stats["rate_limited"] += 1
+                delay = retry_after_from_headers(headers) or self.initial_backoff
+                self.requests.block(delay)
+                logger.debug(f"Rate limited, holding calls for {delay:.2f} seconds")
+            self._condition.notify_all()
+
+    def retry_delay(self, attempt, response: Optional[httpx.Response], deadline) -> Optional[float]:
+        """
+        Delay before retrying a failed call, or None if it must not be retried.
+
+        Args:
+            attempt (int): Number of retries already made.
+            response (httpx.Response | None): The failed response, or None after a connection error.
+            deadline (float): Absolute deadline of the call.
+        """
+        if response is not None and response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+        if attempt >= self.max_retries:
+            return None
+        delay = min(self.max_backoff, self.initial_backoff * 2 ** attempt)
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        if response is not None:
+            delay = max(delay, retry_after_from_headers(response.headers))
+        if time.monotonic() + delay > deadline:
+            return None
+        with self._condition:
+            self._stats["retried"] += 1
+        return delay
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """httpx transport sending every request through a RequestScheduler."""
+
+    def __init__(self, scheduler: RequestScheduler, transport: httpx.BaseTransport):
+        self.scheduler = scheduler
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        priority, deadline = self.scheduler.call_context()
+        attempt = 0
+        while True:
+            self.scheduler.acquire(request, priority, deadline)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                delay = self.scheduler.retry_delay(attempt, None, deadline)
+                if delay is None:
+                    raise
+                logger.debug(f"Retrying {request.method} {request.url.path} in {delay:.2f}s after {e!r}")
+            else:
+                self.scheduler.observe(response)
+                delay = self.scheduler.retry_delay(attempt, response, deadline)
+                if response.status_code < 400 or delay is None:
+                    # Failures that are not retried are left to the SDK, which raises the matching OpenAIError
+                    return response
+                logger.debug(f"Retrying {request.method} {request.url.path} in {delay:.2f}s after "
+                             f"HTTP {response.status_code}")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncScheduledTransport(httpx.AsyncBaseTransport):
+    """Asyncio counterpart of ScheduledTransport."""
+
+    def __init__(self, scheduler: RequestScheduler, transport: httpx.AsyncBaseTransport):
+        self.scheduler = scheduler
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        priority, deadline = self.scheduler.call_context()
+        attempt = 0
+        while True:
+            await self.scheduler.acquire_async(request, priority, deadline)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                delay = self.scheduler.retry_delay(attempt, None, deadline)
+                if delay is None:
+                    raise
+                logger.debug(f"Retrying {request.method} {request.url.path} in {delay:.2f}s after {e!r}")
+            else:
+                self.scheduler.observe(response)
+                delay = self.scheduler.retry_delay(attempt, response, deadline)
+                if response.status_code < 400 or delay is None:
+                    return response
+                logger.debug(f"Retrying {request.method} {request.url.path} in {delay:.2f}s after "
+                             f"HTTP {response.status_code}")
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
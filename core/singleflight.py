@@ -0,0 +1,73 @@
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is still running block until it finishes
+    and receive the same result, or the same exception. Once the call returns, the next caller starts a fresh one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]):
+        """
+        Runs `fn` unless a call with the same key is already in flight, in which case its result is shared.
+
+        :param key: Identifies equivalent calls, e.g. a canonical tool call key.
+        :param fn: The function to execute.
+        :return: The result of the single execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"Joining in-flight call for key: {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently executing."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of executed and coalesced calls."""
+        with self._lock:
+            return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,111 @@
+import logging
+from typing import Optional, Iterator, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_RUN_EVENTS = ("thread.run.failed", "thread.run.cancelled", "thread.run.expired")
+
+
+def extract_text_deltas(event) -> Iterator[str]:
+    """
+    Yields the text fragments carried by a 'thread.message.delta' stream event.
+
+    Args:
+        event: An AssistantStreamEvent received from a streamed run.
+
+    Returns:
+        Iterator of text fragments; empty for any other kind of event.
+    """
+    if event.event != "thread.message.delta":
+        return
+    for part in event.data.delta.content or []:
+        if part.type == "text" and part.text is not None and part.text.value:
+            yield part.text.value
+
+
+def message_text(message) -> Optional[str]:
+    """Joins the text parts of an assistant Message, or returns None without a message."""
+    if message is None:
+        return None
+    return "".join(part.text.value for part in message.content if part.type == "text" and part.text is not None)
+
+
+class ResponseStream:
+    """
+    Iterable over the text deltas of a streamed assistant run.
+
+    Iterating yields text fragments as the model produces them. Once the stream is exhausted, `message` holds the
+    final assistant Message taken from the 'thread.message.completed' event, so no messages.list call is needed.
+    """
+
+    def __init__(self, events: Iterator[str]):
+        self._events = events
+        self._chunks = []
+        self.message = None
+
+    def __iter__(self) -> Iterator[str]:
+        self.message = yield from self._collect(self._events)
+
+    def _collect(self, events):
+        # Re-yields the deltas while keeping a copy, and hands back the generator's return value (the final Message)
+        while True:
+            try:
+                chunk = next(events)
+            except StopIteration as stop:
+                return stop.value
+            self._chunks.append(chunk)
+            yield chunk
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return "".join(self._chunks)
+
+    @property
+    def data(self) -> list:
+        """The final message wrapped in a list, mirroring the shape returned by messages.list."""
+        return [self.message] if self.message is not None else []
+
+    def until_done(self) -> Optional[object]:
+        """Consume the remaining stream and return the final Message."""
+        for _ in self:
+            pass
+        return self.message
+
+
+class AsyncResponseStream:
+    """
+    Async iterable over the text deltas of a streamed assistant run.
+
+    The async generator feeding it sets the final Message through `_set_message`, since async generators cannot
+    return values.
+    """
+
+    def __init__(self, events_factory):
+        self._events = events_factory(self._set_message)
+        self._chunks = []
+        self.message = None
+
+    def _set_message(self, message):
+        self.message = message
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for chunk in self._events:
+            self._chunks.append(chunk)
+            yield chunk
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return "".join(self._chunks)
+
+    @property
+    def data(self) -> list:
+        """The final message wrapped in a list, mirroring the shape returned by messages.list."""
+        return [self.message] if self.message is not None else []
+
+    async def until_done(self) -> Optional[object]:
+        """Consume the remaining stream and return the final Message."""
+        async for _ in self:
+            pass
+        return self.message
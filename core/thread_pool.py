@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from openai import OpenAIError
+from core.scheduler import BATCH, request_priority
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadPool:
+    """
+    Keeps a number of empty conversation threads ready so new sessions do not wait for a create_thread round trip.
+
+    A background worker refills the pool after threads are handed out, deletes released threads, and deletes leased
+    threads that stayed idle for too long. A thread still held by a caller is never deleted for any other reason.
+    """
+
+    def __init__(self, size=4, max_threads=100, idle_timeout=30 * 60, maintenance_interval=30):
+        """
+        Args:
+            size (int): Number of empty threads kept ready. Default is 4.
+            max_threads (int): Maximum number of threads owned by the pool, ready and leased together. At the cap the
+                pool stops refilling and deletes ready threads; leased threads are only reclaimed when released or
+                idle. Callers can still acquire threads past the cap, which are then created on demand. Default is 100.
+            idle_timeout (float | None): Seconds after which an unused leased thread is deleted. If None, leased
+                threads are only deleted when released. Default is 30 minutes.
+            maintenance_interval (float): Seconds between idle checks of the background worker. Default is 30.
+        """
+        self.size = size
+        self.max_threads = max_threads
+        self.idle_timeout = idle_timeout
+        self.maintenance_interval = maintenance_interval
+        self.manager = None
+        self._ready = deque()
+        self._leased = OrderedDict()  # thread_id -> last use timestamp, least recently used first
+        self._to_delete = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._worker = None
+
+    def start(self, manager):
+        """
+        Binds the pool to an AssistantManager and starts the background worker.
+
+        Args:
+            manager (AssistantManager): Used to create and delete threads.
+        """
+        self.manager = manager
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_maintenance, name="thread-pool", daemon=True)
+            self._worker.start()
+
+    def acquire(self, lease=True) -> str:
+        """
+        Hands out an empty thread, creating one synchronously only if none is ready.
+
+        Args:
+            lease (bool): If True, the thread stays in the pool's accounting: it counts towards max_threads and is
+                deleted when idle for idle_timeout. If False, the caller manages the thread's lifetime itself and
+                only hands it back through release() to have it deleted in the background.
+
+        Returns:
+            str: The ID of the thread, leased to the caller unless lease is False.
+
+        Raises:
+            OpenAIError: If a thread has to be created and the API call fails.
+        """
+        with self._lock:
+            thread_id = self._ready.popleft() if self._ready else None
+        if thread_id is None:
+            logger.debug("Thread pool is empty, creating a thread on demand")
+            thread_id = self.manager.create_thread().id
+        if lease:
+            with self._lock:
+                self._leased[thread_id] = time.monotonic()
+        self._wakeup.set()
+        return thread_id
+
+    def touch(self, thread_id):
+        """Marks a leased thread as used, postponing its idle expiry."""
+        with self._lock:
+            if thread_id in self._leased:
+                self._leased[thread_id] = time.monotonic()
+                self._leased.move_to_end(thread_id)
+
+    def release(self, thread_id):
+        """Returns a finished thread, leased or not, to the pool, which deletes it in the background."""
+        with self._lock:
+            self._leased.pop(thread_id, None)
+            self._to_delete.append(thread_id)
+        self._wakeup.set()
+
+    def owns(self, thread_id) -> bool:
+        with self._lock:
+            return thread_id in self._leased
+
+    def stats(self):
+        with self._lock:
+            return {"ready": len(self._ready), "leased": len(self._leased), "pending_deletion": len(self._to_delete)}
+
+    def close(self, delete_threads=True):
+        """
+        Stops the background worker.
+
+        Args:
+            delete_threads (bool): If True, the ready threads are deleted before returning.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        if delete_threads:
+            with self._lock:
+                self._to_delete.extend(self._ready)
+                self._ready.clear()
+            self._delete_pending()
+
+    def _run_maintenance(self):
+        # Housekeeping calls never delay user requests when rate-limit budget is short
+        with request_priority(BATCH):
+            while not self._stopped:
+                self._wakeup.clear()
+                self._expire_leased()
+                self._delete_pending()
+                self._refill()
+                self._wakeup.wait(timeout=self.maintenance_interval)
+
+    def _expire_leased(self):
+        now = time.monotonic()
+        with self._lock:
+            # Leased threads are ordered by last use, so expired ones are at the front
+            while self._leased and self.idle_timeout is not None:
+                thread_id, last_used = next(iter(self._leased.items()))
+                if now - last_used <= self.idle_timeout:
+                    break
+                logger.debug(f"Recycling idle thread {thread_id}")
+                del self._leased[thread_id]
+                self._to_delete.append(thread_id)
+            # Over the cap, only the spare threads are given up
+            while self._ready and len(self._ready) + len(self._leased) > self.max_threads:
+                thread_id = self._ready.pop()
+                logger.debug(f"Deleting ready thread {thread_id} above the cap of {self.max_threads} threads")
+                self._to_delete.append(thread_id)
+
+    def _delete_pending(self):
+        while True:
+            with self._lock:
+                if not self._to_delete:
+                    return
+                thread_id = self._to_delete.popleft()
+            try:
+                self.manager.delete_thread(thread_id)
+            except OpenAIError as e:
+                logger.warning(f"Failed to recycle thread {thread_id}: {e}")
+
+    def _refill(self):
+        while not self._stopped:
+            with self._lock:
+                if len(self._ready) >= self.size or len(self._ready) + len(self._leased) >= self.max_threads:
+                    return
+            try:
+                thread_id = self.manager.create_thread().id
+            except OpenAIError as e:
+                logger.warning(f"Failed to refill thread pool: {e}")
+                return
+            with self._lock:
+                self._ready.append(thread_id)
@@ -0,0 +1,449 @@
+import ast
+import enum
+import hashlib
+import importlib
+import importlib.metadata
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import pkgutil
+import threading
+import typing
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.parser import FunctionDefinitionParser
+
+logger = logging.getLogger(__name__)
+
+# Annotations resolved when reading a stub, along with the typing constructs built from them (Optional, List, Literal,
+# ...) and the Enum classes of the module; any other annotation is kept as its source text
+_BUILTIN_TYPES = {"str": str, "int": int, "float": float, "bool": bool, "list": list, "dict": dict, "tuple": tuple,
+                  "set": set, "frozenset": frozenset, "None": type(None)}
+_TYPING_NAMES = ("Any", "Dict", "FrozenSet", "List", "Literal", "Mapping", "Optional", "Sequence", "Set", "Tuple",
+                 "Union")
+_ENUM_BASES = ("Enum", "IntEnum", "StrEnum")
+
+
+class SourceDefault:
+    """Default of a stub's parameter that is not a literal, e.g. a module constant; kept as its source text."""
+
+    def __init__(self, source: str):
+        self.source = source
+
+    def __repr__(self):
+        return self.source
+
+
+class LazyTool:
+    """
+    Stand-in for a tool function that imports its module on the first call.
+
+    The name, signature and docstring the function definition parser needs are read from the module's source with
+    `ast`, without executing it, so building the tool schemas does not import the tool's dependencies (search clients,
+    HTML parsers, database drivers) nor run its module-level setup. The first call imports the module and every call
+    is forwarded to the real function.
+
+    A tool built by ToolRegistry from its schema cache carries the cached schema as `tool_schema`, which
+    AssistantManager uses instead of parsing the function again; its source is then not read at all.
+    """
+
+    def __init__(self, module: str, name: str, definition=None, schema: Optional[Dict] = None,
+                 names: Optional[Dict] = None):
+        """
+        Args:
+            module (str): Dotted name of the module defining the function, e.g. 'functions.weather'.
+            name (str): Name of the function.
+            definition (ast.FunctionDef | None): The parsed definition, if already read. If None, it is read here,
+                unless a schema is given.
+            schema (Dict | None): The function's tool schema, when already known.
+            names (Dict | None): Enum classes and constants of the module by name, from `module_definitions`, used to
+                resolve the annotations and defaults naming them. Read here along with the definition if that is not
+                given.
+
+        Raises:
+            ImportError: If the module cannot be found.
+            LookupError: If the module does not define the function at its top level.
+        """
+        self.module = module
+        self.__name__ = self.__qualname__ = name
+        self.tool_schema = schema
+        self._func = None
+        self._lock = threading.Lock()
+        if schema is not None and definition is None:
+            self.__doc__ = schema["function"].get("description")
+            return
+        if definition is None:
+            tree = _read_module(module)
+            definition = self._find_definition(tree, module, name)
+            names = module_definitions(tree)
+        self.__doc__ = ast.get_docstring(definition)
+        self.__signature__ = self._signature(definition, names)
+
+    @staticmethod
+    def _find_definition(tree, module: str, name: str):
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+                return node
+        raise LookupError(f"Module '{module}' does not define a function '{name}'")
+
+    @staticmethod
+    def _signature(node, names: Optional[Dict] = None) -> inspect.Signature:
+        """
+        Builds the signature of a function definition. Defaults that are not literals are kept as SourceDefault,
+        annotations that cannot be resolved as their source text.
+        """
+        arguments = node.args
+        positional = arguments.posonlyargs + arguments.args
+        defaults = [inspect.Parameter.empty] * (len(positional) - len(arguments.defaults)) + arguments.defaults
+        parameters = []
+        for index, (arg, default) in enumerate(zip(positional, defaults)):
+            kind = (inspect.Parameter.POSITIONAL_ONLY if index < len(arguments.posonlyargs)
+                    else inspect.Parameter.POSITIONAL_OR_KEYWORD)
+            parameters.append(LazyTool._parameter(arg, kind, default, names))
+        if arguments.vararg is not None:
+            parameters.append(LazyTool._parameter(arguments.vararg, inspect.Parameter.VAR_POSITIONAL, names=names))
+        for arg, default in zip(arguments.kwonlyargs, arguments.kw_defaults):
+            parameters.append(LazyTool._parameter(arg, inspect.Parameter.KEYWORD_ONLY, default, names))
+        if arguments.kwarg is not None:
+            parameters.append(LazyTool._parameter(arguments.kwarg, inspect.Parameter.VAR_KEYWORD, names=names))
+        return inspect.Signature(parameters)
+
+    @staticmethod
+    def _parameter(arg, kind, default=None, names=None) -> inspect.Parameter:
+        annotation = inspect.Parameter.empty
+        if arg.annotation is not None:
+            try:
+                annotation = _resolve_annotation(arg.annotation, names or {})
+            except (LookupError, TypeError, ValueError, SyntaxError):
+                annotation = ast.unparse(arg.annotation)
+        value = inspect.Parameter.empty
+        if isinstance(default, ast.expr):
+            value = _resolve_default(default, names or {})
+        return inspect.Parameter(arg.arg, kind, default=value, annotation=annotation)
+
+    @property
+    def loaded(self) -> bool:
+        return self._func is not None
+
+    def load(self) -> Callable:
+        """Imports the module and returns the real function."""
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    logger.debug(f"Loading tool '{self.__name__}' from {self.module}")
+                    self._func = getattr(importlib.import_module(self.module), self.__name__)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.module}.{self.__name__}{' (loaded)' if self.loaded else ''}>"
+
+
+class LazyCoroutineTool(LazyTool):
+    """LazyTool of a coroutine function; AsyncAssistantManager awaits it instead of offloading it to a thread."""
+
+    async def __call__(self, *args, **kwargs):
+        return await self.load()(*args, **kwargs)
+
+
+def _resolve_annotation(node, names: Dict):
+    """
+    Builds the type an annotation expression denotes, without evaluating it.
+
+    Raises:
+        LookupError: If the annotation names anything but a builtin type, a typing construct or an Enum of `names`.
+    """
+    if isinstance(node, ast.Constant):
+        if node.value is None:
+            return type(None)
+        if isinstance(node.value, str):
+            # A forward reference, e.g. "Optional[str]"
+            return _resolve_annotation(ast.parse(node.value, mode="eval").body, names)
+    elif isinstance(node, ast.Name):
+        if node.id in _BUILTIN_TYPES:
+            return _BUILTIN_TYPES[node.id]
+        if node.id in _TYPING_NAMES:
+            return getattr(typing, node.id)
+        if isinstance(names.get(node.id), type):
+            return names[node.id]
+    elif isinstance(node, ast.Attribute) and node.attr in _TYPING_NAMES:
+        # typing.Optional, t.List, ...
+        return getattr(typing, node.attr)
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return typing.Union[_resolve_annotation(node.left, names), _resolve_annotation(node.right, names)]
+    elif isinstance(node, ast.Subscript):
+        origin = _resolve_annotation(node.value, names)
+        elements = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        if origin is typing.Literal:
+            arguments = tuple(ast.literal_eval(element) for element in elements)
+        else:
+            arguments = tuple(Ellipsis if isinstance(element, ast.Constant) and element.value is Ellipsis
+                              else _resolve_annotation(element, names) for element in elements)
+        return origin[arguments if len(arguments) > 1 else arguments[0]]
+    raise LookupError(f"Cannot resolve the annotation '{ast.unparse(node)}'")
+
+
+def _resolve_default(node, names: Dict):
+    """The value of a default: a literal, a constant or Enum member of the module, or else a SourceDefault."""
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        pass
+    if isinstance(node, ast.Name) and node.id in names and not isinstance(names[node.id], type):
+        return names[node.id]
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and \
+            isinstance(names.get(node.value.id), type) and node.attr in names[node.value.id].__members__:
+        return names[node.value.id][node.attr]
+    return SourceDefault(ast.unparse(node))
+
+
+def module_definitions(tree) -> Dict:
+    """
+    The names a parsed module defines at its top level that tool stubs can resolve: constants assigned a literal, and
+    Enum classes rebuilt with their members whose values are literals.
+
+    The copies are only meant for building tool schemas: their values are those of the real definitions.
+    """
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                names[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                names.pop(node.targets[0].id, None)
+            continue
+        if not isinstance(node, ast.ClassDef) or not any(
+                (isinstance(base, ast.Name) and base.id in _ENUM_BASES) or
+                (isinstance(base, ast.Attribute) and base.attr in _ENUM_BASES) for base in node.bases):
+            continue
+        members = {}
+        for statement in node.body:
+            if isinstance(statement, ast.Assign) and len(statement.targets) == 1 and \
+                    isinstance(statement.targets[0], ast.Name) and not statement.targets[0].id.startswith("_"):
+                try:
+                    members[statement.targets[0].id] = ast.literal_eval(statement.value)
+                except ValueError:
+                    continue
+        if members:
+            names[node.name] = enum.Enum(node.name, members)
+    return names
+
+
+def _read_module(module: str):
+    path = _module_path(module)
+    with open(path, encoding="utf-8") as file:
+        return ast.parse(file.read(), filename=path)
+
+
+def _module_path(module: str) -> str:
+    """Path of a module's source file, found without importing the module (its parent packages are imported)."""
+    spec = importlib.util.find_spec(module)
+    if spec is None or not spec.has_location or not spec.origin.endswith(".py"):
+        raise ImportError(f"Cannot find the source of module '{module}'")
+    return spec.origin
+
+
+def tool(func: Callable) -> Callable:
+    """
+    Marks a function as an assistant tool, to be found by ToolRegistry.
+
+    The function is returned unchanged. The registry finds decorated functions by reading module sources, so the
+    decorator must be applied by name (`@tool`) to a function defined at the top level of its module.
+    """
+    func.__assistant_tool__ = True
+    return func
+
+
+def _is_tool_decorator(node) -> bool:
+    if isinstance(node, ast.Call):
+        node = node.func
+    return (isinstance(node, ast.Name) and node.id == "tool") or \
+        (isinstance(node, ast.Attribute) and node.attr == "tool")
+
+
+def lazy_tool(module: str, name: str) -> LazyTool:
+    """Returns a LazyTool, or a LazyCoroutineTool when the function is defined with `async def`."""
+    tree = _read_module(module)
+    node = LazyTool._find_definition(tree, module, name)
+    cls = LazyCoroutineTool if isinstance(node, ast.AsyncFunctionDef) else LazyTool
+    return cls(module, name, definition=node, names=module_definitions(tree))
+
+
+def lazy_tools(module: str, *names: str) -> List[LazyTool]:
+    """
+    Lazy stand-ins for functions of a module, e.g. `lazy_tools("functions.web_browsing", "text_search")`.
+
+    Pass them to AssistantManager as `functions`, in place of the imported functions.
+    """
+    return [lazy_tool(module, name) for name in names]
+
+
+class ToolRegistry:
+    """
+    Collects the functions marked with @tool in the modules of some packages and in the modules named by installed
+    entry points, and builds a LazyTool for each.
+
+    Module sources are read without being executed. Generated schemas are cached in a JSON file, keyed by a hash of
+    each function's source, and reused until the function changes: a module whose source is unchanged is not even
+    parsed again. The cache is also dropped when the function definition parser itself changes.
+
+    A third-party package exposes tools with an entry point in the `assistant_tools` group, naming either a module
+    ('package.tools') whose @tool functions are all registered, or a single function ('package.tools:search').
+    """
+
+    cache_version = 1
+
+    def __init__(self, packages: Iterable[str] = ("functions",), entry_point_group: Optional[str] = "assistant_tools",
+                 cache_path: Optional[str] = None, parser=None):
+        """
+        Args:
+            packages (Iterable[str]): Packages whose modules are searched for @tool functions. Default is 'functions'.
+            entry_point_group (str | None): Entry point group naming third-party tool modules or functions. If None,
+                entry points are not searched.
+            cache_path (str | None): JSON file caching the generated schemas. If None, schemas are generated on each
+                discovery.
+            parser (FunctionDefinitionParser | None): Parser generating the schemas. Defaults to a new one.
+        """
+        self.packages = list(packages)
+        self.entry_point_group = entry_point_group
+        self.cache_path = cache_path
+        self.parser = parser or FunctionDefinitionParser()
+        self._tools = None
+        self._lock = threading.Lock()
+
+    def _modules(self) -> Iterable[tuple]:
+        """Yields (module, function name or None for all @tool functions) for every source of tools."""
+        for package in self.packages:
+            spec = importlib.util.find_spec(package)
+            if spec is None or spec.submodule_search_locations is None:
+                logger.warning(f"Tool package '{package}' not found")
+                continue
+            for module_info in pkgutil.iter_modules(spec.submodule_search_locations):
+                if not module_info.ispkg:
+                    yield f"{package}.{module_info.name}", None
+        if self.entry_point_group:
+            for entry_point in importlib.metadata.entry_points(group=self.entry_point_group):
+                yield entry_point.module, entry_point.attr
+
+    def discover(self) -> Dict[str, LazyTool]:
+        """
+        Finds every registered tool, regenerating only the schemas of functions whose source changed.
+
+        Returns:
+            Dict[str, LazyTool]: The tools by name, in discovery order.
+        """
+        with self._lock:
+            cache = self._load_cache()
+            files = {}
+            tools = {}
+            for module, attr in self._modules():
+                try:
+                    path = _module_path(module)
+                    with open(path, "rb") as file:
+                        source = file.read()
+                except (ImportError, OSError) as e:
+                    logger.warning(f"Skipping tool module '{module}': {e}")
+                    continue
+                cached = cache["files"].get(path, {})
+                entry = self._module_entry(module, source, cached)
+                files[path] = entry
+                for name, record in entry["tools"].items():
+                    if attr is not None and name != attr:
+                        continue
+                    if name in tools:
+                        logger.warning(f"Tool '{name}' of {module} ignored: {tools[name].module} defines it too")
+                        continue
+                    cls = LazyCoroutineTool if record["coroutine"] else LazyTool
+                    tools[name] = cls(module, name, schema=record["schema"])
+            self._save_cache(cache, files)
+            self._tools = tools
+            logger.debug(f"Registered {len(tools)} tools")
+            return dict(tools)
+
+    def _module_entry(self, module: str, source: bytes, cached: Dict) -> Dict:
+        """Cache entry of a module: its source digest and the schema of each @tool function."""
+        digest = hashlib.sha256(source).hexdigest()
+        if cached.get("digest") == digest:
+            return cached
+        text = source.decode("utf-8")
+        tree = ast.parse(text, filename=module)
+        previous = cached.get("tools", {})
+        entry = {"digest": digest, "tools": {}}
+        definitions = None
+        for node in tree.body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or \
+                    not any(_is_tool_decorator(decorator) for decorator in node.decorator_list):
+                continue
+            source_hash = hashlib.sha256(ast.get_source_segment(text, node).encode()).hexdigest()
+            record = previous.get(node.name)
+            if record is None or record["hash"] != source_hash:
+                logger.debug(f"Generating the schema of tool '{node.name}' of {module}")
+                if definitions is None:
+                    definitions = module_definitions(tree)
+                schema = self.parser.convert_function_to_json_schema(
+                    LazyTool(module, node.name, definition=node, names=definitions))
+                if not schema:
+                    # The parser has logged why
+                    continue
+                record = {"hash": source_hash, "schema": schema,
+                          "coroutine": isinstance(node, ast.AsyncFunctionDef)}
+            entry["tools"][node.name] = record
+        return entry
+
+    def tools(self, names: Optional[Iterable[str]] = None) -> List[LazyTool]:
+        """
+        Returns registered tools, discovering them on first use.
+
+        Args:
+            names (Iterable[str] | None): Names of the tools to return, in this order. If None, all tools are returned.
+
+        Raises:
+            LookupError: If a named tool is not registered.
+        """
+        if self._tools is None:
+            self.discover()
+        if names is None:
+            return list(self._tools.values())
+        missing = [name for name in names if name not in self._tools]
+        if missing:
+            raise LookupError(f"Tools not registered: {', '.join(missing)}")
+        return [self._tools[name] for name in names]
+
+    def _parser_digest(self) -> str:
+        # Schemas are regenerated whenever the code of the parser or of the stubs it reads changes
+        digest = hashlib.sha256()
+        for path in (inspect.getfile(type(self.parser)), __file__):
+            with open(path, "rb") as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def _load_cache(self) -> Dict:
+        empty = {"version": self.cache_version, "parser": self._parser_digest(), "files": {}}
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return empty
+        try:
+            with open(self.cache_path) as file:
+                cache = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable tool schema cache {self.cache_path}: {e}")
+            return empty
+        if cache.get("version") != empty["version"] or cache.get("parser") != empty["parser"]:
+            return empty
+        return cache
+
+    def _save_cache(self, cache: Dict, files: Dict):
+        if not self.cache_path or files == cache["files"]:
+            return
+        cache = dict(cache, files=files)
+        # Written to a temporary file and renamed, so concurrent processes never read a partial cache
+        temporary_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "w") as file:
+                json.dump(cache, file)
+            os.replace(temporary_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to write the tool schema cache {self.cache_path}: {e}")
@@ -0,0 +1,309 @@
+import bisect
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def current_span() -> Optional["Span"]:
+    """Returns the span active in the current context, if any."""
+    return _current_span.get()
+
+
+class Span:
+    """
+    A timed phase of an assistant request.
+
+    Spans of one request share a trace_id; each span points to its parent through parent_id. Run and tool call
+    identifiers are recorded as attributes (run_id, thread_id, tool_call_id, tool).
+    """
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None, start_time=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time() if start_time is None else start_time
+        self.end_time = None
+        self.error = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to the registered exporters.
+
+    The active span is tracked in a context variable, so nested `span` blocks form a tree. Work submitted to other
+    threads must run inside `contextvars.copy_context()` to stay attached to its parent.
+    """
+
+    def __init__(self, exporters=None):
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def span(self, name, parent: Optional[Span] = None, **attributes):
+        """
+        Times the enclosed block as a span, child of `parent` or of the current span.
+
+        Args:
+            name (str): The phase name, e.g. 'run.create' or 'tool.call'.
+            parent (Span | None): Explicit parent, for work that does not run in the parent's context.
+            **attributes: Attributes recorded on the span.
+
+        Yields:
+            Span: The started span, whose attributes can still be updated.
+        """
+        parent = parent or _current_span.get()
+        span = Span(name, trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+                    parent_id=parent.span_id if parent else None, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # The block was resumed in another context, e.g. a generator consumed from a different thread
+                pass
+            span.end_time = time.time()
+            self._export(span)
+
+    def record(self, name, duration, parent: Optional[Span] = None, **attributes) -> Span:
+        """
+        Records a phase measured elsewhere, e.g. the queue wait reported by run timestamps.
+
+        Args:
+            name (str): The phase name.
+            duration (float): Duration in seconds, ending now.
+            parent (Span | None): Explicit parent. Defaults to the current span.
+            **attributes: Attributes recorded on the span.
+        """
+        parent = parent or _current_span.get()
+        end_time = time.time()
+        span = Span(name, trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+                    parent_id=parent.span_id if parent else None, attributes=attributes,
+                    start_time=end_time - duration)
+        span.end_time = end_time
+        self._export(span)
+        return span
+
+    def _export(self, span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans in memory, for tests and debugging."""
+
+    def __init__(self, max_spans=10000):
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def get_spans(self, trace_id=None) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if trace_id is None or span.trace_id == trace_id]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class JsonLinesExporter:
+    """Appends each finished span as one JSON object per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as file:
+                file.write(line + "\n")
+
+
+class _Histogram:
+    def __init__(self, buckets, window):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyHistograms:
+    """
+    Exporter aggregating span durations per phase and per tool.
+
+    Renders them in the Prometheus text format as a histogram (for aggregation across processes) and as a summary
+    with p50/p95/p99 computed over the most recent `window` samples.
+    """
+
+    metric_name = "assistant_phase_duration_seconds"
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        if span.duration is None:
+            return
+        key = (span.name, str(span.attributes.get("tool", "")))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets, self.window)
+            histogram.observe(span.duration)
+
+    def quantile(self, phase, q, tool="") -> Optional[float]:
+        """Returns the q-quantile of a phase's recent durations, or None without samples."""
+        with self._lock:
+            histogram = self._histograms.get((phase, tool))
+            return histogram.quantile(q) if histogram else None
+
+    def snapshot(self) -> List[Dict]:
+        """The state of every histogram as plain data, e.g. to send it to another process."""
+        with self._lock:
+            return [{"phase": phase, "tool": tool, "counts": list(histogram.counts), "total": histogram.total,
+                     "count": histogram.count, "recent": list(histogram.recent)}
+                    for (phase, tool), histogram in self._histograms.items()]
+
+    def merge(self, snapshot: List[Dict]):
+        """Adds a snapshot taken with the same buckets, e.g. from another worker process, to these histograms."""
+        with self._lock:
+            for entry in snapshot:
+                key = (entry["phase"], entry["tool"])
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = _Histogram(self.buckets, self.window)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, entry["counts"])]
+                histogram.total += entry["total"]
+                histogram.count += entry["count"]
+                histogram.recent.extend(entry["recent"])
+
+    def summary(self) -> Dict[str, Dict]:
+        """Count and p50/p95/p99 per phase, keyed 'phase' or 'phase[tool]'."""
+        with self._lock:
+            return {
+                (f"{phase}[{tool}]" if tool else phase): {
+                    "count": histogram.count,
+                    **{f"p{int(q * 100)}": histogram.quantile(q) for q in self.quantiles}
+                }
+                for (phase, tool), histogram in sorted(self._histograms.items())
+            }
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        name = self.metric_name
+        lines = [f"# HELP {name} Duration of assistant request phases.", f"# TYPE {name} histogram"]
+        summary_lines = [f"# HELP {name}_recent Quantiles over the most recent samples.",
+                         f"# TYPE {name}_recent summary"]
+        with self._lock:
+            for (phase, tool), histogram in sorted(self._histograms.items()):
+                labels = f'phase="{phase}"' + (f',tool="{tool}"' if tool else "")
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+                for q in self.quantiles:
+                    value = histogram.quantile(q)
+                    summary_lines.append(f'{name}_recent{{{labels},quantile="{q}"}} {value}')
+                summary_lines.append(f"{name}_recent_count{{{labels}}} {len(histogram.recent)}")
+        return "\n".join(lines + summary_lines) + "\n"
+
+
+def serve_metrics(histograms: LatencyHistograms, host="0.0.0.0", port=9464) -> ThreadingHTTPServer:
+    """
+    Serves `histograms.render()` on /metrics from a background thread.
+
+    Args:
+        histograms (LatencyHistograms): The exporter to expose, or any object with a render() method such as a
+            WorkerPool.
+        host (str): Interface to bind. Default is all interfaces.
+        port (int): Port to listen on. Default is 9464.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = histograms.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,291 @@
+import enum
+import functools
+import inspect
+import json
+import logging
+import math
+import typing
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Returned by a compiled converter for a value it rejected; the problem has been recorded
+_INVALID = object()
+
+_TRUE_STRINGS = ("true", "yes", "1")
+_FALSE_STRINGS = ("false", "no", "0")
+
+
+class ToolArgumentError(ValueError):
+    """Arguments of a tool call that do not match the function's schema. The message lists every problem found."""
+
+    def __init__(self, func_name: str, problems: List[str], usage: str):
+        self.func_name = func_name
+        self.problems = problems
+        message = f"Invalid arguments for {func_name}: {'; '.join(problems)}."
+        if usage:
+            message += f" Expected arguments: {usage}."
+        super().__init__(message)
+
+
+def _show(value) -> str:
+    """A short rendering of a rejected value for error messages."""
+    text = json.dumps(value, default=str)
+    return text if len(text) <= 60 else f"{text[:57]}..."
+
+
+def _describe(schema: Dict) -> str:
+    """A short rendering of a schema for error messages, e.g. 'array of integer' or 'one of \"a\", \"b\"'."""
+    if "enum" in schema:
+        return f"one of {', '.join(_show(value) for value in schema['enum'])}"
+    if "anyOf" in schema:
+        return " or ".join(_describe(option) for option in schema["anyOf"])
+    kind = schema.get("type", "any value")
+    if kind == "array" and "items" in schema:
+        return f"array of {_describe(schema['items'])}"
+    if kind == "object" and "additionalProperties" in schema:
+        return f"object of {_describe(schema['additionalProperties'])}"
+    return kind
+
+
+def _to_string(value, path, problems):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    problems.append(f"{path}: expected a string, got {_show(value)}")
+    return _INVALID
+
+
+def _to_integer(value, path, problems):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            try:
+                number = float(value)
+                if number.is_integer():
+                    return int(number)
+            except ValueError:
+                pass
+    problems.append(f"{path}: expected an integer, got {_show(value)}")
+    return _INVALID
+
+
+def _to_number(value, path, problems):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value)
+            if math.isfinite(number):
+                return number
+        except ValueError:
+            pass
+    problems.append(f"{path}: expected a number, got {_show(value)}")
+    return _INVALID
+
+
+def _to_boolean(value, path, problems):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in _TRUE_STRINGS + _FALSE_STRINGS:
+        return value.strip().lower() in _TRUE_STRINGS
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    problems.append(f"{path}: expected a boolean, got {_show(value)}")
+    return _INVALID
+
+
+def _decode_json(value, expected: type):
+    """Decodes a container the model sent as a JSON string, e.g. '["a", "b"]' for an array."""
+    if isinstance(value, str):
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return value
+        if isinstance(decoded, expected):
+            return decoded
+    return value
+
+
+def _compile_array(schema: Dict):
+    convert_item = _compile(schema["items"]) if "items" in schema else None
+
+    def convert(value, path, problems):
+        value = _decode_json(value, list)
+        if isinstance(value, tuple):
+            value = list(value)
+        if not isinstance(value, list):
+            problems.append(f"{path}: expected an array, got {_show(value)}")
+            return _INVALID
+        if convert_item is None:
+            return value
+        items = [convert_item(item, f"{path}[{index}]", problems) for index, item in enumerate(value)]
+        return _INVALID if any(item is _INVALID for item in items) else items
+
+    return convert
+
+
+def _compile_object(schema: Dict):
+    convert_value = _compile(schema["additionalProperties"]) \
+        if isinstance(schema.get("additionalProperties"), dict) else None
+
+    def convert(value, path, problems):
+        value = _decode_json(value, dict)
+        if not isinstance(value, dict):
+            problems.append(f"{path}: expected an object, got {_show(value)}")
+            return _INVALID
+        if convert_value is None:
+            return value
+        converted = {key: convert_value(item, f"{path}.{key}", problems) for key, item in value.items()}
+        return _INVALID if any(item is _INVALID for item in converted.values()) else converted
+
+    return convert
+
+
+_SCALAR_CONVERTERS = {"string": _to_string, "integer": _to_integer, "number": _to_number, "boolean": _to_boolean}
+_CONTAINER_COMPILERS = {"array": _compile_array, "object": _compile_object}
+
+
+def _compile(schema: Dict) -> Callable[[Any, str, List[str]], Any]:
+    """
+    Compiles a JSON schema into a converter `convert(value, path, problems)`, which returns the value coerced to the
+    schema's type, or _INVALID after appending what is wrong with it to problems.
+    """
+    if "anyOf" in schema:
+        options = [_compile(option) for option in schema["anyOf"]]
+        description = _describe(schema)
+
+        def convert_any(value, path, problems):
+            for option in options:
+                converted = option(value, path, [])
+                if converted is not _INVALID:
+                    return converted
+            problems.append(f"{path}: expected {description}, got {_show(value)}")
+            return _INVALID
+
+        return convert_any
+
+    kind = schema.get("type")
+    if kind in _CONTAINER_COMPILERS:
+        convert_type = _CONTAINER_COMPILERS[kind](schema)
+    else:
+        convert_type = _SCALAR_CONVERTERS.get(kind)
+
+    if "enum" not in schema:
+        return convert_type or (lambda value, path, problems: value)
+
+    allowed = list(schema["enum"])
+    description = _describe(schema)
+
+    def convert_enum(value, path, problems):
+        if convert_type is not None:
+            value = convert_type(value, path, problems)
+            if value is _INVALID:
+                return _INVALID
+        if value in allowed and not (isinstance(value, bool) and any(type(option) is not bool for option in allowed)):
+            return value
+        # A value of mixed enums sent as a string, e.g. "2" for 2
+        matches = [option for option in allowed if str(option) == str(value)]
+        if len(matches) == 1:
+            return matches[0]
+        problems.append(f"{path}: expected {description}, got {_show(value)}")
+        return _INVALID
+
+    return convert_enum
+
+
+def enum_parameters(func: Callable) -> Dict[str, type]:
+    """
+    The parameters of a function annotated with an Enum class (or Optional of one), by name.
+
+    Only imported functions are inspected: the annotations of a lazy tool are not evaluated, so it receives the plain
+    values, which a str or int Enum compares equal to.
+    """
+    if isinstance(func, (functools.partial, functools.partialmethod)):
+        func = func.func
+    if not (inspect.isfunction(func) or inspect.ismethod(func)):
+        return {}
+    try:
+        hints = typing.get_type_hints(func)
+    except Exception as e:
+        logger.debug(f"Cannot resolve the annotations of '{func.__name__}': {e}")
+        return {}
+    enums = {}
+    for name, annotation in hints.items():
+        options = [arg for arg in typing.get_args(annotation) if arg is not type(None)] \
+            if typing.get_origin(annotation) is typing.Union else [annotation]
+        if len(options) == 1 and isinstance(options[0], type) and issubclass(options[0], enum.Enum):
+            enums[name] = options[0]
+    return enums
+
+
+def compile_validator(func_name: str, parameters: Optional[Dict],
+                      enums: Optional[Dict[str, type]] = None) -> Callable[[Any], Dict]:
+    """
+    Compiles the 'parameters' schema of a tool into a validator of the arguments the model sends for it.
+
+    The validator takes the arguments as the JSON string of the tool call (or a dict) and returns them as a dict of
+    keyword arguments, coerced to the types of the schema: numeric strings become integers or numbers, "true" and
+    "false" booleans, JSON strings arrays and objects, and numbers strings. Optional arguments sent as null are left
+    out so that the function's default applies, and parameters listed in enums are converted to their Enum members.
+    Anything else that does not match the schema (invalid JSON, unknown or missing arguments, wrong types, values
+    outside an enum) raises a ToolArgumentError listing every problem, along with the arguments the tool accepts.
+
+    Args:
+        func_name (str): Name of the tool, for error messages.
+        parameters (Dict | None): The 'parameters' JSON schema of the tool, as generated by FunctionDefinitionParser.
+        enums (Dict[str, type] | None): Enum classes of parameters, from `enum_parameters`.
+
+    Returns:
+        Callable: The validator.
+    """
+    parameters = parameters or {}
+    properties = parameters.get("properties", {})
+    required = [name for name in parameters.get("required", []) if name in properties]
+    converters = {name: _compile(schema) for name, schema in properties.items()}
+    enums = enums or {}
+    usage = ", ".join(f"{name} ({_describe(schema)}{', required' if name in required else ''})"
+                      for name, schema in properties.items())
+
+    def validate(arguments) -> Dict:
+        if arguments is None or (isinstance(arguments, str) and not arguments.strip()):
+            arguments = {}
+        elif isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except ValueError as e:
+                raise ToolArgumentError(func_name, [f"the arguments are not valid JSON ({e})"], usage) from None
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(func_name, [f"the arguments must be a JSON object, got {_show(arguments)}"], usage)
+
+        problems = []
+        validated = {}
+        for name, value in arguments.items():
+            if name not in converters:
+                problems.append(f"unexpected argument '{name}'")
+                continue
+            if value is None and name not in required:
+                continue
+            converted = converters[name](value, name, problems)
+            if converted is _INVALID:
+                continue
+            if name in enums:
+                try:
+                    converted = enums[name](converted)
+                except ValueError:
+                    values = ", ".join(_show(member.value) for member in enums[name])
+                    problems.append(f"{name}: expected one of {values}, got {_show(converted)}")
+                    continue
+            validated[name] = converted
+        problems.extend(f"missing required argument '{name}'" for name in required if name not in arguments)
+        if problems:
+            raise ToolArgumentError(func_name, problems, usage)
+        return validated
+
+    return validate
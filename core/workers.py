@@ -0,0 +1,510 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import wait as wait_for_connections
+from typing import Callable, Dict, List, Optional
+
+from core.deadline import RunTimeout
+from core.streaming import ResponseStream
+from core.tracing import LatencyHistograms
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class WorkerError(RuntimeError):
+    """A request failed in a worker process, or the worker exited before answering it."""
+
+
+class WorkerResponse:
+    """
+    The answer of a polled run made by a worker, shaped like the page returned by messages.list: `data[0]` is the
+    assistant Message, and `data` is empty if the run did not complete.
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+    @property
+    def data(self) -> list:
+        return [self.message] if self.message is not None else []
+
+
+class _SerialExecutor:
+    """Runs jobs on a thread pool, one at a time and in submission order for jobs sharing a key."""
+
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+        self._queues: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        if key is None:
+            self.executor.submit(self._call, fn, args)
+            return
+        with self._lock:
+            if key in self._queues:
+                self._queues[key].append((fn, args))
+                return
+            self._queues[key] = deque()
+        self.executor.submit(self._drain, key, fn, args)
+
+    def _drain(self, key, fn, args):
+        while True:
+            self._call(fn, args)
+            with self._lock:
+                pending = self._queues[key]
+                if not pending:
+                    del self._queues[key]
+                    return
+                fn, args = pending.popleft()
+
+    @staticmethod
+    def _call(fn, args):
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception("Worker job failed")
+
+
+def _worker_main(index, manager_factory, concurrency, conn):
+    """
+    Entry point of a worker process: builds its own manager and answers the requests received on `conn`.
+
+    Runs of one thread are executed in the order they were received; other requests run concurrently on up to
+    `concurrency` threads. Health checks are answered from the receiving loop, so they are served even when every
+    request thread is busy.
+    """
+    manager = manager_factory()
+    histograms = LatencyHistograms()
+    manager.tracer.add_exporter(histograms)
+    send_lock = threading.Lock()
+    counters = {"handled": 0, "failed": 0, "in_flight": 0}
+    counters_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def run(request_id, handler, *args):
+        with counters_lock:
+            counters["in_flight"] += 1
+        try:
+            send(("result", request_id, handler(request_id, *args)))
+            outcome = "handled"
+        except RunTimeout as e:
+            send(("error", request_id, e))
+            outcome = "failed"
+        except Exception as e:
+            logger.error(f"Request {request_id} failed in worker {index}: {e}")
+            send(("error", request_id, WorkerError(f"{type(e).__name__}: {e}")))
+            outcome = "failed"
+        with counters_lock:
+            counters["in_flight"] -= 1
+            counters[outcome] += 1
+
+    def answer(request_id, options):
+        stream = options.pop("stream", False)
+        response = manager.get_assistant_response(stream=stream, **options)
+        if stream:
+            for chunk in response:
+                send(("delta", request_id, chunk))
+            return response.message
+        if response is None or len(response.data) == 0:
+            return None
+        return response.data[0]
+
+    def call(request_id, method, args):
+        return getattr(manager, method)(*args)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"worker-{index}")
+    serial = _SerialExecutor(executor)
+    send(("ready", os.getpid()))
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                # The supervisor went away
+                break
+            kind = message[0]
+            if kind == "ask":
+                _, request_id, options = message
+                serial.submit(options.get("thread_id"), run, request_id, answer, options)
+            elif kind == "call":
+                _, request_id, method, args, thread_id = message
+                serial.submit(thread_id, run, request_id, call, method, args)
+            elif kind == "ping":
+                with counters_lock:
+                    stats = dict(counters, pid=os.getpid(), histograms=histograms.snapshot())
+                send(("pong", message[1], stats))
+            elif kind == "stop":
+                break
+    finally:
+        executor.shutdown(wait=True)
+        stop = getattr(manager.run_poller, "stop", None)
+        if stop is not None:
+            stop()
+        conn.close()
+
+
+class _Pending:
+    def __init__(self, worker, stream):
+        self.worker = worker
+        self.future = Future()
+        self.deltas = queue.Queue() if stream else None
+
+
+class _Worker:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.send_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.pid = None
+        self.started_at = None
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.last_pong = None
+        self.stats = {}
+        self.histograms = []
+        # Counters of the worker's previous processes
+        self.retired = {"handled": 0, "failed": 0}
+
+
+class WorkerPool:
+    """
+    Supervisor of N worker processes, each with its own AssistantManager, so CPU-bound tool work (HTML parsing, JSON
+    handling) uses several cores instead of contending for one GIL.
+
+    Requests on an existing thread are routed to the worker selected by a hash of the thread_id, which runs them in
+    order; requests creating a new thread go to the least busy worker. Workers are pinged every `health_interval`
+    seconds: a worker that exited is restarted, with an increasing delay when it keeps crashing, and one that stops
+    answering health checks for `health_timeout` seconds is killed and restarted. Requests in flight on a worker that
+    exits fail with WorkerError.
+
+    The pool offers the part of the AssistantManager interface used by AssistantHTTPServer (get_assistant_response,
+    create_thread, delete_thread), so it can serve in its place. Metrics of all workers are aggregated by stats() and
+    render().
+    """
+
+    thread_pool = None
+
+    def __init__(self, manager_factory: Callable, workers: Optional[int] = None, concurrency=8,
+                 health_interval=5.0, health_timeout=30.0, start_timeout=60.0, start_method="spawn"):
+        """
+        Args:
+            manager_factory (Callable): Picklable callable returning the AssistantManager of a worker, called once in
+                each worker process, e.g. a module-level function.
+            workers (int | None): Number of worker processes. If None, one per CPU.
+            concurrency (int): Requests each worker processes at the same time. Default is 8.
+            health_interval (float): Seconds between health checks. Default is 5 seconds.
+            health_timeout (float): Seconds without an answer to health checks after which a worker is restarted.
+            start_timeout (float): Seconds a request waits for its worker to (re)start before failing.
+            start_method (str): multiprocessing start method. Default is 'spawn', which is safe with threads.
+        """
+        self.manager_factory = manager_factory
+        self.concurrency = concurrency
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.start_timeout = start_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._workers = [_Worker(index) for index in range(workers or os.cpu_count() or 1)]
+        self._pending: Dict[int, _Pending] = {}
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._retired = LatencyHistograms()
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # -- Lifecycle
+
+    def start(self, wait=True):
+        """Starts the workers and the supervisor threads. If wait is True, blocks until every worker is ready."""
+        for worker in self._workers:
+            self._spawn(worker)
+        for target, name in ((self._receive_loop, "worker-pool-receiver"), (self._monitor_loop, "worker-pool-monitor")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if wait:
+            for worker in self._workers:
+                if not worker.ready.wait(self.start_timeout):
+                    raise WorkerError(f"Worker {worker.index} did not start within {self.start_timeout} seconds")
+        return self
+
+    def shutdown(self, timeout=10.0):
+        """Stops the workers, letting them finish the requests they are processing for up to `timeout` seconds."""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            self._send(worker, ("stop",))
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(max(0.0, deadline - time.monotonic()))
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+        for thread in self._threads:
+            thread.join(timeout=self.health_interval + 1)
+        self._fail_pending(None, WorkerError("The worker pool was shut down"))
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe(duplex=True)
+        process = self._context.Process(target=_worker_main, name=f"assistant-worker-{worker.index}",
+                                        args=(worker.index, self.manager_factory, self.concurrency, child_conn),
+                                        daemon=True)
+        worker.ready.clear()
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+        worker.started_at = time.monotonic()
+        worker.last_pong = time.monotonic()
+        logger.info(f"Started worker {worker.index} (pid {process.pid})")
+
+    # -- Requests
+
+    def get_assistant_response(self, instructions, user_message, file_ids=None, thread_id=None, check_interval=5,
+                               max_wait_time=None, stream=False, use_cache=True, request_id=None):
+        """
+        Answers a message on a worker; same arguments as AssistantManager.get_assistant_response.
+
+        Returns:
+            WorkerResponse: When polling, the final assistant Message as `data[0]`.
+            ResponseStream: When streaming, an iterable of the text deltas relayed from the worker.
+
+        Raises:
+            WorkerError: If the request failed in the worker or the worker exited.
+            RunTimeout: If the run passed its deadline.
+        """
+        options = {"instructions": instructions, "user_message": user_message, "file_ids": file_ids,
+                   "thread_id": thread_id, "check_interval": check_interval, "max_wait_time": max_wait_time,
+                   "stream": stream, "use_cache": use_cache, "request_id": request_id}
+        pending = self._submit(thread_id, stream, lambda pipe_id: ("ask", pipe_id, options))
+        if stream:
+            return ResponseStream(self._relay(pending))
+        return WorkerResponse(pending.future.result())
+
+    def create_thread(self):
+        """Creates a conversation thread from the least busy worker."""
+        return self._call(None, "create_thread")
+
+    def delete_thread(self, thread_id):
+        """Deletes a thread from the worker running its requests, after those already queued."""
+        return self._call(thread_id, "delete_thread", thread_id)
+
+    def resume_runs(self) -> dict:
+        """Finishes the runs left unfinished in the run journal by a previous server, on the least busy worker."""
+        return self._call(None, "resume_runs")
+
+    def worker_for(self, thread_id) -> int:
+        """Index of the worker serving a thread."""
+        return zlib.crc32(thread_id.encode()) % len(self._workers)
+
+    def _call(self, thread_id, method, *args):
+        pending = self._submit(thread_id, False, lambda request_id: ("call", request_id, method, args, thread_id))
+        return pending.future.result()
+
+    def _submit(self, thread_id, stream, build_message) -> _Pending:
+        worker = self._workers[self.worker_for(thread_id)] if thread_id else self._least_busy()
+        if not worker.ready.wait(self.start_timeout):
+            raise WorkerError(f"Worker {worker.index} is not running")
+        request_id = next(self._request_ids)
+        pending = _Pending(worker, stream)
+        with self._lock:
+            self._pending[request_id] = pending
+        if not self._send(worker, build_message(request_id)):
+            self._resolve(request_id, error=WorkerError(f"Worker {worker.index} is not running"))
+        return pending
+
+    def _least_busy(self) -> _Worker:
+        with self._lock:
+            load = {worker.index: 0 for worker in self._workers}
+            for pending in self._pending.values():
+                load[pending.worker.index] += 1
+        ready = [worker for worker in self._workers if worker.ready.is_set()] or self._workers
+        return min(ready, key=lambda worker: load[worker.index])
+
+    def _send(self, worker: _Worker, message) -> bool:
+        try:
+            with worker.send_lock:
+                worker.conn.send(message)
+            return True
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"Failed to send to worker {worker.index}: {e}")
+            return False
+
+    @staticmethod
+    def _relay(pending: _Pending):
+        # Yields the deltas relayed by the receiver thread and returns the final Message
+        while True:
+            chunk = pending.deltas.get()
+            if chunk is _DONE:
+                break
+            yield chunk
+        return pending.future.result()
+
+    def _resolve(self, request_id, result=None, error=None):
+        with self._lock:
+            pending = self._pending.pop(request_id, None)
+        if pending is None:
+            return
+        if error is not None:
+            pending.future.set_exception(error)
+        else:
+            pending.future.set_result(result)
+        if pending.deltas is not None:
+            pending.deltas.put(_DONE)
+
+    def _fail_pending(self, worker: Optional[_Worker], error: Exception):
+        with self._lock:
+            request_ids = [request_id for request_id, pending in self._pending.items()
+                           if worker is None or pending.worker is worker]
+        for request_id in request_ids:
+            self._resolve(request_id, error=error)
+
+    # -- Supervision
+
+    def _receive_loop(self):
+        while not self._stopping.is_set():
+            connections = {worker.conn: worker for worker in self._workers
+                           if worker.conn is not None and not worker.conn.closed}
+            if not connections:
+                time.sleep(0.1)
+                continue
+            try:
+                ready = wait_for_connections(list(connections), timeout=0.5)
+            except (OSError, ValueError):
+                # A connection was closed by the monitor while waiting
+                continue
+            for conn in ready:
+                worker = connections[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._on_exit(worker)
+                    continue
+                self._dispatch(worker, message)
+
+    def _dispatch(self, worker: _Worker, message):
+        kind = message[0]
+        if kind == "delta":
+            with self._lock:
+                pending = self._pending.get(message[1])
+            if pending is not None and pending.deltas is not None:
+                pending.deltas.put(message[2])
+        elif kind == "result":
+            self._resolve(message[1], result=message[2])
+        elif kind == "error":
+            self._resolve(message[1], error=message[2])
+        elif kind == "pong":
+            worker.last_pong = time.monotonic()
+            worker.histograms = message[2].pop("histograms")
+            worker.stats = message[2]
+        elif kind == "ready":
+            worker.pid = message[1]
+            worker.last_pong = time.monotonic()
+            worker.ready.set()
+            logger.info(f"Worker {worker.index} is ready")
+
+    def _on_exit(self, worker: _Worker):
+        """Called by the receiver when a worker's connection breaks: fails its requests and wakes the monitor."""
+        worker.ready.clear()
+        worker.conn.close()
+        if self._stopping.is_set():
+            return
+        exitcode = None
+        if worker.process is not None:
+            worker.process.join(timeout=1)
+            exitcode = worker.process.exitcode
+        logger.error(f"Worker {worker.index} (pid {worker.pid}) exited with code {exitcode}")
+        self._fail_pending(worker, WorkerError(f"Worker {worker.index} exited while processing the request"))
+        self._wakeup.set()
+
+    def _monitor_loop(self):
+        pings = itertools.count()
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            for worker in self._workers:
+                if self._stopping.is_set():
+                    return
+                alive = worker.process is not None and worker.process.is_alive()
+                if alive and worker.ready.is_set() and now - worker.last_pong > self.health_timeout:
+                    logger.error(f"Worker {worker.index} failed its health checks; restarting it")
+                    worker.process.kill()
+                    worker.process.join()
+                    alive = False
+                if not alive:
+                    self._restart(worker)
+                elif worker.ready.is_set():
+                    self._send(worker, ("ping", next(pings)))
+            self._wakeup.wait(self.health_interval)
+            self._wakeup.clear()
+
+    def _restart(self, worker: _Worker):
+        if worker.conn is not None and not worker.conn.closed:
+            # The receiver has not seen the exit yet
+            self._on_exit(worker)
+        # Folds the metrics of the exited process into the totals before they are replaced
+        self._retired.merge(worker.histograms)
+        worker.histograms = []
+        for key in worker.retired:
+            worker.retired[key] += worker.stats.get(key, 0)
+        worker.stats = {}
+        uptime = time.monotonic() - worker.started_at
+        worker.consecutive_failures = worker.consecutive_failures + 1 if uptime < 30 else 1
+        backoff = min(30.0, 0.5 * 2 ** (worker.consecutive_failures - 1))
+        if self._stopping.wait(backoff):
+            return
+        worker.restarts += 1
+        self._spawn(worker)
+
+    # -- Metrics
+
+    def stats(self) -> Dict:
+        """Per-worker state and counters from the latest health check, and their totals."""
+        workers = []
+        for worker in self._workers:
+            alive = worker.process is not None and worker.process.is_alive()
+            workers.append({"index": worker.index, "pid": worker.pid, "alive": alive, "ready": worker.ready.is_set(),
+                            "restarts": worker.restarts, "in_flight": worker.stats.get("in_flight", 0),
+                            **{key: worker.stats.get(key, 0) + worker.retired[key] for key in worker.retired}})
+        with self._lock:
+            pending = len(self._pending)
+        totals = {key: sum(worker[key] for worker in workers) for key in ("handled", "failed", "in_flight", "restarts")}
+        return {"workers": workers, "alive": sum(worker["alive"] for worker in workers), "pending": pending, **totals}
+
+    def histograms(self) -> LatencyHistograms:
+        """Phase latency histograms of all workers, including those of restarted processes."""
+        merged = LatencyHistograms()
+        merged.merge(self._retired.snapshot())
+        for worker in self._workers:
+            merged.merge(worker.histograms)
+        return merged
+
+    def render(self) -> str:
+        """Aggregated metrics in the Prometheus text format, so the pool can be passed to serve_metrics."""
+        lines = ["# HELP assistant_worker_up Whether the worker process is running.",
+                 "# TYPE assistant_worker_up gauge"]
+        stats = self.stats()
+        for worker in stats["workers"]:
+            lines.append(f'assistant_worker_up{{worker="{worker["index"]}"}} {int(worker["alive"])}')
+        for name, key, kind in (("assistant_worker_restarts_total", "restarts", "counter"),
+                                ("assistant_worker_requests_total", "handled", "counter"),
+                                ("assistant_worker_failures_total", "failed", "counter"),
+                                ("assistant_worker_in_flight", "in_flight", "gauge")):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f'{name}{{worker="{worker["index"]}"}} {worker[key]}' for worker in stats["workers"])
+        return "\n".join(lines) + "\n" + self.histograms().render()
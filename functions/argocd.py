@@ -1,6 +1,8 @@
 from connectors.argocd_controller import ArgoCDController
+from core.tools import tool
 
 
+@tool
 def get_available_applications() -> dict:
     """Retrieve the names of all ArgoCD applications available on the Kubernetes cluster.
 
@@ -12,6 +14,7 @@ def get_available_applications() -> dict:
     return controller.get_all_applications()
 
 
+@tool
 def deploy_application(manifest_path: str) -> dict:
     """Deploy an ArgoCD application on the Kubernetes cluster using a manifest file.
 
@@ -25,6 +28,7 @@ def deploy_application(manifest_path: str) -> dict:
     return controller.deploy_argocd_application(manifest_path)
 
 
+@tool
 def get_application_status(app_name: str) -> dict:
     """Retrieve the health and sync status of a specific ArgoCD application.
 
@@ -38,6 +42,7 @@ def get_application_status(app_name: str) -> dict:
     return controller.get_argocd_application_status(app_name)
 
 
+@tool
 def delete_application(app_name: str) -> dict:
     """Delete an ArgoCD application from the Kubernetes cluster.
 
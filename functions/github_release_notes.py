@@ -1,7 +1,10 @@
-import requests
 import json
 
+from core.http_client import get_http_client
+from core.tools import tool
 
+
+@tool
 def get_latest_version(repo_name: str) -> str:
     """Fetches the latest release version of a specified GitHub repository.
 
@@ -14,7 +17,7 @@ def get_latest_version(repo_name: str) -> str:
     :return: A JSON-formatted string.
     """
     url = f"https://api.github.com/repos/{repo_name}/releases/latest"
-    response = requests.get(url)
+    response = get_http_client().get(url)
     if response.status_code == 200:
         data = response.json()
         return json.dumps({"latest_version": data["tag_name"], "repo": repo_name})
@@ -22,6 +25,7 @@ def get_latest_version(repo_name: str) -> str:
         return json.dumps({"error": "Could not fetch the latest version"})
 
 
+@tool
 def get_release_notes(repo_name: str, version: str) -> str:
     """Retrieves the release notes for a specific version of a GitHub repository.
 
@@ -37,7 +41,7 @@ def get_release_notes(repo_name: str, version: str) -> str:
     :return: A JSON-formatted string. If successful, it includes 'version' with the specified version and 'release_notes' with the text of the release notes. On failure, it returns an 'error' message.
     """
     url = f"https://api.github.com/repos/{repo_name}/releases/tags/{version}"
-    response = requests.get(url)
+    response = get_http_client().get(url)
     if response.status_code == 200:
         data = response.json()
         return json.dumps({"version": version, "release_notes": data["body"]})
@@ -1,6 +1,7 @@
 from connectors.kubernetes_changelog import KubernetesChangelog
 import json
 import config
+from core.tools import tool
 
 changelog = KubernetesChangelog(
     host=config.kubernetes_changelog_db_host,
@@ -11,6 +12,7 @@ changelog = KubernetesChangelog(
 )
 
 
+@tool
 def query_by_version(version):
     """Retrieve detailed information about a specific Kubernetes release changelog.
 
@@ -1,8 +1,10 @@
 import json
-import requests
 import config
+from core.http_client import get_http_client
+from core.tools import tool
 
 
+@tool
 def get_weather(city):
     """Fetch the current weather for a given city using OpenWeatherMap API. The output should be in Markdown format.
 
@@ -14,8 +16,8 @@ def get_weather(city):
     :return: A JSON-formatted string containing the weather information.
     """
     try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={config.openweathermap_key}&units=metric"
-        response = requests.get(url)
+        url = "https://api.openweathermap.org/data/2.5/weather"
+        response = get_http_client().get(url, params={"q": city, "appid": config.openweathermap_key, "units": "metric"})
         return response.json()
     except Exception as e:
         return json.dumps({"error": f"Error occurred while fetching weather data: {e}"})
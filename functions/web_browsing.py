@@ -1,14 +1,22 @@
 import json
 
+import config
 from connectors.duck_duck_go_search import DuckDuckGoSearchManager
 from connectors.google_search import GoogleSearchManager
 from connectors.web_scraper import WebContentScraper
+from core.tools import tool
 
 ddg = DuckDuckGoSearchManager()
 gs = GoogleSearchManager()
-scraper = WebContentScraper()
+scraper = WebContentScraper(max_concurrency=config.scrape_concurrency, max_per_host=config.scrape_per_host,
+                            connect_timeout=config.scrape_connect_timeout, read_timeout=config.scrape_read_timeout,
+                            budget=config.scrape_budget)
 
+# Search results requested per page wanted, so that pages that fail to load or have no usable text can be replaced
+SEARCH_CANDIDATES_PER_RESULT = 2
 
+
+@tool
 def text_search(query: str, num_results: int = 3) -> str:
     """Conducts a general web text search and retrieves information from the internet in response to user queries.
 
@@ -24,11 +32,14 @@ def text_search(query: str, num_results: int = 3) -> str:
     :return: A JSON-formatted string. Each element in the JSON represents the result of scraping a single URL,
     containing either the scraped content or an error message.
     """
-    urls = ddg.text_search(query, int(num_results))
-    scraped_data = scraper.scrape_multiple_websites(urls)
+    num_results = int(num_results)
+    # Pages are fetched as the search returns their URLs; the call returns once num_results pages had good content
+    urls = ddg.iter_text_search(query, max_results=num_results * SEARCH_CANDIDATES_PER_RESULT)
+    scraped_data = scraper.scrape_first(urls, num_results)
     return scraped_data
 
 
+@tool
 def news_search(query, num_results=5):
     """Conducts a search for news articles and retrieves information from the internet in response to user queries.
 
@@ -44,12 +55,15 @@ def news_search(query, num_results=5):
     :return: A JSON-formatted string. Each element in the JSON represents the result of scraping a single URL,
     containing either the scraped content or an error message.
     """
-    # urls = ddg.news_search(query, int(num_results)) # DuckDuckGo search
-    urls = gs.google_search(query, int(num_results))  # Google search
-    scraped_data = scraper.scrape_multiple_websites(urls)
+    num_results = int(num_results)
+    # Pages are fetched as the search returns their URLs; the call returns once num_results pages had good content
+    # urls = ddg.iter_news_search(query, max_results=num_results * SEARCH_CANDIDATES_PER_RESULT)  # DuckDuckGo search
+    urls = gs.iter_google_search(query, max_results=num_results * SEARCH_CANDIDATES_PER_RESULT)  # Google search
+    scraped_data = scraper.scrape_first(urls, num_results)
     return scraped_data
 
 
+@tool
 def images_search(query, num_results=3):
     """Performs the image search for a specific query. For example, "puppies". If possible, the output should be in Markdown format.
 
@@ -65,6 +79,7 @@ def images_search(query, num_results=3):
     return image_info
 
 
+@tool
 def videos_search(query, num_results=3):
     """Performs the video for a specific query. For example, "video tutorial for Excel pivot table". If possible, the output should be in Markdown format.
 
@@ -80,6 +95,7 @@ def videos_search(query, num_results=3):
     return video_info
 
 
+@tool
 def maps_search(query, place, num_results=3):
     """Performs the location for a specific query. For example, "Italian restaurant in Berlin". If possible, the output should be in Markdown format.
 
@@ -95,6 +111,7 @@ def maps_search(query, place, num_results=3):
     return map_info
 
 
+@tool
 def webpage_scraper(url):
     """Scrape a webpage for its text content.
 
@@ -11,8 +11,9 @@ def ask_assistant(query=None):
         thread_id=thread_id,
         instructions=system_prompt,
         user_message=query,
+        stream=True,
     )
-    return response.data[0].content[0].text.value
+    return response
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+from core.http_server import AssistantHTTPServer
+from core.tracing import serve_metrics
+from core.workers import WorkerPool
+from prompts import system_prompt
+import config
+import threading
+
+
+def load_assistant():
+    """Builds the AssistantManager of a worker process."""
+    from assistant_initialization import assistant
+    return assistant
+
+
+if __name__ == "__main__":
+    # With SERVER_WORKERS set, runs are answered by that many worker processes, sharded by thread
+    pool = None
+    if config.server_workers > 0:
+        pool = WorkerPool(load_assistant, workers=config.server_workers,
+                          concurrency=config.server_worker_concurrency).start()
+        if config.metrics_port:
+            serve_metrics(pool, port=config.metrics_port)
+        manager = pool
+    else:
+        manager = load_assistant()
+
+    # Runs left in flight by a previous server are finished in the background instead of being paid for again
+    threading.Thread(target=manager.resume_runs, name="resume-runs", daemon=True).start()
+
+    server = AssistantHTTPServer(
+        manager,
+        instructions=system_prompt,
+        host=config.server_host,
+        port=config.server_port,
+        max_concurrent_runs=config.server_max_concurrent_runs,
+        queue_timeout=config.server_queue_timeout,
+        max_sessions=config.server_max_sessions,
+        session_idle_timeout=config.server_session_idle_timeout
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+        if pool is not None:
+            pool.shutdown()
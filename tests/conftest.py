@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.fake_api import FakeAssistantsAPI
+from core.assistant import AssistantManager
+from core.async_assistant import AsyncAssistantManager
+
+
+def get_weather(city: str):
+    """
+    Get the current weather for a city.
+    :param city: The city name.
+    """
+    return {"city": city, "temperature": 21, "conditions": "clear"}
+
+
+def text_search(query: str):
+    """
+    Search the web for a query.
+    :param query: The search query.
+    """
+    return [{"title": f"Result for {query}", "href": "https://example.com", "body": "Lorem ipsum " * 20}]
+
+
+@pytest.fixture
+def wait_until():
+    """Polls a condition until it holds or the timeout passes, and returns its last value."""
+    def wait(condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.02)
+        return condition()
+
+    return wait
+
+
+@pytest.fixture
+def fake_api():
+    """Starts a FakeAssistantsAPI with fast runs. Call it with FakeAssistantsAPI arguments; the URL is returned."""
+    servers = []
+
+    def start(**options):
+        options = {"queue_delay": 0.02, "model_delay": 0.02, "stream_chunk_delay": 0.0, **options}
+        api = FakeAssistantsAPI(**options)
+        servers.append(api)
+        return api, api.start()
+
+    yield start
+    for api in servers:
+        api.stop()
+
+
+@pytest.fixture
+def make_manager(fake_api):
+    """
+    Builds AssistantManagers against a fake API, stopped at the end of the test. A new fake API is started unless an
+    earlier one is passed as `api`, e.g. to restart a manager against the same server.
+    """
+    managers = []
+    base_urls = {}
+
+    def make(api_options=None, api=None, **options):
+        if api is None:
+            api, base_url = fake_api(**(api_options or {}))
+            base_urls[id(api)] = base_url
+        else:
+            base_url = base_urls[id(api)]
+        options.setdefault("functions", [get_weather, text_search])
+        manager = AssistantManager(api_key="sk-test", assistant_id="asst_test", base_url=base_url, **options)
+        managers.append(manager)
+        return api, manager
+
+    yield make
+    for manager in managers:
+        if manager.thread_pool is not None:
+            manager.thread_pool.close(delete_threads=False)
+        manager.run_poller.stop()
+        manager.tool_executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def run_async_manager(fake_api):
+    """
+    Runs a coroutine function `test(api, manager)` on a new event loop with an AsyncAssistantManager against a fake
+    API, and returns its result. The manager is closed on the same loop.
+    """
+    def run(test, api_options=None, **options):
+        api, base_url = fake_api(**(api_options or {}))
+        options.setdefault("functions", [get_weather, text_search])
+
+        async def main():
+            manager = AsyncAssistantManager(api_key="sk-test", assistant_id="asst_test", base_url=base_url, **options)
+            try:
+                return await test(api, manager)
+            finally:
+                await manager.close()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,82 @@
+from core.answer_cache import AnswerCache, CachedResponse, normalize_message
+from core.cache import ToolResultCache
+
+QUESTION = "What is the weather in Paris?"
+
+
+def ask(manager, question=QUESTION, **options):
+    return manager.get_assistant_response("Be brief.", question, check_interval=0.1, max_wait_time=10, **options)
+
+
+def test_messages_are_normalized():
+    assert normalize_message("What is  the Weather in Paris?! ") == normalize_message("what is the weather in paris")
+
+
+def test_an_invalidated_tool_drops_only_the_answers_that_used_it():
+    cache = AnswerCache()
+    snapshot = cache.snapshot(["get_weather", "text_search"])
+    cache.put("weather", {"id": "msg_1"}, snapshot, tools_used=["get_weather"])
+    cache.put("search", {"id": "msg_2"}, snapshot, tools_used=["text_search"])
+    cache.put("no-tools", {"id": "msg_3"}, snapshot)
+
+    cache.invalidate("get_weather")
+
+    assert cache.get("weather") is None
+    assert cache.get("search") == {"id": "msg_2"}
+    assert cache.get("no-tools") == {"id": "msg_3"}
+
+
+def test_answers_of_runs_that_overlapped_a_change_are_not_stored():
+    cache = AnswerCache()
+    snapshot = cache.snapshot(["get_weather"])
+
+    cache.invalidate("get_weather")
+    cache.put("weather", {"id": "msg_1"}, snapshot, tools_used=["get_weather"])
+    cleared = cache.snapshot(["get_weather"])
+    cache.invalidate()
+    cache.put("other", {"id": "msg_2"}, cleared)
+
+    assert cache.get("weather") is None
+    assert cache.get("other") is None
+    assert cache.stats()["stored"] == 0
+
+
+def test_a_repeated_question_is_answered_from_the_cache(make_manager):
+    api, manager = make_manager({"tool_fanout": 1}, answer_cache=AnswerCache())
+    first = ask(manager)
+
+    second = ask(manager, "what is the weather in paris")
+
+    assert isinstance(second, CachedResponse)
+    assert second.data[0].id == first.data[0].id
+    assert api.request_counts["create_run"] == 1
+
+
+def test_a_change_to_a_tool_used_by_the_answer_invalidates_it(make_manager):
+    tool_cache = ToolResultCache(ttls={"get_weather": 60, "text_search": 60})
+    api, manager = make_manager({"tool_fanout": 1, "tool_names": ("get_weather",)}, answer_cache=AnswerCache(),
+                                tool_cache=tool_cache)
+    ask(manager)
+
+    # The answer did not use text_search
+    tool_cache.invalidate("text_search", {"query": "anything"})
+    assert isinstance(ask(manager), CachedResponse)
+
+    tool_cache.invalidate("get_weather", {"city": "City 0"})
+    assert not isinstance(ask(manager), CachedResponse)
+    assert api.request_counts["create_run"] == 2
+
+
+def test_requests_on_a_thread_never_get_a_cached_answer(make_manager):
+    api, manager = make_manager({"tool_fanout": 0}, answer_cache=AnswerCache())
+    ask(manager)
+    thread_id = manager.create_thread().id
+
+    response = ask(manager, thread_id=thread_id)
+
+    assert not isinstance(response, CachedResponse)
+    assert response.data[0].thread_id == thread_id
+    assert api.request_counts["create_run"] == 2
+    # Nor is the answer on the thread stored for later single-shot requests
+    assert isinstance(ask(manager), CachedResponse)
+    assert manager.answer_cache.stats()["stored"] == 1
@@ -0,0 +1,80 @@
+from core.assistant import FINGERPRINT_METADATA_KEY
+
+INSTRUCTIONS = "Be brief."
+
+
+def get_forecast(city: str, days: int):
+    """
+    Get the weather forecast for a city.
+    :param city: The city name.
+    :param days: Number of days to forecast.
+    """
+    return {"city": city, "days": days}
+
+
+def ask(manager, instructions=INSTRUCTIONS):
+    response = manager.get_assistant_response(instructions, "What is the weather in Paris?", check_interval=0.1,
+                                              max_wait_time=10)
+    return manager.client.beta.threads.runs.retrieve(response.data[0].run_id, thread_id=response.data[0].thread_id)
+
+
+def test_the_fingerprint_covers_the_whole_definition(make_manager):
+    api, manager = make_manager()
+    api, same = make_manager(api=api)
+    api, other_tools = make_manager(api=api, functions=[get_forecast])
+    api, other_model = make_manager(api=api, model="gpt-4-turbo")
+
+    fingerprint = manager.definition_fingerprint(INSTRUCTIONS)
+
+    assert same.definition_fingerprint(INSTRUCTIONS) == fingerprint
+    assert manager.definition_fingerprint("Be verbose.") != fingerprint
+    assert other_tools.definition_fingerprint(INSTRUCTIONS) != fingerprint
+    assert other_model.definition_fingerprint(INSTRUCTIONS) != fingerprint
+
+
+def test_runs_of_a_synced_assistant_do_not_resend_the_definition(make_manager):
+    api, manager = make_manager({"tool_fanout": 0}, sync_definition=True)
+
+    runs = [ask(manager), ask(manager)]
+
+    assistant = api.assistants["asst_test"]
+    assert assistant["metadata"][FINGERPRINT_METADATA_KEY] == manager.definition_fingerprint(INSTRUCTIONS)
+    assert assistant["tools"] == manager.tools and assistant["instructions"] == INSTRUCTIONS
+    assert api.request_counts["get_assistant"] == 1
+    assert api.request_counts["update_assistant"] == 1
+    assert [run.tools for run in runs] == [[], []]
+
+
+def test_an_unchanged_definition_is_not_written_again(make_manager):
+    api, manager = make_manager({"tool_fanout": 0}, sync_definition=True)
+    assert manager.sync_assistant(INSTRUCTIONS)
+    api.reset_counts()
+
+    # A restarted process with the same definition only reads the assistant
+    api, restarted = make_manager(api=api, sync_definition=True)
+
+    assert not restarted.sync_assistant(INSTRUCTIONS)
+    assert api.request_counts["get_assistant"] == 1
+    assert api.request_counts["update_assistant"] == 0
+
+
+def test_a_changed_definition_is_written(make_manager):
+    api, manager = make_manager({"tool_fanout": 0}, sync_definition=True)
+    manager.sync_assistant(INSTRUCTIONS)
+
+    api, changed = make_manager(api=api, sync_definition=True, functions=[get_forecast])
+
+    assert changed.sync_assistant(INSTRUCTIONS)
+    assert [tool["function"]["name"] for tool in api.assistants["asst_test"]["tools"] if tool["type"] == "function"] \
+        == ["get_forecast"]
+
+
+def test_other_instructions_are_sent_as_a_run_override(make_manager):
+    api, manager = make_manager({"tool_fanout": 0}, sync_definition=True)
+
+    synced, overridden = ask(manager), ask(manager, "Answer in French.")
+
+    assert synced.instructions == ""
+    assert overridden.instructions == "Answer in French."
+    assert overridden.tools == []
+    assert api.assistants["asst_test"]["instructions"] == INSTRUCTIONS
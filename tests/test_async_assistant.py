@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.deadline import RunTimeout
+
+
+def test_concurrent_requests_share_one_event_loop(run_async_manager):
+    async def test(api, manager):
+        started = time.monotonic()
+        responses = await asyncio.gather(*(
+            manager.get_assistant_response("Be brief.", f"What is the weather in city {index}?", check_interval=0.1,
+                                           max_wait_time=10)
+            for index in range(8)))
+        return responses, time.monotonic() - started
+
+    api_options = {"queue_delay": 0.3, "model_delay": 0.2, "tool_fanout": 1}
+    responses, elapsed = run_async_manager(test, api_options)
+
+    assert all(messages.data[0].role == "assistant" for messages in responses)
+    assert len({messages.data[0].thread_id for messages in responses}) == 8
+    # One run takes about 0.7 s from queued to completed; eight in sequence would take over 5 s
+    assert elapsed < 3
+
+
+def test_sync_tools_run_on_the_executor(run_async_manager):
+    calls = []
+
+    def get_weather(city: str):
+        """
+        Get the current weather for a city.
+        :param city: The city name.
+        """
+        calls.append(threading.current_thread().name)
+        time.sleep(0.3)
+        return {"city": city}
+
+    async def test(api, manager):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        try:
+            await manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                                 max_wait_time=10)
+        finally:
+            ticker.cancel()
+        return ticks
+
+    ticks = run_async_manager(test, {"tool_fanout": 2, "tool_names": ("get_weather",)}, functions=[get_weather])
+
+    assert len(calls) == 2
+    assert all(name.startswith("assistant-tool") for name in calls)
+    # The loop kept running while the tools slept
+    assert ticks >= 10
+
+
+def test_coroutine_tools_are_awaited_on_the_loop(run_async_manager):
+    calls = []
+
+    async def get_weather(city: str):
+        """
+        Get the current weather for a city.
+        :param city: The city name.
+        """
+        await asyncio.sleep(0.01)
+        calls.append((city, threading.current_thread() is threading.main_thread()))
+        return {"city": city}
+
+    async def test(api, manager):
+        messages = await manager.get_assistant_response("Be brief.", "What is the weather in Paris?",
+                                                        check_interval=0.1, max_wait_time=10)
+        return messages, api.request_counts["submit_tool_outputs"]
+
+    messages, submits = run_async_manager(test, {"tool_fanout": 2, "tool_names": ("get_weather",)},
+                                          functions=[get_weather])
+
+    assert messages.data[0].role == "assistant"
+    assert submits == 1
+    assert sorted(calls) == [("City 0", True), ("City 1", True)]
+
+
+def test_cancel_run(run_async_manager):
+    async def test(api, manager):
+        thread = await manager.create_thread()
+        await manager._add_message_to_thread(thread.id, "user", "What is the weather in Paris?")
+        run = await manager._run_assistant(thread.id, "Be brief.")
+        await manager.cancel_run(run.id, thread.id)
+        return api.runs[run.id]["status"]
+
+    assert run_async_manager(test, {"queue_delay": 5}) == "cancelled"
+
+
+def test_run_past_its_deadline_is_cancelled(run_async_manager):
+    async def test(api, manager):
+        with pytest.raises(RunTimeout) as raised:
+            await manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                                 max_wait_time=0.5)
+        return raised.value, api.runs[raised.value.run_id]["status"]
+
+    timeout, status = run_async_manager(test, {"queue_delay": 5})
+
+    assert timeout.cancelled
+    assert status == "cancelled"
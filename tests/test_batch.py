@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from core.batch import BatchRunner
+
+
+def write_lines(path, *lines):
+    path.write_text("".join(line + "\n" for line in lines))
+    return path
+
+
+def read_results(path):
+    return sorted((json.loads(line) for line in path.read_text().splitlines()), key=lambda record: record["line"])
+
+
+@pytest.fixture
+def files(tmp_path):
+    return tmp_path / "queries.jsonl", tmp_path / "results.jsonl"
+
+
+def test_every_query_gets_a_result_line(make_manager, files):
+    input_path, output_path = files
+    api, manager = make_manager({"tool_fanout": 1})
+    given_thread = manager.create_thread().id
+    write_lines(input_path,
+                json.dumps({"id": "q1", "query": "What is the weather in Paris?"}),
+                "",
+                json.dumps("And in Rome?"),
+                json.dumps({"query": "And in Oslo?", "thread_id": given_thread}),
+                "{not json",
+                json.dumps({"id": "q5"}))
+
+    stats = BatchRunner(manager, "Be brief.", concurrency=2, check_interval=0.1).run(input_path, output_path)
+
+    assert stats == {"skipped": 0, "completed": 3, "invalid": 2}
+    results = read_results(output_path)
+    assert [(record["line"], record["status"]) for record in results] == \
+        [(1, "completed"), (3, "completed"), (4, "completed"), (5, "invalid"), (6, "invalid")]
+    assert results[0]["id"] == "q1" and results[0]["answer"] == api.reply
+    assert results[0]["run_id"] in api.runs
+    assert results[0]["phases"]["run.submit_tool_outputs"] > 0
+    assert results[4]["error"] == "Missing 'query'"
+    # Threads created for the queries are deleted; the one given in the input is kept
+    assert set(api.threads) == {given_thread}
+
+
+def test_a_resumed_batch_skips_the_answered_lines(make_manager, files):
+    input_path, output_path = files
+    api, manager = make_manager({"tool_fanout": 0})
+    write_lines(input_path, *(json.dumps({"query": f"Question {index}"}) for index in range(1, 5)))
+    # A crash left two results and half of a third
+    output_path.write_text(json.dumps({"line": 1, "status": "completed"}) + "\n" +
+                           json.dumps({"line": 3, "status": "completed"}) + "\n" + '{"line": 2, "sta')
+
+    stats = BatchRunner(manager, "Be brief.", check_interval=0.1).run(input_path, output_path)
+
+    assert stats == {"skipped": 2, "completed": 2}
+    assert [record["line"] for record in read_results(output_path)] == [1, 2, 3, 4]
+    assert api.request_counts["create_run"] == 2
+
+
+def test_the_result_is_written_before_the_thread_is_deleted(make_manager, files, monkeypatch):
+    input_path, output_path = files
+    api, manager = make_manager({"tool_fanout": 0})
+    write_lines(input_path, json.dumps({"query": "What is the weather in Paris?"}))
+    written_at_deletion = []
+    delete_thread = manager.delete_thread
+
+    def record_and_delete(thread_id):
+        written_at_deletion.append([record["thread_id"] for record in read_results(output_path)])
+        delete_thread(thread_id)
+
+    monkeypatch.setattr(manager, "delete_thread", record_and_delete)
+
+    BatchRunner(manager, "Be brief.", check_interval=0.1).run(input_path, output_path)
+
+    thread_id = read_results(output_path)[0]["thread_id"]
+    assert written_at_deletion == [[thread_id]]
+    assert thread_id not in api.threads
+
+
+def test_failing_and_late_queries_do_not_stop_the_batch(make_manager, files, monkeypatch):
+    input_path, output_path = files
+    api, manager = make_manager({"queue_delay": 5})
+    write_lines(input_path, *(json.dumps({"query": query}) for query in ("slow", "broken", "slow")))
+    get_assistant_response = manager.get_assistant_response
+
+    def fail_on_broken(**options):
+        if options["user_message"] == "broken":
+            raise RuntimeError("connection reset")
+        return get_assistant_response(**options)
+
+    monkeypatch.setattr(manager, "get_assistant_response", fail_on_broken)
+
+    stats = BatchRunner(manager, "Be brief.", concurrency=3, check_interval=0.1, max_wait_time=0.3).run(
+        input_path, output_path)
+
+    assert stats == {"skipped": 0, "timeout": 2, "error": 1}
+    results = read_results(output_path)
+    assert results[1]["error"] == "RuntimeError: connection reset"
+    assert results[0]["cancelled"] is True
+    assert api.runs[results[0]["run_id"]]["status"] == "cancelled"
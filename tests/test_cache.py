@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+
+import core.cache
+from core.cache import MemoryCacheBackend, SQLiteCacheBackend, ToolResultCache, _MISSING, canonical_call_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the time seen by core.cache with a clock the test advances by hand."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(core.cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_entries=3):
+        if request.param == "memory":
+            return MemoryCacheBackend(max_entries=max_entries)
+        return SQLiteCacheBackend(tmp_path / "cache.db", max_entries=max_entries)
+
+    return make
+
+
+def test_call_keys_do_not_depend_on_argument_order():
+    assert canonical_call_key("get_weather", {"city": "Paris", "units": "C"}) == \
+        canonical_call_key("get_weather", {"units": "C", "city": "Paris"})
+    assert canonical_call_key("get_weather", {"city": "Paris"}) != canonical_call_key("text_search", {"city": "Paris"})
+
+
+def test_entries_expire_after_their_ttl(make_backend, clock):
+    backend = make_backend()
+    backend.set("short", {"value": 1}, ttl=10)
+    backend.set("forever", {"value": 2}, ttl=None)
+
+    clock.now += 9
+    assert backend.get("short") == {"value": 1}
+    clock.now += 1
+    assert backend.get("short") is _MISSING
+    clock.now += 10 ** 6
+    assert backend.get("forever") == {"value": 2}
+
+
+def test_the_least_recently_used_entry_is_evicted(make_backend, clock):
+    backend = make_backend(max_entries=3)
+    for key in ("a", "b", "c"):
+        backend.set(key, key, ttl=60)
+        clock.now += 1
+    backend.get("a")
+    clock.now += 1
+
+    backend.set("d", "d", ttl=60)
+
+    assert backend.get("b") is _MISSING
+    assert [backend.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+
+
+def test_sqlite_entries_are_shared_between_backends_on_one_file(tmp_path):
+    writer = SQLiteCacheBackend(tmp_path / "cache.db")
+    writer.set("key", {"temperature": 21}, ttl=60)
+
+    assert SQLiteCacheBackend(tmp_path / "cache.db").get("key") == {"temperature": 21}
+    assert SQLiteCacheBackend(tmp_path / "cache.db", table="other_cache").get("key") is _MISSING
+
+
+def test_only_functions_with_a_ttl_are_cached():
+    cache = ToolResultCache(ttls={"get_weather": 60})
+    calls = []
+
+    def call():
+        calls.append(1)
+        return {"temperature": len(calls)}
+
+    assert cache.get_or_call("get_weather", {"city": "Paris"}, call) == {"temperature": 1}
+    assert cache.get_or_call("get_weather", {"city": "Paris"}, call) == {"temperature": 1}
+    assert cache.get_or_call("send_email", {"to": "a@example.com"}, call) == {"temperature": 2}
+    assert cache.get_or_call("send_email", {"to": "a@example.com"}, call) == {"temperature": 3}
+    assert cache.stats()["get_weather"] == {"hits": 1, "misses": 1}
+    assert "send_email" not in cache.stats()
+
+
+def test_errors_and_empty_results_are_not_cached():
+    cache = ToolResultCache(ttls={"get_weather": 60})
+
+    for result in (None, {"error": "rate limited"}, '{"error": "rate limited"}'):
+        cache.store("get_weather", {"city": "Paris"}, result)
+        assert cache.lookup("get_weather", {"city": "Paris"}) == (False, None)
+
+
+def test_listeners_hear_of_changed_results_and_invalidations(clock):
+    cache = ToolResultCache(ttls={"get_weather": 10})
+    changed = []
+    cache.add_listener(changed.append)
+
+    cache.store("get_weather", {"city": "Paris"}, {"temperature": 21})
+    clock.now += 20
+    # The same data again after expiry is not a change
+    cache.store("get_weather", {"city": "Paris"}, {"temperature": 21})
+    assert changed == []
+
+    cache.store("get_weather", {"city": "Paris"}, {"temperature": 25})
+    cache.invalidate("get_weather", {"city": "Paris"})
+
+    assert changed == ["get_weather", "get_weather"]
+    assert cache.lookup("get_weather", {"city": "Paris"}) == (False, None)
+
+
+def test_a_failing_listener_does_not_stop_the_others():
+    cache = ToolResultCache(ttls={"get_weather": 60})
+    changed = []
+    cache.add_listener(lambda func_name: 1 / 0)
+    cache.add_listener(changed.append)
+
+    cache.invalidate("get_weather", {"city": "Paris"})
+
+    assert changed == ["get_weather"]
@@ -0,0 +1,82 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from core.deadline import request_deadline
+from core.http_client import HttpClient
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers GET /<delay> with 'ok' after sleeping for delay seconds, and counts the requests."""
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        time.sleep(float(self.path.strip("/")))
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        except OSError:
+            pass  # The client gave up
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = HttpClient(retries=0)
+    yield client
+    client.close()
+
+
+@pytest.mark.parametrize("timeout", [10, (10, 10, 10, 10), httpx.Timeout(10), None])
+def test_the_deadline_caps_an_explicit_timeout(client, url, timeout):
+    started = time.monotonic()
+
+    with request_deadline(0.3), pytest.raises(httpx.TimeoutException):
+        client.get(f"{url}/2", timeout=timeout)
+
+    assert time.monotonic() - started < 1
+
+
+def test_the_deadline_caps_the_client_timeout(client, url):
+    started = time.monotonic()
+
+    with request_deadline(0.3), pytest.raises(httpx.TimeoutException):
+        client.get(f"{url}/2")
+
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize("timeout", [10, httpx.USE_CLIENT_DEFAULT])
+def test_no_request_is_sent_after_the_deadline(client, url, timeout):
+    sent = SlowHandler.requests
+
+    with request_deadline(0.05):
+        time.sleep(0.1)
+        with pytest.raises(httpx.TimeoutException, match="deadline passed"):
+            client.get(f"{url}/0", timeout=timeout)
+
+    assert SlowHandler.requests == sent
+
+
+def test_timeouts_within_the_deadline_are_kept(client, url):
+    with request_deadline(5):
+        assert client.get(f"{url}/0.2", timeout=1).text == "ok"
+        with pytest.raises(httpx.TimeoutException):
+            client.get(f"{url}/2", timeout=0.2)
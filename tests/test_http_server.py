@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from core.http_server import AssistantHTTPServer, SessionRegistry
+from core.thread_pool import ThreadPool
+
+
+@pytest.fixture
+def serve(make_manager):
+    """Starts an AssistantHTTPServer on a free port for a manager against a fake API; returns (api, server, url)."""
+    servers = []
+
+    def start(api_options=None, **options):
+        api, manager = make_manager(api_options)
+        server = AssistantHTTPServer(manager, "Be brief.", port=0, **options)
+        server.start()
+        servers.append(server)
+        return api, server, f"http://127.0.0.1:{server.address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def parse_events(text):
+    """Splits a Server-Sent Events body into (event, data) pairs."""
+    events = []
+    for block in text.split("\n\n"):
+        if block:
+            event, data = block.split("\n")
+            assert event.startswith("event: ") and data.startswith("data: ")
+            events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def post_in_background(url, body):
+    """Sends a POST from another thread; the returned list receives its response."""
+    responses = []
+    thread = threading.Thread(target=lambda: responses.append(httpx.post(url, json=body, timeout=10)))
+    thread.start()
+    return thread, responses
+
+
+def test_sessions_can_outnumber_the_pool_cap(make_manager, wait_until):
+    pool = ThreadPool(size=1, max_threads=2, idle_timeout=0.1, maintenance_interval=0.05)
+    api, manager = make_manager(thread_pool=pool)
+    sessions = SessionRegistry(manager)
+
+    thread_ids = [sessions.get_or_create(f"session-{index}").thread_id for index in range(5)]
+    # Past the pool's idle_timeout: session threads live as long as their session, not their pool lease
+    time.sleep(0.4)
+
+    assert len(set(thread_ids)) == 5
+    assert all(thread_id in api.threads for thread_id in thread_ids)
+    assert pool.stats()["leased"] == 0
+    assert sessions.stats()["sessions"] == 5
+    # The pool keeps refilling up to its own cap regardless of the sessions
+    assert wait_until(lambda: pool.stats()["ready"] == 1)
+
+    assert sessions.close("session-0")
+    assert wait_until(lambda: thread_ids[0] not in api.threads)
+    assert all(thread_id in api.threads for thread_id in thread_ids[1:])
+
+
+def test_the_least_recently_used_session_is_closed_beyond_max_sessions(make_manager, wait_until):
+    api, manager = make_manager(thread_pool=ThreadPool(size=1, max_threads=2, maintenance_interval=0.05))
+    sessions = SessionRegistry(manager, max_sessions=2)
+
+    first = sessions.get_or_create("first").thread_id
+    second = sessions.get_or_create("second").thread_id
+    sessions.get_or_create("first")
+    sessions.get_or_create("third")
+
+    assert sessions.stats()["sessions"] == 2
+    assert sessions.get_or_create("first").thread_id == first
+    assert wait_until(lambda: second not in api.threads)
+
+
+def test_ask_answers_on_the_session_thread(serve):
+    api, server, url = serve()
+
+    first = httpx.post(f"{url}/sessions/s1/ask", json={"message": "What is the weather in Paris?"}, timeout=10)
+    second = httpx.post(f"{url}/sessions/s1/ask", json={"message": "And in Rome?"}, timeout=10)
+
+    assert first.status_code == 200
+    assert first.json()["answer"] == api.reply
+    assert second.json()["thread_id"] == first.json()["thread_id"]
+    assert httpx.delete(f"{url}/sessions/s1").json() == {"session_id": "s1", "closed": True}
+    assert first.json()["thread_id"] not in api.threads
+
+
+def test_stream_sends_server_sent_events(serve):
+    api, server, url = serve({"stream_chunk_delay": 0.01})
+
+    response = httpx.post(f"{url}/sessions/s1/stream", json={"message": "What is the weather in Paris?"},
+                          timeout=10)
+    events = parse_events(response.text)
+
+    assert response.headers["content-type"] == "text/event-stream"
+    assert response.headers["transfer-encoding"] == "chunked"
+    names = [event for event, _ in events]
+    assert names[-1] == "done" and set(names[:-1]) == {"delta"} and len(names) > 2
+    assert "".join(data["text"] for event, data in events[:-1]) == api.reply
+    assert events[-1][1]["text"] == api.reply
+    assert events[-1][1]["session_id"] == "s1"
+
+
+def test_requests_over_capacity_get_503(serve, wait_until):
+    api, server, url = serve({"queue_delay": 1}, max_concurrent_runs=1, queue_timeout=0.1)
+    thread, responses = post_in_background(f"{url}/sessions/s1/ask", {"message": "What is the weather in Paris?"})
+    assert wait_until(lambda: server.health()["in_flight"] == 1)
+
+    rejected = httpx.post(f"{url}/sessions/s2/ask", json={"message": "And in Rome?"}, timeout=10)
+    thread.join()
+
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "1"
+    assert responses[0].status_code == 200
+    assert server.health()["rejected"] == 1
+
+
+def test_a_busy_session_gets_409(serve, wait_until):
+    api, server, url = serve({"queue_delay": 1})
+    thread, responses = post_in_background(f"{url}/sessions/s1/ask", {"message": "What is the weather in Paris?"})
+    assert wait_until(lambda: server.health()["busy"] == 1)
+
+    conflict = httpx.post(f"{url}/sessions/s1/ask", json={"message": "And in Rome?"}, timeout=10)
+    other = httpx.post(f"{url}/sessions/s2/ask", json={"message": "And in Rome?"}, timeout=10)
+    thread.join()
+
+    assert conflict.status_code == 409
+    assert other.status_code == 200
+    assert responses[0].status_code == 200
+
+
+def test_a_request_past_its_deadline_gets_504(serve):
+    api, server, url = serve({"queue_delay": 5}, max_wait_time=0.3)
+
+    response = httpx.post(f"{url}/sessions/s1/ask", json={"message": "What is the weather in Paris?"}, timeout=10)
+
+    assert response.status_code == 504
+    payload = response.json()
+    assert payload["session_id"] == "s1"
+    assert payload["cancelled"] is True
+    assert api.runs[payload["run_id"]]["status"] == "cancelled"
+
+
+def test_a_stream_past_its_deadline_ends_with_a_timeout_event(serve):
+    api, server, url = serve({"queue_delay": 5}, max_wait_time=0.3)
+
+    response = httpx.post(f"{url}/sessions/s1/stream", json={"message": "What is the weather in Paris?"},
+                          timeout=10)
+    events = parse_events(response.text)
+
+    assert response.status_code == 200
+    assert [event for event, _ in events] == ["timeout"]
+    assert events[0][1]["cancelled"] is True
+
+
+def test_invalid_requests(serve):
+    api, server, url = serve()
+
+    assert httpx.post(f"{url}/sessions/s1/ask", json={"message": " "}).status_code == 400
+    assert httpx.post(f"{url}/sessions/s1/other", json={"message": "Hi"}).status_code == 404
+    assert httpx.delete(f"{url}/sessions/unknown").status_code == 404
+    assert httpx.get(f"{url}/health").json()["status"] == "ok"
@@ -0,0 +1,97 @@
+import pytest
+
+from core.message_store import MessageStore, ThreadHistory
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MessageStore(tmp_path / "messages.db", page_size=2)
+
+
+def post(manager, thread_id, *texts):
+    for text in texts:
+        manager.client.beta.threads.messages.create(thread_id, role="user", content=text)
+
+
+def texts(messages):
+    return [message.content[0].text.value for message in messages]
+
+
+def test_only_messages_after_the_last_mirrored_one_are_fetched(make_manager, store):
+    api, manager = make_manager()
+    thread_id = manager.create_thread().id
+    post(manager, thread_id, "one", "two", "three", "four", "five")
+
+    # Five messages over pages of two
+    assert store.sync(manager.client, thread_id) == 5
+    assert api.request_counts["list_messages"] == 3
+
+    api.reset_counts()
+    assert store.sync(manager.client, thread_id) == 0
+    post(manager, thread_id, "six")
+    assert store.sync(manager.client, thread_id) == 1
+    assert api.request_counts["list_messages"] == 2
+    assert texts(store.iter_messages(thread_id, newest_first=False)) == ["one", "two", "three", "four", "five", "six"]
+
+
+def test_the_history_reads_newest_first_from_the_store(make_manager, store):
+    api, manager = make_manager()
+    thread_id = manager.create_thread().id
+    post(manager, thread_id, "one", "two", "three")
+    store.sync(manager.client, thread_id)
+    api.reset_counts()
+
+    history = store.history(thread_id)
+
+    assert len(history) == 3
+    assert texts([history.data[0], history[1], history[-1]]) == ["three", "two", "one"]
+    assert texts(store.iter_messages(thread_id, batch_size=2)) == ["three", "two", "one"]
+    with pytest.raises(IndexError):
+        history[3]
+    assert history.latest(role="assistant") is None
+    assert sum(api.request_counts.values()) == 0
+
+
+def test_forgotten_threads_are_fetched_again(make_manager, store):
+    api, manager = make_manager()
+    thread_id = manager.create_thread().id
+    post(manager, thread_id, "one", "two")
+    store.sync(manager.client, thread_id)
+
+    store.forget(thread_id)
+
+    assert store.last_message_id(thread_id) is None
+    assert store.sync(manager.client, thread_id) == 2
+
+
+def test_the_manager_mirrors_the_messages_of_each_run(make_manager, store):
+    api, manager = make_manager({"tool_fanout": 0}, message_store=store)
+    thread_id = manager.create_thread().id
+
+    first = manager.get_assistant_response("Be brief.", "Hi", thread_id=thread_id, check_interval=0.1,
+                                           max_wait_time=10)
+    api.reset_counts()
+    second = manager.get_assistant_response("Be brief.", "And again?", thread_id=thread_id, check_interval=0.1,
+                                            max_wait_time=10)
+
+    assert isinstance(second, ThreadHistory)
+    assert second.data[0].role == "assistant"
+    assert texts([second.latest(role="user")]) == ["And again?"]
+    assert len(first) == len(second) == 4
+    # The second run only downloads its own question and answer
+    assert api.request_counts["list_messages"] == 1
+
+
+def test_async_sync_follows_the_cursor_too(run_async_manager, store):
+    async def test(api, manager):
+        thread = await manager.client.beta.threads.create()
+        for text in ("one", "two", "three"):
+            await manager.client.beta.threads.messages.create(thread.id, role="user", content=text)
+        synced = await store.sync_async(manager.client, thread.id)
+        await manager.client.beta.threads.messages.create(thread.id, role="user", content="four")
+        return thread.id, synced, await store.sync_async(manager.client, thread.id), api.request_counts["list_messages"]
+
+    thread_id, synced, synced_again, requests = run_async_manager(test)
+
+    assert (synced, synced_again, requests) == (3, 1, 3)
+    assert texts(store.iter_messages(thread_id, newest_first=False)) == ["one", "two", "three", "four"]
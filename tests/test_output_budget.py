@@ -0,0 +1,73 @@
+import json
+
+from core.output_budget import ToolOutputBudget
+from core.tracing import Span
+
+PAGES = [{"url": f"https://example.com/{index}", "content": "word " * (200 * (index + 1))} for index in range(3)]
+
+
+def test_outputs_are_compacted_without_a_budget():
+    budget = ToolOutputBudget()
+
+    output, stats = budget.apply("text_search", json.dumps({"title": "  A   title \n\n  here  "}, indent=4))
+
+    assert output == '{"title":"A title\\nhere"}'
+    assert stats["tokens"] < stats["original_tokens"]
+    assert stats["excerpted"] == 0
+
+
+def test_long_strings_share_the_budget_fairly():
+    budget = ToolOutputBudget(budgets={"scrape": 300})
+
+    output, stats = budget.apply("scrape", json.dumps(PAGES))
+    pages = json.loads(output)
+
+    assert len(output) <= 300 * 4
+    assert stats["excerpted"] == 3
+    # Short fields are left intact and every page keeps an excerpt of about the same size
+    assert [page["url"] for page in pages] == [page["url"] for page in PAGES]
+    lengths = [len(page["content"]) for page in pages]
+    assert max(lengths) - min(lengths) < 20
+    assert all(page["content"].endswith(" more characters]") for page in pages)
+
+
+def test_plain_text_is_excerpted_at_a_word_boundary():
+    budget = ToolOutputBudget(default_budget=25)
+
+    output, stats = budget.apply("anything", "lorem ipsum " * 50)
+
+    assert len(output) <= 100
+    assert output.startswith("lorem ipsum")
+    assert output.endswith(" more characters]")
+    assert output.split(" [...")[0].endswith(("lorem", "ipsum"))
+    assert stats["excerpted"] == 1
+
+
+def test_lists_too_long_for_the_budget_lose_their_last_items():
+    budget = ToolOutputBudget(budgets={"search": 30})
+
+    output, stats = budget.apply("search", json.dumps([{"id": index} for index in range(50)]))
+
+    assert len(output) <= 120
+    assert json.loads(output)[0] == {"id": 0}
+    assert stats["dropped_items"] > 0
+
+
+def test_prepare_tool_output_records_the_sizes(make_manager):
+    _, manager = make_manager(output_budget=ToolOutputBudget(budgets={"text_search": 100}))
+    span = Span("tool.call", "trace")
+
+    output = manager._prepare_tool_output("text_search", PAGES, span)
+
+    assert len(output) <= 400
+    assert span.attributes["output_tokens"] <= 100
+    assert span.attributes["output_tokens_cut"] > 0
+    assert span.attributes["output_excerpted"] == 3
+
+
+def test_prepare_tool_output_only_serializes_without_a_budget(make_manager):
+    _, manager = make_manager()
+    span = Span("tool.call", "trace")
+
+    assert manager._prepare_tool_output("get_weather", {"city": "Paris"}, span) == '{"city": "Paris"}'
+    assert span.attributes == {}
@@ -0,0 +1,166 @@
+import asyncio
+import gc
+import time
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+
+from core.deadline import RunTimeout
+from core.poller import AsyncRunPoller, PollBackoff, RunPoller
+
+
+def start_run(manager):
+    thread_id = manager.create_thread().id
+    manager._add_message_to_thread(thread_id, "user", "What is the weather in Paris?")
+    return thread_id, manager._run_assistant(thread_id, "Be brief.").id
+
+
+def stub_client(retrieve):
+    """A client whose runs.with_raw_response.retrieve is the given function, sync or async."""
+    return SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=SimpleNamespace(
+        with_raw_response=SimpleNamespace(retrieve=retrieve)))))
+
+
+def test_backoff_grows_faster_while_queued():
+    backoff = PollBackoff(initial_interval=0.5, max_interval=8.0, factor=2.0)
+
+    assert backoff.next(0.5, "queued") == 1.0
+    assert backoff.next(0.5, "in_progress") == pytest.approx(0.5 * 2 ** 0.5)
+
+
+def test_backoff_is_capped():
+    backoff = PollBackoff(initial_interval=0.5, max_interval=8.0, factor=2.0)
+
+    assert backoff.next(6.0, "queued") == 8.0
+    # A per-run cap only ever lowers the poller-wide one
+    assert backoff.next(6.0, "queued", max_interval=3.0) == 3.0
+    assert backoff.next(6.0, "queued", max_interval=30.0) == 8.0
+
+
+def test_backoff_restarts_from_the_initial_interval():
+    backoff = PollBackoff(initial_interval=0.5, factor=2.0)
+
+    assert backoff.first() == 0.5
+    assert backoff.next(0.0, "queued") == 1.0
+
+
+def test_jitter_stays_within_bounds():
+    backoff = PollBackoff(jitter=0.2)
+
+    assert all(0.8 <= backoff.with_jitter(1.0) <= 1.2 for _ in range(100))
+
+
+def test_poller_resolves_once_the_run_requires_action(make_manager):
+    api, manager = make_manager({"queue_delay": 0.4, "model_delay": 0.1})
+    poller = RunPoller(manager.client, backoff=PollBackoff(initial_interval=0.05, max_interval=1.0, jitter=0))
+    thread_id, run_id = start_run(manager)
+    api.reset_counts()
+    try:
+        run = poller.watch(thread_id, run_id).result(timeout=5)
+    finally:
+        poller.stop()
+
+    assert run.status == "requires_action"
+    # Polling every 50 ms would take ten calls; backing off while queued takes about half as many
+    assert api.request_counts["get_run"] <= 6
+
+
+def test_watching_a_run_twice_shares_its_future(make_manager):
+    api, manager = make_manager({"queue_delay": 0.2})
+    poller = RunPoller(manager.client, backoff=PollBackoff(initial_interval=0.05, jitter=0))
+    thread_id, run_id = start_run(manager)
+    try:
+        first = poller.watch(thread_id, run_id)
+        second = poller.watch(thread_id, run_id)
+        assert first is second
+        assert first.result(timeout=5).status == "requires_action"
+    finally:
+        poller.stop()
+
+
+def test_unwatch_cancels_the_future(make_manager):
+    api, manager = make_manager({"queue_delay": 5})
+    poller = RunPoller(manager.client, backoff=PollBackoff(initial_interval=0.05, jitter=0))
+    thread_id, run_id = start_run(manager)
+    try:
+        future = poller.watch(thread_id, run_id)
+        poller.unwatch(thread_id, run_id)
+        with pytest.raises(CancelledError):
+            future.result(timeout=1)
+    finally:
+        poller.stop()
+
+
+def test_unexpected_poll_error_resolves_the_future():
+    def retrieve(thread_id, run_id):
+        raise ValueError("malformed response")
+
+    poller = RunPoller(stub_client(retrieve), backoff=PollBackoff(initial_interval=0.01, jitter=0))
+    try:
+        future = poller.watch("thread_1", "run_1")
+        with pytest.raises(ValueError, match="malformed response"):
+            future.result(timeout=2)
+    finally:
+        poller.stop()
+
+
+def test_async_polls_in_flight_survive_garbage_collection():
+    async def retrieve(thread_id, run_id):
+        await asyncio.sleep(0.1)
+        return SimpleNamespace(headers={}, parse=lambda: SimpleNamespace(status="completed"))
+
+    async def test():
+        poller = AsyncRunPoller(stub_client(retrieve), backoff=PollBackoff(initial_interval=0.01, jitter=0))
+        try:
+            future = poller.watch("thread_1", "run_1")
+            await asyncio.sleep(0.05)
+            gc.collect()
+            return (await asyncio.wait_for(future, timeout=2)).status
+        finally:
+            await poller.stop()
+
+    assert asyncio.run(test()) == "completed"
+
+
+def test_async_stop_cancels_the_polls_in_flight():
+    async def retrieve(thread_id, run_id):
+        await asyncio.sleep(10)
+
+    async def test():
+        poller = AsyncRunPoller(stub_client(retrieve), backoff=PollBackoff(initial_interval=0.01, jitter=0))
+        future = poller.watch("thread_1", "run_1")
+        await asyncio.sleep(0.05)
+        tasks = set(poller._poll_tasks)
+        await poller.stop()
+        await asyncio.sleep(0)
+        return future, tasks
+
+    future, tasks = asyncio.run(test())
+
+    assert len(tasks) == 1
+    assert all(task.cancelled() for task in tasks)
+    assert future.cancelled()
+
+
+def test_run_past_its_deadline_is_cancelled(make_manager):
+    api, manager = make_manager({"queue_delay": 5})
+    started = time.monotonic()
+
+    with pytest.raises(RunTimeout) as raised:
+        manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                       max_wait_time=0.5)
+
+    assert time.monotonic() - started < 3
+    assert raised.value.cancelled
+    assert api.runs[raised.value.run_id]["status"] == "cancelled"
+
+
+def test_run_completes_within_its_deadline(make_manager):
+    api, manager = make_manager({"tool_fanout": 2})
+
+    messages = manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                              max_wait_time=10)
+
+    assert messages.data[0].role == "assistant"
+    assert api.request_counts["submit_tool_outputs"] == 1
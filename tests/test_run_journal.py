@@ -0,0 +1,124 @@
+import json
+import time
+
+import pytest
+
+from core.run_journal import COMPLETED, MESSAGE_ADDED, RUN_CREATED, SUBMITTING, RunJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return RunJournal(str(tmp_path / "runs.db"))
+
+
+def start_crashed_run(manager, journal, key):
+    """Journals a request up to the creation of its run, as a process that died right after would have left it."""
+    thread_id = manager.create_thread().id
+    journal.begin(key, thread_id)
+    manager._add_message_to_thread(thread_id, "user", "What is the weather in Paris?")
+    journal.message_added(key)
+    run_id = manager._run_assistant(thread_id, "Be brief.").id
+    journal.run_created(key, run_id)
+    return thread_id, run_id
+
+
+def wait_for_action(manager, thread_id, run_id):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        run = manager.client.beta.threads.runs.retrieve(run_id, thread_id=thread_id)
+        if run.status == "requires_action":
+            return run.required_action.submit_tool_outputs.tool_calls
+        time.sleep(0.02)
+    raise AssertionError(f"Run {run_id} never required action")
+
+
+def test_entries_follow_the_request(journal):
+    journal.begin("req", "thread_1")
+    journal.message_added("req")
+    assert journal.get("req")["phase"] == MESSAGE_ADDED
+    assert journal.unfinished() == []
+
+    journal.run_created("req", "run_1")
+    journal.submitting("req", [{"tool_call_id": "call_1", "output": "{}"}])
+    entry = journal.get("req")
+    assert (entry["run_id"], entry["phase"]) == ("run_1", SUBMITTING)
+    assert [entry["key"] for entry in journal.unfinished()] == ["req"]
+
+    journal.submitted("req", ["call_1"])
+    entry = journal.get("req")
+    assert (entry["phase"], entry["submitted"], entry["pending"]) == (RUN_CREATED, ["call_1"], None)
+
+    journal.finish("req")
+    assert journal.get("req")["phase"] == COMPLETED
+    assert journal.unfinished() == []
+
+
+def test_pending_outputs_must_match_the_tool_calls(journal):
+    outputs = [{"tool_call_id": "call_1", "output": "a"}, {"tool_call_id": "call_2", "output": "b"}]
+    journal.begin("req", "thread_1")
+    journal.run_created("req", "run_1")
+    journal.submitting("req", outputs)
+
+    assert journal.pending_outputs("req", ["call_2", "call_1"]) == outputs
+    assert journal.pending_outputs("req", ["call_1"]) is None
+    assert journal.pending_outputs("other", ["call_1"]) is None
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "runs.db")
+    RunJournal(path).begin("req", "thread_1")
+
+    assert RunJournal(path).get("req")["thread_id"] == "thread_1"
+
+
+def test_resume_runs_reattaches_instead_of_starting_over(make_manager, journal):
+    api, crashed = make_manager()
+    thread_id, run_id = start_crashed_run(crashed, journal, "req")
+    api.reset_counts()
+    _, manager = make_manager(api=api, run_journal=journal)
+
+    results = manager.resume_runs(check_interval=0.1, max_wait_time=10)
+
+    assert results["req"].data[0].run_id == run_id
+    assert api.request_counts["create_run"] == 0
+    assert api.request_counts["create_message"] == 0
+    assert journal.get("req")["phase"] == COMPLETED
+    assert journal.unfinished() == []
+
+
+def test_journaled_outputs_are_submitted_without_calling_the_tools(make_manager, journal):
+    calls = []
+
+    def get_weather(city: str):
+        """
+        Get the current weather for a city.
+        :param city: The city name.
+        """
+        calls.append(city)
+        return {"city": city}
+
+    api, crashed = make_manager({"tool_fanout": 2, "tool_names": ("get_weather",)})
+    thread_id, run_id = start_crashed_run(crashed, journal, "req")
+    tool_calls = wait_for_action(crashed, thread_id, run_id)
+    journal.submitting("req", [{"tool_call_id": call.id, "output": json.dumps({"temperature": 21})}
+                               for call in tool_calls])
+    _, manager = make_manager(api=api, functions=[get_weather], run_journal=journal)
+
+    results = manager.resume_runs(check_interval=0.1, max_wait_time=10)
+
+    assert results["req"].data[0].role == "assistant"
+    assert calls == []
+    assert api.request_counts["submit_tool_outputs"] == 1
+    assert journal.get("req")["submitted"] == [call.id for call in tool_calls]
+
+
+def test_retry_with_the_same_request_id_reuses_the_run(make_manager, journal):
+    api, manager = make_manager(run_journal=journal)
+
+    first = manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                           max_wait_time=10, request_id="req")
+    second = manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                            max_wait_time=10, request_id="req")
+
+    assert second.data[0].id == first.data[0].id
+    assert api.request_counts["create_run"] == 1
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from core.scheduler import BATCH, INTERACTIVE, RequestScheduler, TokenBucket
+
+
+def rate_limit_response(status_code=200, **headers):
+    return httpx.Response(status_code, headers={name.replace("_", "-"): str(value) for name, value in headers.items()})
+
+
+def request():
+    return httpx.Request("POST", "https://api.openai.com/v1/threads/runs", content=b"{}")
+
+
+def test_bucket_is_unlimited_until_observed():
+    bucket = TokenBucket()
+
+    assert bucket.wait_time(1000) == 0.0
+
+
+def test_bucket_refills_at_the_reported_rate():
+    bucket = TokenBucket()
+    # 10 requests left of 100, full again in 9 seconds: 10 requests per second
+    bucket.observe(limit=100, remaining=10, reset_seconds=9.0)
+
+    assert bucket.wait_time(10) == 0.0
+    bucket.consume(10)
+    assert bucket.wait_time(5) == pytest.approx(0.5, abs=0.05)
+
+
+def test_bucket_without_reset_refills_per_minute():
+    bucket = TokenBucket()
+    bucket.observe(limit=60, remaining=60, reset_seconds=0.0)
+    bucket.consume(60)
+
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_bucket_caps_a_cost_larger_than_its_capacity():
+    bucket = TokenBucket()
+    bucket.observe(limit=10, remaining=0, reset_seconds=1.0)
+
+    # Waits for a full bucket instead of forever
+    assert bucket.wait_time(50) == pytest.approx(1.0, abs=0.05)
+
+
+def test_block_empties_the_bucket():
+    bucket = TokenBucket()
+    bucket.block(0.5)
+
+    assert 0.4 < bucket.wait_time(1) <= 0.5
+
+
+def test_observe_reads_the_rate_limit_headers():
+    scheduler = RequestScheduler()
+    scheduler.observe(rate_limit_response(x_ratelimit_limit_requests=100, x_ratelimit_remaining_requests=0,
+                                          x_ratelimit_reset_requests="2s", x_ratelimit_limit_tokens=1000,
+                                          x_ratelimit_remaining_tokens=500, x_ratelimit_reset_tokens="1s"))
+
+    assert scheduler.requests.capacity == 100
+    assert scheduler.requests.wait_time(1) == pytest.approx(0.02, abs=0.01)
+    assert scheduler.tokens.level == 500
+
+
+def test_429_holds_every_call():
+    scheduler = RequestScheduler()
+    scheduler.observe(rate_limit_response(429, retry_after_ms=300))
+
+    started = time.monotonic()
+    scheduler.acquire(request(), INTERACTIVE, time.monotonic() + 5)
+
+    assert time.monotonic() - started >= 0.25
+    assert scheduler.stats()["rate_limited"] == 1
+
+
+def test_acquire_fails_at_the_deadline():
+    scheduler = RequestScheduler()
+    scheduler.observe(rate_limit_response(429, retry_after_ms=5000))
+
+    with pytest.raises(httpx.PoolTimeout):
+        scheduler.acquire(request(), INTERACTIVE, time.monotonic() + 0.2)
+    assert scheduler.stats()["deadline_exceeded"] == 1
+
+
+def test_interactive_calls_are_admitted_before_batch_calls():
+    scheduler = RequestScheduler()
+    scheduler.observe(rate_limit_response(x_ratelimit_limit_requests=600, x_ratelimit_remaining_requests=600))
+    scheduler.requests.block(0.3)
+    admitted = []
+
+    def call(priority):
+        scheduler.acquire(request(), priority, time.monotonic() + 5)
+        admitted.append(priority)
+
+    batch = threading.Thread(target=call, args=(BATCH,))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=call, args=(INTERACTIVE,))
+    interactive.start()
+    batch.join()
+    interactive.join()
+
+    assert admitted == [INTERACTIVE, BATCH]
+
+
+def test_retry_delay_honours_retry_after_and_the_deadline():
+    scheduler = RequestScheduler(initial_backoff=0.1, jitter=0)
+    response = rate_limit_response(429, retry_after_ms=500)
+
+    assert scheduler.retry_delay(0, response, time.monotonic() + 5) == pytest.approx(0.5)
+    assert scheduler.retry_delay(0, response, time.monotonic() + 0.2) is None
+    assert scheduler.retry_delay(0, rate_limit_response(400), time.monotonic() + 5) is None
+    assert scheduler.retry_delay(scheduler.max_retries, response, time.monotonic() + 60) is None
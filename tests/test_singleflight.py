@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def run_concurrently(*targets):
+    """Runs each target in its own thread and returns their results or exceptions, in order."""
+    results = [None] * len(targets)
+
+    def run(index, target):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(index, target)) for index, target in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        time.sleep(0.3)
+        return {"temperature": 21}
+
+    results = run_concurrently(lambda: flight.do("get_weather", fetch), lambda: flight.do("get_weather", fetch))
+
+    assert executions == [1]
+    assert results == [{"temperature": 21}, {"temperature": 21}]
+    assert flight.stats() == {"executions": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_joined_calls_share_the_exception():
+    flight = SingleFlight()
+    error = RuntimeError("backend unavailable")
+
+    def fail():
+        time.sleep(0.3)
+        raise error
+
+    results = run_concurrently(lambda: flight.do("key", fail), lambda: flight.do("key", fail))
+
+    assert results == [error, error]
+    assert flight.stats()["executions"] == 1
+
+
+def test_calls_with_other_keys_or_after_completion_run_again():
+    flight = SingleFlight()
+    executions = []
+
+    def fetch(key):
+        executions.append(key)
+        time.sleep(0.2)
+        return key
+
+    results = run_concurrently(lambda: flight.do("a", lambda: fetch("a")), lambda: flight.do("b", lambda: fetch("b")))
+    assert flight.do("a", lambda: fetch("a")) == "a"
+
+    assert results == ["a", "b"]
+    assert executions == ["a", "b", "a"]
+    assert flight.stats() == {"executions": 3, "coalesced": 0, "in_flight": 0}
+
+
+@pytest.fixture
+def weather_manager(make_manager):
+    """Builds a manager whose get_weather tool records its calls; returns (executions, manager factory)."""
+    executions = []
+
+    def get_weather(city: str):
+        """
+        Get the current weather for a city.
+        :param city: The city name.
+        """
+        executions.append(city)
+        time.sleep(0.3)
+        return {"city": city, "temperature": 21}
+
+    def make(**options):
+        return make_manager(functions=[get_weather], **options)[1]
+
+    return executions, make
+
+
+def same_call_twice(city):
+    call = {"type": "function", "function": {"name": "get_weather", "arguments": json.dumps({"city": city})}}
+    return {"tool_calls": [dict(call, id="call_0"), dict(call, id="call_1")]}
+
+
+def test_identical_tool_calls_of_one_run_execute_once(weather_manager):
+    executions, make = weather_manager
+    manager = make()
+
+    tool_outputs = manager._handle_tool_call(same_call_twice("Paris"))
+
+    assert executions == ["Paris"]
+    assert [json.loads(output["output"]) for output in tool_outputs] == [{"city": "Paris", "temperature": 21}] * 2
+    assert manager.singleflight.stats()["coalesced"] == 1
+
+
+def test_coalescing_can_be_turned_off(weather_manager):
+    executions, make = weather_manager
+    manager = make(coalesce_tool_calls=False)
+
+    manager._handle_tool_call(same_call_twice("Paris"))
+
+    assert executions == ["Paris", "Paris"]
+    assert manager.singleflight is None
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+import config
+from assistant_cli.assistant import AssistantCLI
+from assistant_cli.spinning_loader import SpinningLoader
+from core.deadline import RunTimeout, current_deadline
+
+REPLY = "one two three four five six seven eight nine ten"
+
+
+def stream(manager, **options):
+    return manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1,
+                                          stream=True, **options)
+
+
+def test_a_streamed_answer_arrives_in_deltas(make_manager):
+    api, manager = make_manager({"tool_fanout": 0, "reply": REPLY})
+
+    response = stream(manager, max_wait_time=10)
+    chunks = list(response)
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == REPLY
+    assert response.message.role == "assistant"
+    assert response.data[0].id == response.message.id
+    # The stream replaces status polling and the final messages.list
+    assert api.request_counts["get_run"] == 0
+    assert api.request_counts["list_messages"] == 0
+
+
+def test_tool_calls_are_submitted_during_the_stream(make_manager):
+    calls = []
+
+    def get_weather(city: str):
+        """
+        Get the current weather for a city.
+        :param city: The city name.
+        """
+        calls.append(city)
+        return {"city": city, "temperature": 21}
+
+    api, manager = make_manager({"tool_fanout": 2, "tool_names": ("get_weather",), "reply": REPLY},
+                                functions=[get_weather])
+
+    response = stream(manager, max_wait_time=10)
+
+    assert "".join(response) == REPLY
+    assert sorted(calls) == ["City 0", "City 1"]
+    assert api.request_counts["submit_tool_outputs"] == 1
+    assert api.request_counts["get_run"] == 0
+
+
+def test_the_deadline_does_not_leak_into_the_consumer(make_manager):
+    api, manager = make_manager({"tool_fanout": 0, "reply": REPLY})
+
+    deadlines = [current_deadline() for _ in stream(manager, max_wait_time=10)]
+
+    assert set(deadlines) == {None}
+
+
+def test_a_stream_past_its_deadline_raises_with_the_partial_text(make_manager):
+    api, manager = make_manager({"tool_fanout": 0, "reply": REPLY, "stream_chunk_delay": 0.15})
+    response = stream(manager, max_wait_time=0.6)
+    chunks = []
+
+    with pytest.raises(RunTimeout) as raised:
+        for chunk in response:
+            chunks.append(chunk)
+
+    assert chunks
+    assert raised.value.partial_text == "".join(chunks)
+    assert REPLY.startswith(raised.value.partial_text) and raised.value.partial_text != REPLY
+    # The fake API marks a streamed run completed before sending its text, so the cancel call cannot stop it there
+    assert raised.value.cancelled
+    assert api.request_counts["cancel_run"] == 1
+
+
+@pytest.fixture
+def cli(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "history_dir", str(tmp_path))
+
+    def make(response_handler):
+        return AssistantCLI(response_handler)
+
+    return make
+
+
+def spinning_loaders():
+    return [thread for thread in threading.enumerate() if isinstance(thread, SpinningLoader)]
+
+
+def test_the_spinner_stops_when_the_stream_times_out_before_its_first_chunk(cli):
+    def handler(user_input):
+        raise RunTimeout("Run exceeded its deadline", partial_text="")
+        yield
+
+    response = cli(handler)._get_response_with_loader("Hi")
+
+    assert response == "[The assistant did not answer in time]"
+    assert spinning_loaders() == []
+
+
+def test_the_spinner_stops_when_the_handler_fails(cli):
+    def handler(user_input):
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        cli(handler)._get_response_with_loader("Hi")
+
+    assert spinning_loaders() == []
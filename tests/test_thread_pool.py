@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from core.thread_pool import ThreadPool
+
+
+@pytest.fixture
+def make_pool(make_manager, wait_until):
+    """Builds a ThreadPool with a fast maintenance loop for a manager, and waits for it to fill."""
+    def make(**options):
+        pool = ThreadPool(**{"size": 2, "max_threads": 4, "maintenance_interval": 0.05, **options})
+        api, manager = make_manager(thread_pool=pool)
+        assert wait_until(lambda: pool.stats()["ready"] == pool.size)
+        api.reset_counts()
+        return api, pool
+
+    return make
+
+
+def test_acquire_hands_out_a_ready_thread(make_pool, wait_until):
+    api, pool = make_pool()
+
+    thread_id = pool.acquire()
+
+    assert thread_id in api.threads
+    assert pool.owns(thread_id)
+    # The thread was ready; the pool refills in the background
+    assert wait_until(lambda: pool.stats() == {"ready": 2, "leased": 1, "pending_deletion": 0})
+    assert api.request_counts["create_thread"] == 1
+
+
+def test_released_threads_are_deleted(make_pool, wait_until):
+    api, pool = make_pool()
+    thread_id = pool.acquire()
+
+    pool.release(thread_id)
+
+    assert not pool.owns(thread_id)
+    assert wait_until(lambda: thread_id not in api.threads)
+
+
+def test_idle_leased_threads_are_recycled(make_pool, wait_until):
+    api, pool = make_pool(idle_timeout=0.3)
+    idle = pool.acquire()
+    busy = pool.acquire()
+
+    for _ in range(5):
+        time.sleep(0.1)
+        pool.touch(busy)
+
+    assert wait_until(lambda: idle not in api.threads)
+    assert not pool.owns(idle)
+    assert pool.owns(busy)
+    assert busy in api.threads
+
+
+def test_unleased_threads_are_left_to_the_caller(make_pool, wait_until):
+    api, pool = make_pool(idle_timeout=0.1)
+
+    thread_id = pool.acquire(lease=False)
+    time.sleep(0.4)
+
+    assert not pool.owns(thread_id)
+    assert thread_id in api.threads
+    assert pool.stats()["leased"] == 0
+    pool.release(thread_id)
+    assert wait_until(lambda: thread_id not in api.threads)
+
+
+def test_the_pool_stops_refilling_at_the_cap(make_pool, wait_until):
+    api, pool = make_pool(max_threads=3, idle_timeout=None)
+
+    leased = [pool.acquire() for _ in range(4)]
+    time.sleep(0.3)
+
+    # The fourth thread was created on demand past the cap, and no spare thread is kept
+    assert len(set(leased)) == 4
+    assert pool.stats() == {"ready": 0, "leased": 4, "pending_deletion": 0}
+    assert all(thread_id in api.threads for thread_id in leased)
+
+    pool.release(leased[0])
+    pool.release(leased[1])
+    assert wait_until(lambda: pool.stats() == {"ready": 1, "leased": 2, "pending_deletion": 0})
+
+
+def test_close_deletes_the_ready_threads(make_pool):
+    api, pool = make_pool()
+    ready = list(pool._ready)
+
+    pool.close()
+
+    assert not any(thread_id in api.threads for thread_id in ready)
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+
+
+def lookup(key: str, delay: float):
+    """
+    Look up a key after a delay.
+    :param key: The key to look up.
+    :param delay: Seconds to wait before answering.
+    """
+    time.sleep(delay)
+    if key == "broken":
+        raise RuntimeError("lookup backend unavailable")
+    return {"key": key}
+
+
+async def lookup_async(key: str, delay: float):
+    """
+    Look up a key after a delay, without blocking the event loop.
+    :param key: The key to look up.
+    :param delay: Seconds to wait before answering.
+    """
+    await asyncio.sleep(delay)
+    return {"key": key}
+
+
+def tool_calls(*calls, name="lookup"):
+    """Required actions for (key, delay) calls, with tool_call_ids call_0, call_1, ..."""
+    return {"tool_calls": [
+        {"id": f"call_{index}", "type": "function",
+         "function": {"name": name, "arguments": json.dumps({"key": key, "delay": delay})}}
+        for index, (key, delay) in enumerate(calls)]}
+
+
+def outputs_by_id(tool_outputs):
+    return {output["tool_call_id"]: json.loads(output["output"]) for output in tool_outputs}
+
+
+def test_calls_run_in_parallel_and_come_back_in_call_order(make_manager):
+    api, manager = make_manager(functions=[lookup])
+    started = time.monotonic()
+
+    tool_outputs = manager._handle_tool_call(tool_calls(("a", 0.4), ("b", 0.2), ("c", 0)))
+
+    assert time.monotonic() - started < 0.55
+    assert [output["tool_call_id"] for output in tool_outputs] == ["call_0", "call_1", "call_2"]
+    assert [json.loads(output["output"])["key"] for output in tool_outputs] == ["a", "b", "c"]
+
+
+def test_a_slow_call_times_out_on_its_own(make_manager):
+    api, manager = make_manager(functions=[lookup], tool_timeouts={"lookup": 0.3})
+    started = time.monotonic()
+
+    outputs = outputs_by_id(manager._handle_tool_call(tool_calls(("a", 0.1), ("slow", 2), ("c", 0.2))))
+
+    assert time.monotonic() - started < 1
+    assert outputs["call_0"] == {"key": "a"}
+    assert outputs["call_1"] == {"error": "Function lookup timed out after 0.3 seconds"}
+    assert outputs["call_2"] == {"key": "c"}
+
+
+def test_a_failing_call_does_not_lose_the_other_outputs(make_manager):
+    api, manager = make_manager(functions=[lookup])
+
+    outputs = outputs_by_id(manager._handle_tool_call(tool_calls(("a", 0), ("broken", 0), ("c", 0))))
+
+    assert outputs["call_0"] == {"key": "a"}
+    assert outputs["call_1"] == {"error": "Function lookup failed: lookup backend unavailable"}
+    assert outputs["call_2"] == {"key": "c"}
+
+
+def test_calls_with_invalid_arguments_are_not_run(make_manager):
+    api, manager = make_manager(functions=[lookup])
+    actions = tool_calls(("a", 0), ("b", 0))
+    actions["tool_calls"][0]["function"]["arguments"] = json.dumps({"key": "a", "delay": "soon"})
+
+    outputs = outputs_by_id(manager._handle_tool_call(actions))
+
+    assert outputs["call_0"]["error"].startswith("Invalid arguments for lookup: delay: expected a number")
+    assert outputs["call_1"] == {"key": "b"}
+
+
+def test_async_calls_come_back_in_call_order_and_time_out_on_their_own(run_async_manager):
+    async def test(api, manager):
+        started = time.monotonic()
+        tool_outputs = await manager._handle_tool_call(
+            tool_calls(("a", 0.2), ("slow", 2), ("c", 0), name="lookup_async"))
+        return tool_outputs, time.monotonic() - started
+
+    tool_outputs, elapsed = run_async_manager(test, functions=[lookup_async], tool_timeouts={"lookup_async": 0.4})
+
+    assert elapsed < 1
+    assert [output["tool_call_id"] for output in tool_outputs] == ["call_0", "call_1", "call_2"]
+    assert outputs_by_id(tool_outputs) == {
+        "call_0": {"key": "a"},
+        "call_1": {"error": "Function lookup_async timed out after 0.4 seconds"},
+        "call_2": {"key": "c"},
+    }
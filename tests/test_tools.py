@@ -0,0 +1,241 @@
+import asyncio
+import importlib
+import inspect
+import json
+import sys
+import textwrap
+import uuid
+
+import pytest
+
+from core.parser import FunctionDefinitionParser
+from core.tools import LazyCoroutineTool, LazyTool, SourceDefault, ToolRegistry, lazy_tool
+
+FORECAST_MODULE = '''
+import enum
+import typing
+from typing import List, Literal, Optional
+
+from core.tools import tool
+
+DEFAULT_DAYS = 3
+
+
+class Units(enum.Enum):
+    METRIC = "metric"
+    IMPERIAL = "imperial"
+
+
+class Client:
+    pass
+
+
+@tool
+def get_forecast(city: str, days: int = DEFAULT_DAYS, units: Units = Units.METRIC,
+                 detail: Literal["short", "full"] = "short", hours: "Optional[List[int]]" = None):
+    """
+    Get the weather forecast for a city.
+    :param city: The city name.
+    :param days: Number of days to forecast.
+    :param units: Units of the temperatures.
+    :param detail: Level of detail.
+    :param hours: Hours of the day to include (optional)
+    """
+    return {"city": city, "days": days, "units": units.value, "detail": detail}
+
+
+@tool
+async def search(query: str, limit: typing.Optional[int] = 10):
+    """
+    Search the forecasts.
+    :param query: The search query.
+    :param limit: Maximum number of results.
+    """
+    return [query] * limit
+
+
+def describe(client: Client, timeout: float = DEFAULT_DAYS * 2, *tags, verbose: bool = False, **options):
+    """Not a tool."""
+'''
+
+
+@pytest.fixture
+def tool_package(tmp_path, monkeypatch):
+    """Writes a package of tool modules to tmp_path, importable under a unique name; returns a writer and the name."""
+    name = f"tools_{uuid.uuid4().hex[:8]}"
+    (tmp_path / name).mkdir()
+    (tmp_path / name / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def write(module, source):
+        (tmp_path / name / f"{module}.py").write_text(textwrap.dedent(source))
+        importlib.invalidate_caches()
+        return f"{name}.{module}"
+
+    yield write, name
+    for module in [module for module in sys.modules if module.split(".")[0] == name]:
+        del sys.modules[module]
+
+
+def schema(func):
+    return FunctionDefinitionParser().convert_function_to_json_schema(func)
+
+
+def test_a_lazy_tool_has_the_schema_of_the_real_function(tool_package):
+    write, package = tool_package
+    module = write("forecast", FORECAST_MODULE)
+
+    lazy_schema = schema(lazy_tool(module, "get_forecast"))
+
+    assert module not in sys.modules
+    assert lazy_schema == schema(importlib.import_module(module).get_forecast)
+    properties = lazy_schema["function"]["parameters"]["properties"]
+    assert properties["days"]["default"] == 3
+    assert properties["units"]["enum"] == ["metric", "imperial"] and properties["units"]["default"] == "metric"
+    assert properties["detail"]["enum"] == ["short", "full"]
+    assert properties["hours"]["type"] == "array"
+    assert lazy_schema["function"]["parameters"]["required"] == ["city"]
+
+
+def test_a_lazy_tool_imports_its_module_on_the_first_call(tool_package):
+    write, package = tool_package
+    module = write("forecast", FORECAST_MODULE)
+    forecast = lazy_tool(module, "get_forecast")
+    assert not forecast.loaded
+
+    result = forecast("Paris", detail="full", units=importlib.import_module(module).Units.IMPERIAL)
+
+    assert result == {"city": "Paris", "days": 3, "units": "imperial", "detail": "full"}
+    assert forecast.loaded and forecast.load() is sys.modules[module].get_forecast
+
+
+def test_coroutine_functions_get_an_awaitable_stub(tool_package):
+    write, package = tool_package
+    module = write("forecast", FORECAST_MODULE)
+
+    search = lazy_tool(module, "search")
+
+    assert isinstance(search, LazyCoroutineTool)
+    assert inspect.iscoroutinefunction(type(search).__call__)
+    assert asyncio.run(search("rain", limit=2)) == ["rain", "rain"]
+
+
+def test_unresolvable_annotations_and_defaults_keep_their_source(tool_package):
+    write, package = tool_package
+    module = write("forecast", FORECAST_MODULE)
+
+    parameters = inspect.signature(LazyTool(module, "describe")).parameters
+
+    assert parameters["client"].annotation == "Client"
+    assert isinstance(parameters["timeout"].default, SourceDefault)
+    assert repr(parameters["timeout"].default) == "DEFAULT_DAYS * 2"
+    assert [parameter.kind for parameter in parameters.values()] == [
+        inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.KEYWORD_ONLY, inspect.Parameter.VAR_KEYWORD]
+    assert module not in sys.modules
+
+
+def test_missing_functions_and_modules_are_reported(tool_package):
+    write, package = tool_package
+    module = write("forecast", FORECAST_MODULE)
+
+    with pytest.raises(LookupError, match="does not define a function 'get_weather'"):
+        lazy_tool(module, "get_weather")
+    with pytest.raises(ImportError):
+        lazy_tool(f"{package}.missing", "get_weather")
+
+
+class CountingParser(FunctionDefinitionParser):
+    """Counts the schemas it generates, by function name."""
+
+    def __init__(self):
+        super().__init__()
+        self.generated = []
+
+    def convert_function_to_json_schema(self, func):
+        self.generated.append(func.__name__)
+        return super().convert_function_to_json_schema(func)
+
+
+@pytest.fixture
+def make_registry(tool_package, tmp_path):
+    """Builds ToolRegistry instances over the test package sharing one schema cache; returns (write, make)."""
+    write, package = tool_package
+    write("forecast", FORECAST_MODULE)
+    write("other", '''
+        from core.tools import tool
+
+
+        @tool
+        def get_alerts(region: str):
+            """
+            Get the weather alerts of a region.
+            :param region: The region name.
+            """
+            return []
+        ''')
+
+    def make():
+        return ToolRegistry(packages=[package], entry_point_group=None, cache_path=str(tmp_path / "schemas.json"),
+                            parser=CountingParser())
+
+    return write, make
+
+
+def test_only_tool_functions_are_registered_without_importing_them(make_registry):
+    write, make = make_registry
+    registry = make()
+
+    tools = registry.discover()
+
+    assert sorted(tools) == ["get_alerts", "get_forecast", "search"]
+    assert isinstance(tools["search"], LazyCoroutineTool)
+    assert tools["get_forecast"].tool_schema == schema(lazy_tool(tools["get_forecast"].module, "get_forecast"))
+    assert not any(tool.loaded for tool in tools.values())
+    assert [tool.__name__ for tool in registry.tools(["search", "get_alerts"])] == ["search", "get_alerts"]
+    with pytest.raises(LookupError, match="get_weather"):
+        registry.tools(["get_weather"])
+
+
+def test_cached_schemas_are_reused(make_registry):
+    write, make = make_registry
+    first = make()
+    first.discover()
+
+    second = make()
+    tools = second.discover()
+
+    assert sorted(first.parser.generated) == ["get_alerts", "get_forecast", "search"]
+    assert second.parser.generated == []
+    assert tools["get_alerts"].tool_schema == first.tools(["get_alerts"])[0].tool_schema
+
+
+def test_a_changed_function_gets_a_new_schema(make_registry):
+    write, make = make_registry
+    make().discover()
+    # Only get_forecast changes in its module, so search keeps its cached schema; the other module is replaced
+    write("forecast", FORECAST_MODULE.replace("Number of days to forecast.", "Number of days ahead."))
+    write("other", FORECAST_MODULE.replace("def get_forecast", "def get_outlook").replace(
+        "async def search", "async def find"))
+    registry = make()
+
+    tools = registry.discover()
+
+    assert sorted(registry.parser.generated) == ["find", "get_forecast", "get_outlook"]
+    assert "get_alerts" not in tools
+    assert tools["get_forecast"].tool_schema["function"]["parameters"]["properties"]["days"]["description"] == \
+        "Number of days ahead."
+
+
+def test_the_cache_is_dropped_when_the_parser_changes(make_registry, tmp_path):
+    write, make = make_registry
+    make().discover()
+    cache_path = tmp_path / "schemas.json"
+    cache = json.loads(cache_path.read_text())
+    cache_path.write_text(json.dumps(dict(cache, parser="an older parser")))
+    registry = make()
+
+    registry.discover()
+
+    assert sorted(registry.parser.generated) == ["get_alerts", "get_forecast", "search"]
+    assert json.loads(cache_path.read_text())["parser"] == cache["parser"]
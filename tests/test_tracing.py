@@ -0,0 +1,82 @@
+import json
+
+from core.tracing import InMemoryExporter, LatencyHistograms, Span, Tracer
+
+
+def record(histograms, phase, *durations, tool=""):
+    """Exports finished spans of exactly the given durations."""
+    for duration in durations:
+        span = Span(phase, trace_id="trace", attributes={"tool": tool} if tool else None, start_time=0)
+        span.end_time = duration
+        histograms.export(span)
+
+
+def test_quantiles_cover_the_most_recent_window():
+    histograms = LatencyHistograms(window=4)
+    record(histograms, "run.wait", 10, 10, 10, 1, 2, 3, 4)
+
+    assert histograms.quantile("run.wait", 0.5) == 3
+    assert histograms.quantile("run.wait", 0.99) == 4
+    assert histograms.summary()["run.wait"]["count"] == 7
+    assert histograms.quantile("run.create", 0.5) is None
+
+
+def test_tool_calls_are_kept_apart_per_tool():
+    histograms = LatencyHistograms()
+    record(histograms, "tool.call", 0.1, tool="get_weather")
+    record(histograms, "tool.call", 2, 2, tool="text_search")
+
+    summary = histograms.summary()
+
+    assert summary["tool.call[get_weather]"]["count"] == 1
+    assert summary["tool.call[text_search]"]["p50"] == 2
+    assert histograms.quantile("tool.call", 0.5, tool="get_weather") == 0.1
+
+
+def test_buckets_are_cumulative_and_include_their_bound():
+    histograms = LatencyHistograms(buckets=(0.1, 1.0))
+    record(histograms, "run.wait", 0.05, 0.1, 0.5, 5)
+
+    lines = histograms.render().splitlines()
+
+    assert 'assistant_phase_duration_seconds_bucket{phase="run.wait",le="0.1"} 2' in lines
+    assert 'assistant_phase_duration_seconds_bucket{phase="run.wait",le="1.0"} 3' in lines
+    assert 'assistant_phase_duration_seconds_bucket{phase="run.wait",le="+Inf"} 4' in lines
+    assert 'assistant_phase_duration_seconds_count{phase="run.wait"} 4' in lines
+    assert 'assistant_phase_duration_seconds_recent_count{phase="run.wait"} 4' in lines
+
+
+def test_merged_snapshots_add_up():
+    workers = [LatencyHistograms(buckets=(0.1, 1.0), window=3) for _ in range(2)]
+    record(workers[0], "run.wait", 0.05, 0.5)
+    record(workers[1], "run.wait", 5, 5)
+    record(workers[1], "tool.call", 0.2, tool="get_weather")
+    merged = LatencyHistograms(buckets=(0.1, 1.0), window=3)
+
+    for worker in workers:
+        # Snapshots cross process boundaries as plain data
+        merged.merge(json.loads(json.dumps(worker.snapshot())))
+
+    summary = merged.summary()
+    assert summary["run.wait"]["count"] == 4
+    assert summary["tool.call[get_weather]"]["count"] == 1
+    assert 'assistant_phase_duration_seconds_bucket{phase="run.wait",le="1.0"} 2' in merged.render().splitlines()
+    assert 'assistant_phase_duration_seconds_sum{phase="run.wait"} 10.55' in merged.render().splitlines()
+    # The recent window keeps its size across merges
+    assert merged.snapshot()[0]["recent"] == [0.5, 5, 5]
+
+
+def test_a_request_records_its_phases(make_manager):
+    histograms, spans = LatencyHistograms(), InMemoryExporter()
+    api, manager = make_manager({"tool_fanout": 2}, tracer=Tracer([histograms, spans]))
+
+    manager.get_assistant_response("Be brief.", "What is the weather in Paris?", check_interval=0.1, max_wait_time=10)
+
+    summary = histograms.summary()
+    for phase in ("assistant.response", "run.create", "run.wait", "tool.dispatch", "run.submit_tool_outputs"):
+        assert summary[phase]["count"] >= 1
+    assert summary["tool.call[get_weather]"]["count"] == 1
+    assert summary["tool.call[text_search]"]["count"] == 1
+    # Every span of the request belongs to the trace of its root span
+    root, = [span for span in spans.get_spans() if span.name == "assistant.response"]
+    assert {span.trace_id for span in spans.get_spans()} == {root.trace_id}
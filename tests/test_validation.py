@@ -0,0 +1,99 @@
+import enum
+from typing import Optional
+
+import pytest
+
+from core.validation import ToolArgumentError, compile_validator, enum_parameters
+
+SEARCH_PARAMETERS = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string"},
+        "limit": {"type": "integer"},
+        "threshold": {"type": "number"},
+        "exact": {"type": "boolean"},
+        "tags": {"type": "array", "items": {"type": "integer"}},
+        "filters": {"type": "object", "additionalProperties": {"type": "string"}},
+        "order": {"type": "string", "enum": ["asc", "desc"]},
+    },
+    "required": ["query"],
+}
+
+
+class Unit(enum.Enum):
+    CELSIUS = "celsius"
+    FAHRENHEIT = "fahrenheit"
+
+
+def get_temperature(city: str, unit: Optional[Unit] = None):
+    pass
+
+
+@pytest.fixture
+def validate():
+    return compile_validator("search", SEARCH_PARAMETERS)
+
+
+def test_arguments_are_coerced_to_the_schema(validate):
+    arguments = validate('{"query": 42, "limit": "10", "threshold": "0.5", "exact": "yes", "tags": "[1, \\"2\\"]", '
+                         '"filters": {"lang": 1}, "order": "desc"}')
+
+    assert arguments == {"query": "42", "limit": 10, "threshold": 0.5, "exact": True, "tags": [1, 2],
+                         "filters": {"lang": "1"}, "order": "desc"}
+
+
+def test_integral_floats_become_integers(validate):
+    assert validate({"query": "q", "limit": 3.0})["limit"] == 3
+    assert validate({"query": "q", "limit": "3.0"})["limit"] == 3
+
+
+def test_optional_null_arguments_are_left_out(validate):
+    assert validate('{"query": "q", "limit": null}') == {"query": "q"}
+
+
+def test_every_problem_is_reported(validate):
+    with pytest.raises(ToolArgumentError) as raised:
+        validate({"limit": "ten", "tags": [1, "x"], "order": "random", "page": 2})
+
+    assert raised.value.func_name == "search"
+    assert raised.value.problems == [
+        "limit: expected an integer, got \"ten\"",
+        "tags[1]: expected an integer, got \"x\"",
+        "order: expected one of \"asc\", \"desc\", got \"random\"",
+        "unexpected argument 'page'",
+        "missing required argument 'query'",
+    ]
+    assert "Expected arguments: query (string, required)" in str(raised.value)
+
+
+def test_invalid_json_is_rejected(validate):
+    with pytest.raises(ToolArgumentError, match="not valid JSON"):
+        validate('{"query": ')
+
+    with pytest.raises(ToolArgumentError, match="must be a JSON object"):
+        validate("[1, 2]")
+
+
+def test_booleans_are_not_numbers(validate):
+    with pytest.raises(ToolArgumentError, match="limit: expected an integer, got true"):
+        validate({"query": "q", "limit": True})
+
+
+def test_enum_parameters_become_members():
+    enums = enum_parameters(get_temperature)
+    validate = compile_validator("get_temperature", {
+        "type": "object",
+        "properties": {"city": {"type": "string"}, "unit": {"type": "string", "enum": ["celsius", "fahrenheit"]}},
+        "required": ["city"],
+    }, enums)
+
+    assert enums == {"unit": Unit}
+    assert validate('{"city": "Paris", "unit": "celsius"}') == {"city": "Paris", "unit": Unit.CELSIUS}
+
+
+def test_tools_without_parameters_accept_no_arguments():
+    validate = compile_validator("ping", None)
+
+    assert validate("") == {}
+    with pytest.raises(ToolArgumentError, match="unexpected argument 'x'"):
+        validate({"x": 1})
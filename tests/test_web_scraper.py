@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from connectors.web_scraper import WebContentScraper
+from core.deadline import request_deadline
+
+TIMED_OUT = "Timed out: the page did not load within the time budget"
+SKIPPED = "Skipped: the time budget ran out before the page was fetched"
+# A fetch's own timeout is cut to the budget, so it may fail at the same moment the budget runs out
+CUT_OFF = (TIMED_OUT, "Failed to fetch page content")
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves /<delay>/<name> as a page with one paragraph of text, after sleeping for delay seconds."""
+
+    def do_GET(self):
+        delay, name = self.path.strip("/").split("/")
+        time.sleep(float(delay))
+        body = f"<html><body><p>Page {name}</p></body></html>".encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # The scraper gave up on the page
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def port():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def page(port):
+    def url(delay, name, host="127.0.0.1"):
+        return f"http://{host}:{port}/{delay}/{name}"
+
+    return url
+
+
+def test_results_are_yielded_as_pages_finish(page):
+    scraper = WebContentScraper(max_per_host=4)
+
+    results = list(scraper.iter_scrape([page(0.4, "slow"), page(0, "fast")]))
+
+    assert [index for index, _ in results] == [1, 0]
+    assert results[0][1] == {"url": page(0, "fast"), "content": "Page fast"}
+
+
+def test_a_busy_host_does_not_hold_back_other_hosts(page):
+    scraper = WebContentScraper(max_per_host=1)
+
+    results = list(scraper.iter_scrape([page(0.3, "a"), page(0, "b"), page(0, "c", host="localhost")]))
+
+    # The second page of 127.0.0.1 waits for the first; the localhost page starts right away
+    assert [index for index, _ in results] == [2, 0, 1]
+
+
+def test_pages_left_when_the_budget_runs_out(page):
+    scraper = WebContentScraper(max_concurrency=2, max_per_host=4)
+    started = time.monotonic()
+
+    results = dict(scraper.iter_scrape([page(0, "fast"), page(2, "slow"), page(2, "slower"), page(0, "late")],
+                                       budget=0.5))
+
+    assert time.monotonic() - started < 1.5
+    assert results[0]["content"] == "Page fast"
+    assert results[1]["error"] in CUT_OFF
+    # The third page took the slot of the first and is still loading; the last never got one
+    assert results[2]["error"] in CUT_OFF
+    assert results[3]["error"] == SKIPPED
+
+
+def test_the_run_deadline_caps_the_budget(page):
+    scraper = WebContentScraper(max_per_host=4, budget=20)
+    started = time.monotonic()
+
+    with request_deadline(0.3):
+        results = dict(scraper.iter_scrape([page(2, "slow")]))
+
+    assert time.monotonic() - started < 1.5
+    assert results[0]["error"] in CUT_OFF
+
+
+def test_urls_from_a_generator_are_fetched_as_they_arrive(page):
+    scraper = WebContentScraper(max_per_host=4)
+
+    def search():
+        yield page(0, "first")
+        time.sleep(0.3)
+        yield page(0, "second")
+
+    started = time.monotonic()
+    pages = scraper.iter_scrape(search())
+    index, result = next(pages)
+
+    assert (index, result["content"]) == (0, "Page first")
+    assert time.monotonic() - started < 0.25
+    assert [index for index, _ in pages] == [1]
+
+
+def test_scrape_multiple_websites_keeps_the_input_order(page):
+    scraper = WebContentScraper(max_per_host=4)
+    urls = [page(0.3, "a"), page(0, "b"), page(0.1, "c")]
+
+    output = scraper.scrape_multiple_websites(urls)
+
+    assert [result["content"] for result in json.loads(output)] == ["Page a", "Page b", "Page c"]
+    # Compact JSON: indentation would only add tokens to the tool output
+    assert "\n" not in output
+
+
+def test_scrape_first_stops_at_enough_good_pages(page):
+    scraper = WebContentScraper(max_per_host=4, min_content_length=5)
+    started = time.monotonic()
+
+    output = scraper.scrape_first([page(2, "slow"), page(0, "b"), page(0.1, "c")], count=2)
+
+    assert time.monotonic() - started < 1.5
+    assert [result["content"] for result in json.loads(output)] == ["Page b", "Page c"]
+    assert "\n" not in output
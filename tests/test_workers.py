@@ -0,0 +1,98 @@
+import functools
+import os
+import signal
+import subprocess
+import sys
+import threading
+import zlib
+
+import pytest
+
+from core.assistant import AssistantManager
+from core.workers import WorkerError, WorkerPool
+
+
+def make_worker_manager(base_url):
+    """Manager factory of the worker processes; module-level so that it can be pickled."""
+    return AssistantManager(api_key="sk-test", assistant_id="asst_test", base_url=base_url)
+
+
+@pytest.fixture
+def start_pool(fake_api):
+    """Starts a WorkerPool whose workers answer from a fake API; returns (api, pool)."""
+    pools = []
+
+    def start(api_options=None, **options):
+        api, base_url = fake_api(**{"tool_fanout": 0, **(api_options or {})})
+        pool = WorkerPool(functools.partial(make_worker_manager, base_url), **options).start()
+        pools.append(pool)
+        return api, pool
+
+    yield start
+    for pool in pools:
+        pool.shutdown()
+
+
+def ask(pool, thread_id=None, message="What is the weather in Paris?"):
+    return pool.get_assistant_response("Be brief.", message, thread_id=thread_id, check_interval=0.1,
+                                       max_wait_time=10)
+
+
+def test_threads_are_sharded_by_crc32():
+    pool = WorkerPool(make_worker_manager, workers=4)
+    thread_ids = [f"thread_{index}" for index in range(200)]
+
+    shards = [pool.worker_for(thread_id) for thread_id in thread_ids]
+
+    assert shards == [zlib.crc32(thread_id.encode()) % 4 for thread_id in thread_ids]
+    assert set(shards) == {0, 1, 2, 3}
+    # Unlike hash(), the shard of a thread does not depend on the process's hash seed
+    script = "import zlib; print(zlib.crc32(b'thread_7') % 4)"
+    other_process = subprocess.run([sys.executable, "-c", script], env=dict(os.environ, PYTHONHASHSEED="123"),
+                                   capture_output=True, text=True, check=True)
+    assert int(other_process.stdout) == pool.worker_for("thread_7")
+
+
+def test_requests_on_a_thread_go_to_its_worker(start_pool, wait_until):
+    api, pool = start_pool(workers=2, health_interval=0.1)
+    thread_id = pool.create_thread().id
+    owner = pool.worker_for(thread_id)
+
+    answers = [ask(pool, thread_id).data[0] for _ in range(3)]
+
+    assert {answer.thread_id for answer in answers} == {thread_id}
+    assert [answer.content[0].text.value for answer in answers] == [api.reply] * 3
+    # create_thread and the three answers
+    assert wait_until(lambda: pool.stats()["handled"] == 4)
+    assert pool.stats()["workers"][owner]["handled"] >= 3
+    assert pool.histograms().summary()["assistant.response"]["count"] == 3
+
+
+def test_a_streamed_answer_is_relayed_from_the_worker(start_pool):
+    api, pool = start_pool({"stream_chunk_delay": 0.01}, workers=1)
+
+    response = pool.get_assistant_response("Be brief.", "Hi", check_interval=0.1, max_wait_time=10, stream=True)
+
+    chunks = list(response)
+    assert len(chunks) > 1 and "".join(chunks) == api.reply
+    assert response.message.role == "assistant"
+
+
+def test_a_dead_worker_fails_its_requests_and_is_restarted(start_pool, wait_until):
+    api, pool = start_pool({"queue_delay": 5}, workers=1, health_interval=0.1)
+    old_pid = pool.stats()["workers"][0]["pid"]
+    failures = []
+    thread = threading.Thread(target=lambda: failures.append(pytest.raises(WorkerError, ask, pool)))
+    thread.start()
+    assert wait_until(lambda: api.request_counts["create_run"] == 1)
+
+    os.kill(old_pid, signal.SIGKILL)
+    thread.join(timeout=5)
+
+    assert "exited while processing the request" in str(failures[0].value)
+    assert wait_until(lambda: pool.stats()["workers"][0]["ready"], timeout=30)
+    stats = pool.stats()
+    assert stats["restarts"] == 1
+    assert stats["workers"][0]["pid"] != old_pid
+    api.queue_delay = 0.02
+    assert ask(pool).data[0].content[0].text.value == api.reply